@@ -0,0 +1,144 @@
+"""
+AI分析结果磁盘缓存模块
+
+按模型、温度和完整的提示消息(系统提示 + 用户提示, 含数据样本和统计信息)计算内容哈希,
+相同的输入直接返回上次的分析结果, 不再调用API; 重复分析同一证券时可立即得到报告
+
+主要功能:
+- 缓存条目在TTL内有效, 过期后重新调用API
+- 缓存目录超过大小上限时按最近访问时间(LRU)淘汰
+- 统计命中率和节省的token数
+
+示例用法:
+    from analysis_cache import AnalysisCache
+
+    cache = AnalysisCache("cache/analysis", ttl=7 * 24 * 3600)
+    key = cache.key(model, temperature, messages)
+    entry = cache.get(key)
+    if entry is None:
+        cache.put(key, asdict(result), tokens=usage.total_tokens)
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from cache_utils import atomic_write, cache_key, evict_lru, touch
+
+logger = logging.getLogger(__name__)
+
+# 缓存格式版本, 结果结构变化时递增使旧条目失效
+FORMAT_VERSION = 1
+
+
+class AnalysisCache:
+    """AI分析结果磁盘缓存"""
+
+    def __init__(self,
+                 cache_dir: str = "cache/analysis",
+                 ttl: Optional[float] = 7 * 24 * 3600,
+                 max_size_bytes: int = 50 * 1024 * 1024):
+        """初始化缓存
+
+        Args:
+            cache_dir: 缓存目录
+            ttl: 缓存有效期(秒), None表示不过期
+            max_size_bytes: 缓存目录的最大总字节数
+        """
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.max_size_bytes = max_size_bytes
+        os.makedirs(cache_dir, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._expired = 0
+        self._evicted = 0
+        self._tokens_saved = 0
+
+    @staticmethod
+    def key(model: str, temperature: float, messages: List[Dict[str, str]]) -> str:
+        """根据模型、温度和提示消息计算缓存键"""
+        return cache_key(FORMAT_VERSION, model, temperature, messages)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """读取缓存的分析结果
+
+        Returns:
+            缓存的结果字段字典, 未命中或已过期时返回None
+        """
+        path = self._path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            with self._lock:
+                self._misses += 1
+            return None
+
+        if self.ttl is not None and time.time() - entry.get('stored_at', 0) > self.ttl:
+            with self._lock:
+                self._misses += 1
+                self._expired += 1
+            return None
+
+        touch(path)
+        with self._lock:
+            self._hits += 1
+            self._tokens_saved += entry.get('tokens') or 0
+        return entry['result']
+
+    def put(self, key: str, result: Dict[str, Any],
+            tokens: Optional[int] = None, model: Optional[str] = None) -> None:
+        """保存分析结果
+
+        Args:
+            key: 缓存键(见key)
+            result: 结果字段字典
+            tokens: 本次调用消耗的token数(用于统计命中时节省的token)
+            model: 模型名称(仅记录)
+        """
+        entry = {
+            'result': result,
+            'tokens': tokens,
+            'model': model,
+            'stored_at': time.time(),
+        }
+        atomic_write(self._path(key), json.dumps(entry, ensure_ascii=False).encode('utf-8'))
+
+        evicted = evict_lru(self.cache_dir, self.max_size_bytes)
+        if evicted:
+            with self._lock:
+                self._evicted += evicted
+
+    def stats(self) -> Dict[str, Any]:
+        """获取缓存统计"""
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                'hits': self._hits,
+                'misses': self._misses,
+                'expired': self._expired,
+                'evicted': self._evicted,
+                'hit_rate': round(self._hits / lookups, 3) if lookups else 0.0,
+                'tokens_saved': self._tokens_saved,
+            }
+
+    def clear(self) -> None:
+        """清空缓存目录"""
+        for name in os.listdir(self.cache_dir):
+            try:
+                os.remove(os.path.join(self.cache_dir, name))
+            except OSError:
+                pass
+
+
+# 模块导出
+__all__ = ['AnalysisCache']
@@ -0,0 +1,167 @@
+"""
+批量数据刷新模块
+
+并发抓取多个证券代码的财务报表, 每抓取完一家公司即执行转置、数字转换、
+数据清洗流程并写出该公司的列式存储(可选同时导出Excel), 适用于夜间定时刷新
+
+主要功能:
+- 从命令行参数或代码列表文件读取证券代码/URL
+- 按主机限速的并发抓取(默认使用API模式, 无需浏览器)
+- 进度文件记录已完成的代码, 中断后重新运行会跳过已完成部分
+
+示例用法:
+    python batch_runner.py 03333 00700 --output output/batch --workers 8 --rate 4
+    python batch_runner.py --codes-file codes.txt --mode api --excel
+
+    from batch_runner import run_batch
+    summary = run_batch(["03333", "00700"], output_dir="output/batch")
+"""
+
+import argparse
+import logging
+import os
+from typing import Any, Dict, List, Optional
+
+import pandas as pd
+
+from eastmoney_api import F10_URL_TEMPLATES
+from pipeline import process_tables
+from sheet_store import STORE_NAME, export_workbook
+from rate_limiter import HostRateLimiter
+from table_scraper import TableScraper
+
+logger = logging.getLogger(__name__)
+
+# 进度文件名(位于输出目录下)
+PROGRESS_FILE = "progress.json"
+
+
+def target_dir_name(target: str) -> str:
+    """根据证券代码/URL生成输出子目录名"""
+    if target.startswith(('http://', 'https://')):
+        from eastmoney_api import parse_f10_url
+        try:
+            return parse_f10_url(target)[1]
+        except ValueError:
+            pass
+    return "".join(c if c.isalnum() or c in '.-_' else '_' for c in target)
+
+
+def run_batch(targets: List[str],
+              output_dir: str = "output/batch",
+              scraper: Optional[TableScraper] = None,
+              max_workers: int = 4,
+              progress_file: Optional[str] = None,
+              market: str = 'HK',
+              export_excel: bool = False) -> Dict[str, Any]:
+    """批量抓取并处理多个证券代码
+
+    每个目标的结果写入 output_dir/<代码>/financial_data 列式存储
+
+    Args:
+        targets: 证券代码或F10页面URL列表
+        output_dir: 输出根目录
+        scraper: 使用的爬虫实例(默认创建带限速的API模式爬虫)
+        max_workers: 并发抓取线程数
+        progress_file: 进度文件路径(默认为 output_dir/progress.json)
+        market: 证券代码所属市场
+        export_excel: 是否同时导出 financial_data.xlsx
+
+    Returns:
+        scrape_batch返回的汇总字典, 另含 outputs(目标 -> 存储目录)
+
+    Raises:
+        ValueError: 不支持的市场(目前仅支持港股)
+    """
+    if market not in F10_URL_TEMPLATES:
+        raise ValueError(f"不支持的市场: {market}, 可选: {sorted(F10_URL_TEMPLATES)}")
+    owns_scraper = scraper is None
+    if owns_scraper:
+        scraper = TableScraper(mode='api', rate_limiter=HostRateLimiter(rate=2.0))
+    os.makedirs(output_dir, exist_ok=True)
+    progress_file = progress_file or os.path.join(output_dir, PROGRESS_FILE)
+    outputs = {}
+
+    def handle(target: str, tables: List[pd.DataFrame]) -> None:
+        if not tables:
+            raise ValueError("未找到任何表格数据")
+        company_dir = os.path.join(output_dir, target_dir_name(target))
+        os.makedirs(company_dir, exist_ok=True)
+        store_dir = os.path.join(company_dir, STORE_NAME)
+        process_tables(tables, store_dir)
+        if export_excel:
+            export_workbook(store_dir)
+        outputs[target] = store_dir
+        logger.info(f"{target} 数据已保存到: {store_dir}")
+
+    try:
+        summary = scraper.scrape_batch(
+            targets,
+            max_workers=max_workers,
+            progress_file=progress_file,
+            on_result=handle,
+            market=market
+        )
+    finally:
+        if owns_scraper:
+            scraper.close()
+    summary['outputs'] = outputs
+    return summary
+
+
+def read_targets(codes: List[str], codes_file: Optional[str] = None) -> List[str]:
+    """合并命令行代码和代码文件(每行一个, #开头为注释)"""
+    targets = list(codes)
+    if codes_file:
+        with open(codes_file, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if line and not line.startswith('#'):
+                    targets.append(line)
+    return list(dict.fromkeys(targets))
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """命令行入口"""
+    parser = argparse.ArgumentParser(description="批量抓取并处理多家公司的财务报表")
+    parser.add_argument('codes', nargs='*', help="证券代码或F10页面URL")
+    parser.add_argument('--codes-file', help="代码列表文件, 每行一个")
+    parser.add_argument('--output', default="output/batch", help="输出根目录")
+    parser.add_argument('--mode', choices=['api', 'fast', 'js'], default='api', help="爬取模式")
+    parser.add_argument('--market', choices=sorted(F10_URL_TEMPLATES), default='HK',
+                        help="证券代码所属市场(目前仅支持港股F10页面)")
+    parser.add_argument('--workers', type=int, default=4, help="并发抓取线程数")
+    parser.add_argument('--rate', type=float, default=2.0, help="每个主机每秒最大请求数")
+    parser.add_argument('--progress-file', help="进度文件路径(默认位于输出目录下)")
+    parser.add_argument('--excel', action='store_true', help="同时导出每家公司的Excel文件")
+    parser.add_argument('--driver-path', default='chromedriver.exe', help="浏览器驱动路径(仅JS模式)")
+    args = parser.parse_args(argv)
+
+    targets = read_targets(args.codes, args.codes_file)
+    if not targets:
+        parser.error("请提供证券代码或--codes-file")
+
+    scraper = TableScraper(
+        mode=args.mode,
+        driver_path=args.driver_path if args.mode == 'js' else None,
+        pool_max_size=args.workers,
+        rate_limiter=HostRateLimiter(rate=args.rate)
+    )
+    try:
+        summary = run_batch(targets, output_dir=args.output, scraper=scraper,
+                            max_workers=args.workers, progress_file=args.progress_file,
+                            market=args.market, export_excel=args.excel)
+    finally:
+        scraper.close()
+
+    for target, error in summary['failed'].items():
+        logger.error(f"{target}: {error}")
+    return 1 if summary['failed'] else 0
+
+
+# 模块导出
+__all__ = ['run_batch', 'read_targets', 'target_dir_name']
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
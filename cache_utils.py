@@ -0,0 +1,99 @@
+"""
+磁盘缓存公共工具模块
+
+为各类磁盘缓存(HTTP响应、解析结果等)提供缓存键计算、原子写入和按最近访问时间淘汰
+
+约定: 每个缓存条目由若干同名(不同后缀)的文件组成, 如 <key>.json + <key>.body,
+条目的最近访问时间记录在文件的修改时间上
+
+示例用法:
+    from cache_utils import cache_key, atomic_write, touch, evict_lru
+
+    key = cache_key(url, headers)
+    atomic_write(os.path.join(cache_dir, f"{key}.body"), content)
+    evict_lru(cache_dir, max_bytes=100 * 1024 * 1024)
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+
+def cache_key(*parts: Any) -> str:
+    """根据任意可JSON序列化的参数计算sha256缓存键"""
+    payload = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def atomic_write(path: str, data: bytes) -> None:
+    """先写临时文件再替换, 避免并发读取到写了一半的文件"""
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def touch(path: str) -> None:
+    """更新文件的最近访问时间(用于LRU淘汰)"""
+    try:
+        os.utime(path, None)
+    except OSError:
+        pass
+
+
+def evict_lru(directory: str, max_bytes: int) -> int:
+    """按最近访问时间淘汰条目, 直到目录总大小不超过max_bytes
+
+    同名不同后缀的文件视为同一条目, 一起删除
+
+    Args:
+        directory: 缓存目录
+        max_bytes: 允许的最大总字节数
+
+    Returns:
+        被淘汰的条目数
+    """
+    entries = {}
+    total = 0
+    try:
+        names = os.listdir(directory)
+    except FileNotFoundError:
+        return 0
+    for name in names:
+        if name.endswith('.tmp'):
+            continue
+        path = os.path.join(directory, name)
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            continue
+        key = name.split('.', 1)[0]
+        size, mtime, paths = entries.get(key, (0, 0.0, []))
+        entries[key] = (size + stat.st_size, max(mtime, stat.st_mtime), paths + [path])
+        total += stat.st_size
+
+    if total <= max_bytes:
+        return 0
+
+    evicted = 0
+    for key, (size, _, paths) in sorted(entries.items(), key=lambda item: item[1][1]):
+        if total <= max_bytes:
+            break
+        for path in paths:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+        total -= size
+        evicted += 1
+    logger.info(f"缓存目录 {directory} 超过上限, 淘汰{evicted}个条目")
+    return evicted
+
+
+# 模块导出
+__all__ = ['cache_key', 'atomic_write', 'touch', 'evict_lru']
@@ -5,7 +5,8 @@
 
 import pandas as pd
 import numpy as np
-from typing import Dict, Any, Union, Optional
+import warnings
+from typing import Dict, Any, List, Tuple, Union, Optional
 import logging
 
 class DataCleaner:
@@ -99,54 +100,121 @@ def remove_duplicates(df: pd.DataFrame, subset: Optional[list] = None,
     """
     return df.drop_duplicates(subset=subset, keep=keep)
 
+def _numeric_matrix(df: pd.DataFrame, dtype: Any = None) -> Tuple[List[int], np.ndarray]:
+    """取出所有数值列组成二维数组(缺失值为NaN)
+    
+    Returns:
+        (数值列的位置列表, 形状为(行数, 列数)的数组)
+    """
+    positions = [i for i, dt in enumerate(df.dtypes)
+                 if pd.api.types.is_numeric_dtype(dt) and not pd.api.types.is_bool_dtype(dt)]
+    values = df.iloc[:, positions].to_numpy(dtype=dtype or np.float64, na_value=np.nan)
+    return positions, values
+
+def _column_stats(values: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """一次计算所有列的均值和样本标准差(忽略NaN, 与pandas的mean/std一致)"""
+    if len(values) == 0:
+        empty = np.full(values.shape[1], np.nan, dtype=values.dtype)
+        return empty, empty.copy()
+    if not np.isnan(values).any():
+        if len(values) < 2:
+            return values.mean(axis=0), np.full(values.shape[1], np.nan, dtype=values.dtype)
+        return values.mean(axis=0), values.std(axis=0, ddof=1)
+    valid = ~np.isnan(values)
+    count = valid.sum(axis=0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = np.where(valid, values, 0).sum(axis=0) / count
+        deviation = np.where(valid, values - mean, 0)
+        std = np.sqrt((deviation * deviation).sum(axis=0) / (count - 1))
+    return mean.astype(values.dtype), std.astype(values.dtype)
+
+def _replace_columns(df: pd.DataFrame, positions: List[int], values: np.ndarray,
+                     changed: np.ndarray) -> pd.DataFrame:
+    """用二维数组替换值有变化的列, 其余列复制(保持原类型, 如int64), 列顺序和列名保持不变
+
+    Args:
+        df: 原DataFrame
+        positions: values各列对应的列位置
+        values: 处理后的数值列
+        changed: 各数值列的值是否有变化
+    """
+    if not changed.any():
+        return df.copy()
+    if len(positions) == df.shape[1] and changed.all():
+        return pd.DataFrame(values, index=df.index, columns=df.columns, copy=False)
+    replaced = {i: values[:, j] for j, i in enumerate(positions) if changed[j]}
+    columns = {i: replaced[i] if i in replaced else df.iloc[:, i].copy() for i in range(df.shape[1])}
+    result = pd.DataFrame(columns, index=df.index, copy=False)
+    result.columns = df.columns
+    return result
+
 def handle_outliers(df: pd.DataFrame, method: str = 'clip', 
-                   threshold: float = 3) -> pd.DataFrame:
+                   threshold: float = 3, dtype: Any = None) -> pd.DataFrame:
     """处理异常值
     
+    所有数值列的均值和标准差只基于输入数据计算一次; remove时各列的判断合并为一个行掩码,
+    后面的列不会受前面的列删除行的影响. 缺失值以及常数列、单行等标准差无效的列不视为异常;
+    clip时没有值被截断的列保持原类型
+    
     Args:
         df: 输入DataFrame
         method: 处理方法 ('clip', 'remove')
         threshold: 用于识别异常值的标准差倍数
+        dtype: clip时数值列的计算类型和被截断列的输出类型(如 'float32', 默认float64)
     
     Returns:
         处理后的DataFrame
     """
-    df = df.copy()
-    numeric_cols = df.select_dtypes(include=[np.number]).columns
-    for col in numeric_cols:
-        z_scores = (df[col] - df[col].mean()) / df[col].std()
-        if method == 'clip':
-            upper = df[col].mean() + threshold * df[col].std()
-            lower = df[col].mean() - threshold * df[col].std()
-            df[col] = df[col].clip(lower, upper)
-        elif method == 'remove':
-            df = df[(z_scores.abs() < threshold)]
-    return df
+    positions, values = _numeric_matrix(df, dtype)
+    if not positions:
+        return df.copy()
+    mean, std = _column_stats(values)
+    if method == 'clip':
+        # 标准差无效的列不设边界; NaN经过clip仍为NaN
+        bound = np.where(np.isnan(std), np.inf, threshold * std)
+        lower, upper = mean - bound, mean + bound
+        # NaN与边界比较为False, 不计入截断
+        clipped = ((values < lower) | (values > upper)).any(axis=0)
+        np.clip(values, lower, upper, out=values)
+        return _replace_columns(df, positions, values, clipped)
+    elif method == 'remove':
+        values -= mean
+        np.abs(values, out=values)
+        with np.errstate(invalid='ignore'):
+            outlier = (values >= threshold * std) & (std > 0)
+        return df[~outlier.any(axis=1)].copy()
+    return df.copy()
 
-def normalize_data(df: pd.DataFrame, method: str = 'minmax') -> pd.DataFrame:
+def normalize_data(df: pd.DataFrame, method: str = 'minmax', dtype: Any = None) -> pd.DataFrame:
     """数据标准化
     
+    所有数值列的统计量一次算出, 再整体广播计算; 最大值等于最小值(或标准差为0)的列保持原值和原类型
+    
     Args:
         df: 输入DataFrame
         method: 标准化方法 ('minmax', 'zscore')
+        dtype: 数值列的计算和输出类型(如 'float32', 默认float64)
     
     Returns:
         标准化后的DataFrame
     """
-    df = df.copy()
-    numeric_cols = df.select_dtypes(include=[np.number]).columns
-    for col in numeric_cols:
-        if method == 'minmax':
-            col_min = df[col].min()
-            col_max = df[col].max()
-            if col_max != col_min:  # 避免除以0
-                df[col] = (df[col] - col_min) / (col_max - col_min)
-        elif method == 'zscore':
-            col_mean = df[col].mean()
-            col_std = df[col].std()
-            if col_std != 0:  # 避免除以0
-                df[col] = (df[col] - col_mean) / col_std
-    return df
+    positions, values = _numeric_matrix(df, dtype)
+    if not positions or len(df) == 0:
+        return df.copy()
+    if method == 'minmax':
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', RuntimeWarning)  # 全为NaN的列
+            offset = np.nanmin(values, axis=0)
+            scale = np.nanmax(values, axis=0) - offset
+    elif method == 'zscore':
+        offset, scale = _column_stats(values)
+    else:
+        return df.copy()
+    # 避免除以0: 不需要标准化的列减0除1
+    keep = scale == 0
+    values -= np.where(keep, 0, offset).astype(values.dtype)
+    values /= np.where(keep, 1, scale).astype(values.dtype)
+    return _replace_columns(df, positions, values, ~keep)
 
 def save_to_excel(df: pd.DataFrame, file_path: str) -> None:
     """保存数据到Excel文件
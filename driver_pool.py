@@ -0,0 +1,248 @@
+"""
+浏览器驱动池模块
+
+提供DriverPool类, 维护一组预热的无头Chrome驱动供JS渲染模式复用
+
+主要功能:
+- 最小/最大驱动数量控制, 启动时预热最小数量的浏览器
+- 借出(checkout)/归还(checkin)语义, 支持with语句自动归还
+- 借出前进行健康检查, 崩溃的驱动会被丢弃并按需重建
+- 单个驱动处理指定页面数后自动回收, 避免浏览器内存膨胀
+
+示例用法:
+    from driver_pool import DriverPool
+
+    pool = DriverPool(driver_path="chromedriver.exe", min_size=1, max_size=3)
+    with pool.driver() as driver:
+        driver.get("https://example.com")
+    pool.close()
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Optional
+
+from selenium import webdriver
+from selenium.webdriver.chrome.options import Options
+
+logger = logging.getLogger(__name__)
+
+
+def create_chrome_driver(driver_path: Optional[str] = None) -> webdriver.Chrome:
+    """创建无头Chrome驱动
+
+    Args:
+        driver_path: 浏览器驱动路径
+
+    Returns:
+        Chrome驱动实例
+    """
+    from selenium.webdriver.chrome.service import Service
+    options = Options()
+    options.add_argument('--headless')
+    options.add_argument('--disable-gpu')
+    options.add_argument('--no-sandbox')
+    service = Service(executable_path=driver_path)
+    return webdriver.Chrome(service=service, options=options)
+
+
+class DriverPool:
+    """WebDriver连接池"""
+
+    def __init__(self,
+                 driver_path: Optional[str] = None,
+                 min_size: int = 1,
+                 max_size: int = 2,
+                 max_pages: int = 50,
+                 checkout_timeout: float = 60,
+                 driver_factory: Optional[Callable[[], Any]] = None):
+        """初始化驱动池并预热最小数量的驱动
+
+        Args:
+            driver_path: 浏览器驱动路径
+            min_size: 保持预热的最小驱动数
+            max_size: 允许同时存在的最大驱动数
+            max_pages: 单个驱动处理的页面数达到该值后回收重建
+            checkout_timeout: 借出驱动的默认等待超时(秒)
+            driver_factory: 自定义驱动创建函数(默认创建无头Chrome)
+        """
+        if max_size < 1 or min_size < 0 or min_size > max_size:
+            raise ValueError("驱动池大小配置无效: 需满足 0 <= min_size <= max_size 且 max_size >= 1")
+        self.min_size = min_size
+        self.max_size = max_size
+        self.max_pages = max_pages
+        self.checkout_timeout = checkout_timeout
+        self._factory = driver_factory or (lambda: create_chrome_driver(driver_path))
+
+        self._cond = threading.Condition()
+        self._idle = deque()
+        self._pages: Dict[int, int] = {}
+        self._size = 0
+        self._closed = False
+        self._created = 0
+        self._recycled = 0
+        self._discarded = 0
+
+        self._ensure_min_size()
+        logger.info(f"驱动池初始化完成: 预热{self._size}个驱动, 最大{max_size}个")
+
+    def _create(self) -> Any:
+        """创建新驱动(调用方需已预留名额)"""
+        try:
+            driver = self._factory()
+        except Exception:
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+            raise
+        with self._cond:
+            self._pages[id(driver)] = 0
+            self._created += 1
+        return driver
+
+    def _destroy(self, driver: Any) -> None:
+        """关闭驱动并释放名额"""
+        try:
+            driver.quit()
+        except Exception as e:
+            logger.warning(f"关闭浏览器驱动时出错: {e}")
+        with self._cond:
+            self._pages.pop(id(driver), None)
+            self._size -= 1
+            self._cond.notify()
+
+    def _ensure_min_size(self) -> None:
+        """补足最小数量的空闲驱动"""
+        while True:
+            with self._cond:
+                if self._closed or self._size >= self.min_size:
+                    return
+                self._size += 1
+            driver = self._create()
+            with self._cond:
+                self._idle.append(driver)
+                self._cond.notify()
+
+    @staticmethod
+    def is_alive(driver: Any) -> bool:
+        """检查驱动是否仍可用"""
+        try:
+            return driver.execute_script('return 1') == 1
+        except Exception:
+            # 驱动进程退出时可能抛出WebDriverException以外的连接错误
+            return False
+
+    def checkout(self, timeout: Optional[float] = None) -> Any:
+        """借出一个可用的驱动
+
+        优先复用空闲驱动, 没有空闲驱动且未达上限时创建新驱动, 否则等待归还
+
+        Args:
+            timeout: 等待超时(秒), 默认使用checkout_timeout
+
+        Returns:
+            WebDriver实例
+
+        Raises:
+            TimeoutError: 等待超时时
+            RuntimeError: 驱动池已关闭时
+        """
+        timeout = self.checkout_timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+        while True:
+            with self._cond:
+                while not self._idle and self._size >= self.max_size and not self._closed:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise TimeoutError(f"等待浏览器驱动超时({timeout}秒)")
+                    self._cond.wait(remaining)
+                if self._closed:
+                    raise RuntimeError("驱动池已关闭")
+                if self._idle:
+                    driver = self._idle.popleft()
+                else:
+                    self._size += 1
+                    driver = None
+
+            if driver is None:
+                return self._create()
+            if self.is_alive(driver):
+                return driver
+            logger.warning("检测到浏览器驱动已失效, 丢弃并重建")
+            with self._cond:
+                self._discarded += 1
+            self._destroy(driver)
+
+    def checkin(self, driver: Any, discard: bool = False) -> None:
+        """归还驱动
+
+        Args:
+            driver: 借出的驱动
+            discard: 是否直接丢弃该驱动(如已确认崩溃)
+        """
+        with self._cond:
+            pages = self._pages.get(id(driver), 0) + 1
+            self._pages[id(driver)] = pages
+            recycle = discard or self._closed or pages >= self.max_pages
+            if recycle:
+                if discard:
+                    self._discarded += 1
+                elif not self._closed:
+                    self._recycled += 1
+            else:
+                self._idle.append(driver)
+                self._cond.notify()
+        if recycle:
+            if not discard and not self._closed:
+                logger.info(f"浏览器驱动已处理{pages}个页面, 回收重建")
+            self._destroy(driver)
+            # 补足失败不影响已完成的抓取, 下次借出时会按需创建
+            try:
+                self._ensure_min_size()
+            except Exception as e:
+                logger.warning(f"补充浏览器驱动失败, 将在下次借出时重试: {e}")
+
+    @contextmanager
+    def driver(self, timeout: Optional[float] = None):
+        """以上下文管理器方式借出驱动, 退出时自动归还
+
+        块内抛出异常且驱动已失效时, 驱动会被丢弃
+        """
+        driver = self.checkout(timeout)
+        try:
+            yield driver
+        except Exception:
+            self.checkin(driver, discard=not self.is_alive(driver))
+            raise
+        else:
+            self.checkin(driver)
+
+    def stats(self) -> Dict[str, int]:
+        """获取驱动池状态"""
+        with self._cond:
+            return {
+                'size': self._size,
+                'idle': len(self._idle),
+                'in_use': self._size - len(self._idle),
+                'max_size': self.max_size,
+                'created': self._created,
+                'recycled': self._recycled,
+                'discarded': self._discarded,
+            }
+
+    def close(self) -> None:
+        """关闭所有空闲驱动, 借出中的驱动在归还时关闭"""
+        with self._cond:
+            self._closed = True
+            idle = list(self._idle)
+            self._idle.clear()
+            self._cond.notify_all()
+        for driver in idle:
+            self._destroy(driver)
+
+
+# 模块导出
+__all__ = ['DriverPool', 'create_chrome_driver']
@@ -9,6 +9,7 @@ from pyecharts import options as opts
 from pyecharts.globals import CurrentConfig
 import os
 import zhconv
+from sheet_store import read_excel_sheets
 
 CurrentConfig.ONLINE_HOST = "https://assets.pyecharts.org/assets/v5/"
 
@@ -129,10 +130,11 @@ def load_data(contents, filename):
     try:
         content_type, content_string = contents.split(',')
         decoded = base64.b64decode(content_string)
-        xls = pd.ExcelFile(io.BytesIO(decoded))
+        # 一次解析上传文件中的所有sheet
+        sheets = read_excel_sheets(io.BytesIO(decoded))
 
-        if "主要财务指标" in xls.sheet_names:
-            df = xls.parse("主要财务指标")
+        if "主要财务指标" in sheets:
+            df = sheets["主要财务指标"].copy()
             df.columns = [normalize_column(col) for col in df.columns]
             if all(col in df.columns for col in PRECOMPUTED_COLUMNS.values()):
                 df["截止日期"] = pd.to_datetime(df["截止日期"], format="%y/%m/%d", errors='coerce')
@@ -151,7 +153,7 @@ def load_data(contents, filename):
                 return [{'label': y, 'value': y} for y in cached_years], ""
 
         # 回退计算路径：遍历所有 Sheet 查找字段
-        dfs = {name: xls.parse(name) for name in xls.sheet_names}
+        dfs = {name: df.copy() for name, df in sheets.items()}
         found = {}
 
         for name, df in dfs.items():
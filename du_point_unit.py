@@ -9,10 +9,11 @@ from pyecharts import options as opts
 from pyecharts.globals import CurrentConfig
 import os
 import zhconv
+from sheet_store import load_sheets
 
 CurrentConfig.ONLINE_HOST = "https://assets.pyecharts.org/assets/v5/"
 
-def create_app(excel_path=None):
+def create_app(data_path=None):
     import dash
     from dash import dcc, html, Input, Output
     import pandas as pd
@@ -27,15 +28,16 @@ def create_app(excel_path=None):
     cached_years = []
     source_logs = {}
 
-    if excel_path and os.path.exists(excel_path):
-        print(f"📂 加载 Excel 路径: {excel_path}")
+    if data_path and os.path.exists(data_path):
+        print(f"📂 加载数据路径: {data_path}")
         try:
-            xls = pd.ExcelFile(excel_path)
-            print(f"📊 Excel 包含工作表: {xls.sheet_names}")
+            # 列式存储目录或Excel文件, 所有sheet只读取一次
+            sheets = load_sheets(data_path)
+            print(f"📊 数据包含工作表: {list(sheets)}")
             
             # 首先尝试从"主要财务指标"表读取预计算字段
-            if "主要财务指标" in xls.sheet_names:
-                df = xls.parse("主要财务指标")
+            if "主要财务指标" in sheets:
+                df = sheets["主要财务指标"].copy()
                 df.columns = [normalize_column(col) for col in df.columns]
                 if all(col in df.columns for col in PRECOMPUTED_COLUMNS.values()):
                     df["截止日期"] = pd.to_datetime(df["截止日期"], format="%y/%m/%d", errors='coerce')
@@ -54,7 +56,7 @@ def create_app(excel_path=None):
                     """return app, cached_df, cached_years"""
 
             # 回退计算路径：遍历所有 Sheet 查找字段
-            dfs = {name: xls.parse(name) for name in xls.sheet_names}
+            dfs = {name: df.copy() for name, df in sheets.items()}
             found = {}
 
             for name, df in dfs.items():
@@ -104,7 +106,7 @@ def create_app(excel_path=None):
             cached_years = merged.index.unique().tolist()
             data_loaded = True
         except Exception as e:
-            print(f"❌ 加载 Excel 异常: {e}")
+            print(f"❌ 加载数据异常: {e}")
 
    
 
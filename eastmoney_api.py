@@ -0,0 +1,194 @@
+"""
+东方财富F10数据接口模块
+
+将F10页面URL映射到页面背后的数据接口, 并将接口返回的JSON直接转换为
+与页面渲染表格结构一致的DataFrame, 供TableScraper的API模式使用
+
+主要功能:
+- 从F10页面URL解析市场和证券代码
+- 按报表配置生成数据中心接口请求参数
+- 支持宽表(每条记录一期, 字段为指标)和长表(每条记录一个科目一期)两种返回格式
+
+示例用法:
+    from eastmoney_api import parse_f10_url, REPORT_SPECS, report_params, records_to_table
+
+    market, secucode = parse_f10_url(url)
+    for spec in REPORT_SPECS[market]:
+        payload = session.get(DATACENTER_URL, params=report_params(spec, secucode)).json()
+        df = records_to_table(spec, extract_records(payload))
+"""
+
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Tuple
+from urllib.parse import parse_qs, urlparse
+
+import pandas as pd
+
+# 数据中心接口地址
+DATACENTER_URL = "https://datacenter.eastmoney.com/securities/api/data/v1/get"
+
+# F10页面地址模板(目前仅支持港股; A股F10页面的接口和报表字段不同, 需单独配置)
+F10_URL_TEMPLATES = {
+    'HK': "https://emweb.securities.eastmoney.com/PC_HKF10/pages/home/index.html?code={code}&type=web&color=w#/newfinancialanalysis",
+}
+
+# F10页面路径标识 -> 市场
+F10_MARKETS = {
+    'PC_HKF10': 'HK',
+}
+
+# 报表首列表头, 转置后成为日期列
+DATE_HEADER = "截止日期"
+
+
+@dataclass
+class ReportSpec:
+    """报表接口配置"""
+    sheet_name: str
+    report_name: str
+    layout: str = 'long'  # 'wide' 或 'long'
+    fields: Dict[str, str] = field(default_factory=dict)  # 宽表: 字段 -> 指标名称
+    item_field: str = 'STD_ITEM_NAME'  # 长表: 科目名称字段
+    value_field: str = 'AMOUNT'  # 长表: 数值字段
+    date_field: str = 'REPORT_DATE'
+
+
+# 港股主要财务指标字段
+HK_MAIN_INDICATOR_FIELDS = {
+    'BASIC_EPS': '基本每股收益(元)',
+    'DILUTED_EPS': '稀释每股收益(元)',
+    'BPS': '每股净资产(元)',
+    'PER_NETCASH_OPERATE': '每股经营现金流(元)',
+    'OPERATE_INCOME': '营业总收入',
+    'OPERATE_INCOME_YOY': '营业总收入同比增长(%)',
+    'GROSS_PROFIT': '毛利润',
+    'GROSS_PROFIT_YOY': '毛利润同比增长(%)',
+    'HOLDER_PROFIT': '归母净利润',
+    'HOLDER_PROFIT_YOY': '归母净利润同比增长(%)',
+    'GROSS_PROFIT_RATIO': '毛利率(%)',
+    'NET_PROFIT_RATIO': '净利率(%)',
+    'ROE_AVG': '平均净资产收益率(%)',
+    'ROA': '总资产收益率(%)',
+    'TOTAL_ASSETS_TR': '总资产周转率(次)',
+    'EQUITY_MULTIPLIER': '权益乘数',
+    'DEBT_ASSET_RATIO': '资产负债率(%)',
+    'CURRENT_RATIO': '流动比率(倍)',
+}
+
+REPORT_SPECS: Dict[str, List[ReportSpec]] = {
+    'HK': [
+        ReportSpec('主要财务指标', 'RPT_HKF10_FN_MAININDICATOR', layout='wide', fields=HK_MAIN_INDICATOR_FIELDS),
+        ReportSpec('资产负债表', 'RPT_HKF10_FN_BALANCE_PC'),
+        ReportSpec('利润表', 'RPT_HKF10_FN_INCOME_PC'),
+        ReportSpec('现金流量表', 'RPT_HKF10_FN_CASHFLOW_PC'),
+    ],
+}
+
+
+def parse_f10_url(url: str) -> Tuple[str, str]:
+    """从F10页面URL解析市场和证券代码
+
+    Args:
+        url: F10页面URL
+
+    Returns:
+        (市场, 证券代码) 元组, 如 ('HK', '03333.HK')
+
+    Raises:
+        ValueError: 无法识别的页面或缺少code参数时
+    """
+    parsed = urlparse(url)
+    market = next((m for key, m in F10_MARKETS.items() if key in parsed.path), None)
+    if market is None:
+        raise ValueError(f"API模式暂不支持该页面: {url}")
+    # code参数可能位于查询串或#之后的路由中
+    query = parse_qs(parsed.query) or parse_qs(urlparse(parsed.fragment).query)
+    code = (query.get('code') or [None])[0]
+    if not code:
+        raise ValueError(f"URL中缺少证券代码(code参数): {url}")
+    return market, f"{code}.{market}"
+
+
+def build_f10_url(code: str, market: str = 'HK') -> str:
+    """根据证券代码生成F10页面URL"""
+    if market not in F10_URL_TEMPLATES:
+        raise ValueError(f"不支持的市场: {market}")
+    return F10_URL_TEMPLATES[market].format(code=code)
+
+
+def report_params(spec: ReportSpec, secucode: str, page_size: int = 500) -> Dict[str, Any]:
+    """生成数据中心接口的请求参数"""
+    return {
+        'reportName': spec.report_name,
+        'columns': 'ALL',
+        'filter': f'(SECUCODE="{secucode}")',
+        'pageNumber': 1,
+        'pageSize': page_size,
+        'sortTypes': -1,
+        'sortColumns': spec.date_field,
+        'source': 'F10',
+        'client': 'PC',
+    }
+
+
+def extract_records(payload: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """从接口返回的JSON中提取记录列表
+
+    Raises:
+        ValueError: 接口返回失败时
+    """
+    if not payload.get('success', True) and payload.get('code') not in (0, None):
+        raise ValueError(f"数据接口返回错误: {payload.get('message')}")
+    result = payload.get('result') or {}
+    return result.get('data') or []
+
+
+def _format_period(value: Any) -> str:
+    """将 '2024-12-31 00:00:00' 格式化为 '24-12-31'"""
+    try:
+        return pd.Timestamp(value).strftime('%y-%m-%d')
+    except (ValueError, TypeError):
+        return str(value)
+
+
+def _cell(value: Any) -> Any:
+    return '' if value is None else value
+
+
+def records_to_table(spec: ReportSpec, records: List[Dict[str, Any]]) -> pd.DataFrame:
+    """将接口记录转换为与页面表格结构一致的DataFrame
+
+    每行一个指标/科目, 每列一个报告期(由近到远); 与页面渲染的表格一样,
+    表头行同时作为第一行数据, 转置后成为"截止日期"列
+
+    Args:
+        spec: 报表配置
+        records: 接口返回的记录
+
+    Returns:
+        表格DataFrame
+    """
+    dates = sorted({r[spec.date_field] for r in records if r.get(spec.date_field)}, reverse=True)
+    headers = [DATE_HEADER] + [_format_period(d) for d in dates]
+    rows = [headers]
+
+    if spec.layout == 'wide':
+        by_date = {r.get(spec.date_field): r for r in records}
+        present = [f for f in spec.fields if any(f in r for r in records)]
+        for name in present:
+            rows.append([spec.fields[name]] + [_cell(by_date[d].get(name)) for d in dates])
+    else:
+        items: Dict[str, Dict[str, Any]] = {}
+        for r in records:
+            item = r.get(spec.item_field)
+            if item is not None:
+                items.setdefault(item, {})[r.get(spec.date_field)] = r.get(spec.value_field)
+        for item, values in items.items():
+            rows.append([item] + [_cell(values.get(d)) for d in dates])
+
+    return pd.DataFrame(rows, columns=headers)
+
+
+# 模块导出
+__all__ = ['DATACENTER_URL', 'F10_URL_TEMPLATES', 'ReportSpec', 'REPORT_SPECS', 'parse_f10_url', 'build_f10_url',
+           'report_params', 'extract_records', 'records_to_table']
@@ -0,0 +1,187 @@
+"""
+HTTP响应磁盘缓存模块
+
+提供ResponseCache类, 按URL和请求头缓存GET响应, 减少重复下载
+
+主要功能:
+- 缓存条目在TTL内直接返回, 不发出请求
+- 过期后携带If-None-Match/If-Modified-Since进行条件请求, 304时沿用缓存内容
+- 缓存目录超过大小上限时按最近访问时间(LRU)淘汰
+- 统计命中、未命中、重新验证次数
+
+示例用法:
+    from http_cache import ResponseCache
+
+    cache = ResponseCache("cache/http", ttl=24 * 3600)
+    html = cache.fetch(session, url, headers=headers)
+    logger.info(cache.stats())
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+import requests
+
+from cache_utils import atomic_write, cache_key, evict_lru, touch
+
+logger = logging.getLogger(__name__)
+
+
+class ResponseCache:
+    """HTTP响应磁盘缓存"""
+
+    def __init__(self,
+                 cache_dir: str = "cache/http",
+                 ttl: float = 24 * 3600,
+                 max_size_bytes: int = 200 * 1024 * 1024):
+        """初始化缓存
+
+        Args:
+            cache_dir: 缓存目录
+            ttl: 缓存有效期(秒), 过期后进行条件请求重新验证
+            max_size_bytes: 缓存目录的最大总字节数
+        """
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.max_size_bytes = max_size_bytes
+        os.makedirs(cache_dir, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._revalidated = 0
+        self._evicted = 0
+
+    def _paths(self, key: str):
+        return (os.path.join(self.cache_dir, f"{key}.json"),
+                os.path.join(self.cache_dir, f"{key}.body"))
+
+    def _load(self, key: str) -> Optional[Dict[str, Any]]:
+        """读取缓存条目的元数据, 条目不存在或损坏时返回None"""
+        meta_path, body_path = self._paths(key)
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            if not os.path.exists(body_path):
+                return None
+            return meta
+        except (OSError, ValueError):
+            return None
+
+    def _read_body(self, key: str, meta: Dict[str, Any]) -> str:
+        meta_path, body_path = self._paths(key)
+        with open(body_path, 'rb') as f:
+            content = f.read()
+        touch(meta_path)
+        return content.decode(meta.get('encoding') or 'utf-8', errors='replace')
+
+    def _store(self, key: str, url: str, response: requests.Response) -> None:
+        """保存响应到缓存"""
+        meta_path, body_path = self._paths(key)
+        meta = {
+            'url': url,
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+            'encoding': response.encoding or response.apparent_encoding,
+            'stored_at': time.time(),
+        }
+        atomic_write(body_path, response.content)
+        atomic_write(meta_path, json.dumps(meta, ensure_ascii=False).encode('utf-8'))
+
+        evicted = evict_lru(self.cache_dir, self.max_size_bytes)
+        if evicted:
+            with self._lock:
+                self._evicted += evicted
+
+    def _refresh(self, key: str, meta: Dict[str, Any]) -> None:
+        """304后刷新条目的存储时间"""
+        meta_path, _ = self._paths(key)
+        meta['stored_at'] = time.time()
+        atomic_write(meta_path, json.dumps(meta, ensure_ascii=False).encode('utf-8'))
+
+    def _count(self, counter: str) -> None:
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def fetch(self,
+              session: requests.Session,
+              url: str,
+              headers: Optional[Dict[str, str]] = None,
+              params: Optional[Dict[str, Any]] = None,
+              timeout: Optional[float] = None,
+              before_request: Optional[Callable[[str], None]] = None) -> str:
+        """获取URL的响应文本, 优先使用缓存
+
+        Args:
+            session: 发送请求使用的会话(复用连接池)
+            url: 请求URL
+            headers: 请求头(参与缓存键计算)
+            params: 查询参数(参与缓存键计算)
+            timeout: 请求超时(秒)
+            before_request: 实际发出网络请求前的回调(如限速), 缓存命中时不调用
+
+        Returns:
+            响应文本
+
+        Raises:
+            requests.RequestException: 请求失败时
+        """
+        headers = dict(headers or {})
+        key = cache_key(url, params, headers)
+        meta = self._load(key)
+
+        if meta is not None and time.time() - meta.get('stored_at', 0) < self.ttl:
+            self._count('_hits')
+            logger.debug(f"HTTP缓存命中: {url}")
+            return self._read_body(key, meta)
+
+        request_headers = dict(headers)
+        if meta is not None:
+            if meta.get('etag'):
+                request_headers['If-None-Match'] = meta['etag']
+            if meta.get('last_modified'):
+                request_headers['If-Modified-Since'] = meta['last_modified']
+
+        if before_request is not None:
+            before_request(url)
+        response = session.get(url, headers=request_headers, params=params, timeout=timeout)
+
+        if response.status_code == 304 and meta is not None:
+            self._count('_revalidated')
+            logger.info(f"HTTP缓存重新验证(304): {url}")
+            self._refresh(key, meta)
+            return self._read_body(key, meta)
+
+        response.raise_for_status()
+        self._count('_misses')
+        if response.status_code == 200:
+            self._store(key, url, response)
+        return response.text
+
+    def stats(self) -> Dict[str, Any]:
+        """获取缓存统计"""
+        with self._lock:
+            lookups = self._hits + self._revalidated + self._misses
+            return {
+                'hits': self._hits,
+                'revalidated': self._revalidated,
+                'misses': self._misses,
+                'evicted': self._evicted,
+                'hit_rate': round((self._hits + self._revalidated) / lookups, 3) if lookups else 0.0,
+            }
+
+    def clear(self) -> None:
+        """清空缓存目录"""
+        for name in os.listdir(self.cache_dir):
+            try:
+                os.remove(os.path.join(self.cache_dir, name))
+            except OSError:
+                pass
+
+
+# 模块导出
+__all__ = ['ResponseCache']
@@ -0,0 +1,596 @@
+"""
+LLM接口客户端模块
+
+为OpenAI兼容的聊天补全接口(Deepseek等)提供可靠的调用层, 同时支持同步和asyncio调用
+
+主要功能:
+- 连接池: 同步/异步客户端各自复用一个httpx连接池(HTTP keep-alive)
+- 并发上限: 同时进行的请求数不超过max_concurrency, 超出的调用排队等待
+- 重试: 429、5xx、超时和连接错误按指数退避(带随机抖动)重试, 429优先遵循Retry-After
+- 超时: 连接超时和读取超时分别配置
+- 熔断: 连续失败达到阈值后熔断, 冷却期内直接失败, 冷却结束后放行一个试探请求
+- 指标: 记录每次调用的耗时、首段延迟、重试次数和token用量
+
+base_url可指向本地的OpenAI兼容模拟服务, 便于在不访问真实接口的情况下验证重试和熔断
+
+示例用法:
+    from llm_client import LLMClient
+
+    client = LLMClient(api_key, base_url="https://api.deepseek.com/v1", max_concurrency=5)
+    result = client.complete(messages, model="deepseek-chat")
+    print(result.content, result.usage)
+
+    for text in client.stream(messages, model="deepseek-chat"):
+        ...
+
+    result = await client.acomplete(messages, model="deepseek-chat")
+    print(client.stats())
+"""
+
+import asyncio
+import logging
+import random
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Tuple
+
+import httpx
+import openai
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitOpenError(openai.OpenAIError):
+    """熔断期间拒绝调用"""
+
+
+class CircuitBreaker:
+    """熔断器
+
+    closed: 正常放行; 连续失败达到failure_threshold次后转为open
+    open: 拒绝所有调用; reset_timeout秒后转为half_open
+    half_open: 只放行一个试探请求, 成功则恢复closed, 失败则重新open
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        """初始化熔断器
+
+        Args:
+            failure_threshold: 触发熔断的连续失败次数
+            reset_timeout: 熔断后的冷却时间(秒)
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self._opened = 0
+        self._rejected = 0
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                return self.HALF_OPEN
+            return self._state
+
+    def allow(self) -> bool:
+        """是否放行本次调用(half_open时只放行一个试探请求)"""
+        with self._lock:
+            if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                self._state = self.HALF_OPEN
+                self._probing = False
+            if self._state == self.CLOSED:
+                return True
+            if self._state == self.HALF_OPEN and not self._probing:
+                self._probing = True
+                return True
+            self._rejected += 1
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self._state != self.CLOSED:
+                logger.info("LLM接口熔断恢复")
+            self._state = self.CLOSED
+            self._failures = 0
+            self._probing = False
+
+    def release(self) -> None:
+        """放弃本次试探(调用在得到接口响应前结束), 允许下一次调用重新试探"""
+        with self._lock:
+            self._probing = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != self.OPEN:
+                    self._opened += 1
+                    logger.warning(f"LLM接口连续失败{self._failures}次, 熔断{self.reset_timeout:g}秒")
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+                self._probing = False
+
+    def stats(self) -> Dict[str, Any]:
+        state = self.state
+        with self._lock:
+            return {
+                'state': state,
+                'consecutive_failures': self._failures,
+                'opened': self._opened,
+                'rejected': self._rejected,
+            }
+
+
+@dataclass
+class CallRecord:
+    """单次调用(含重试)的指标"""
+    model: str
+    stream: bool = False
+    started_at: float = field(default_factory=time.time)
+    latency: float = 0.0
+    first_chunk: Optional[float] = None
+    attempts: int = 0
+    prompt_tokens: Optional[int] = None
+    completion_tokens: Optional[int] = None
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+@dataclass
+class ChatResult:
+    """非流式调用的结果"""
+    content: str
+    usage: Optional[Dict[str, int]]
+    record: CallRecord
+
+
+def usage_dict(usage: Any) -> Optional[Dict[str, int]]:
+    """将接口返回的usage对象转换为字典"""
+    if usage is None:
+        return None
+    return {
+        'prompt_tokens': usage.prompt_tokens,
+        'completion_tokens': usage.completion_tokens,
+        'total_tokens': usage.total_tokens,
+    }
+
+
+def is_retryable(error: BaseException) -> bool:
+    """429、5xx、超时和连接错误可以重试, 其余错误(参数错误、鉴权失败等)直接失败"""
+    if isinstance(error, openai.APIConnectionError):
+        return True
+    if isinstance(error, openai.APIStatusError):
+        return error.status_code == 429 or error.status_code >= 500
+    return False
+
+
+def retry_after(error: BaseException) -> Optional[float]:
+    """从429响应的Retry-After头读取建议等待时间(秒)"""
+    response = getattr(error, 'response', None)
+    if response is None:
+        return None
+    try:
+        return float(response.headers.get('retry-after'))
+    except (TypeError, ValueError):
+        return None
+
+
+class LLMClient:
+    """带连接池、并发上限、重试和熔断的聊天补全客户端"""
+
+    def __init__(self,
+                 api_key: Optional[str],
+                 base_url: str,
+                 organization: Optional[str] = None,
+                 timeout: float = 120.0,
+                 connect_timeout: float = 10.0,
+                 max_connections: int = 10,
+                 max_concurrency: int = 5,
+                 max_retries: int = 3,
+                 retry_backoff: float = 1.0,
+                 retry_backoff_max: float = 30.0,
+                 breaker: Optional[CircuitBreaker] = None,
+                 history_size: int = 200):
+        """初始化客户端
+
+        Args:
+            api_key: API密钥
+            base_url: 接口地址(可指向本地模拟服务)
+            organization: 组织ID(可选)
+            timeout: 读取超时(秒), 流式调用时为相邻两段之间的最长间隔
+            connect_timeout: 连接超时(秒)
+            max_connections: 连接池大小
+            max_concurrency: 同时进行的最大请求数
+            max_retries: 可重试错误的最大重试次数
+            retry_backoff: 重试退避的初始等待时间(秒)
+            retry_backoff_max: 重试退避的最长等待时间(秒)
+            breaker: 熔断器(默认连续失败5次熔断30秒)
+            history_size: 保留最近调用指标的条数
+        """
+        self.api_key = api_key
+        self.base_url = base_url
+        self.organization = organization
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.retry_backoff_max = retry_backoff_max
+        self.breaker = breaker or CircuitBreaker()
+
+        self._timeout = httpx.Timeout(timeout, connect=connect_timeout)
+        self._limits = httpx.Limits(max_connections=max_connections,
+                                    max_keepalive_connections=max_connections,
+                                    keepalive_expiry=60.0)
+        # 重试由本客户端负责, 关闭openai库自带的重试
+        self.client = openai.OpenAI(
+            api_key=api_key,
+            organization=organization,
+            base_url=base_url,
+            max_retries=0,
+            timeout=self._timeout,
+            http_client=openai.DefaultHttpxClient(limits=self._limits, timeout=self._timeout)
+        )
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        # 异步客户端和信号量绑定到创建时的事件循环
+        self._async: Optional[Tuple[asyncio.AbstractEventLoop, openai.AsyncOpenAI, asyncio.Semaphore]] = None
+
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._history: "deque[CallRecord]" = deque(maxlen=history_size)
+        self._in_flight = 0
+        self._calls = 0
+        self._errors = 0
+        self._retries = 0
+        self._prompt_tokens = 0
+        self._completion_tokens = 0
+
+    # ---- 同步接口 ----
+
+    def complete(self, messages: List[Dict[str, str]], model: str,
+                 **params: Any) -> ChatResult:
+        """非流式聊天补全
+
+        Args:
+            messages: 消息列表
+            model: 模型名称
+            **params: 其他请求参数(temperature、max_tokens等)
+
+        Returns:
+            ChatResult实例
+
+        Raises:
+            openai.OpenAIError: 重试用尽或遇到不可重试的错误时; 熔断期间为CircuitOpenError
+        """
+        record = CallRecord(model=model)
+        started = time.monotonic()
+        try:
+            with self._slot():
+                response = self._call(record, lambda: self.client.chat.completions.create(
+                    model=model, messages=messages, **params))
+            usage = usage_dict(response.usage)
+            self._set_usage(record, usage)
+            return ChatResult(content=response.choices[0].message.content, usage=usage, record=record)
+        except Exception as e:
+            record.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            record.latency = time.monotonic() - started
+            self._finish(record)
+
+    def stream(self, messages: List[Dict[str, str]], model: str,
+               **params: Any) -> Iterator[str]:
+        """流式聊天补全, 逐段产出文本; 只在收到第一段之前重试
+
+        结束后可通过last_usage获取本线程这次调用的token用量
+        """
+        record = CallRecord(model=model, stream=True)
+        started = time.monotonic()
+        usage = None
+        try:
+            with self._slot():
+                response = self._call(record, lambda: self.client.chat.completions.create(
+                    model=model, messages=messages, stream=True,
+                    stream_options={"include_usage": True}, **params))
+                try:
+                    for chunk in response:
+                        if chunk.usage is not None:
+                            usage = chunk.usage
+                        if not chunk.choices:
+                            continue
+                        text = chunk.choices[0].delta.content
+                        if text:
+                            if record.first_chunk is None:
+                                record.first_chunk = time.monotonic() - started
+                            yield text
+                except Exception as e:
+                    if is_retryable(e):
+                        self.breaker.record_failure()
+                    raise
+                finally:
+                    response.close()
+            self._set_usage(record, usage_dict(usage))
+        except BaseException as e:
+            if not isinstance(e, GeneratorExit):
+                record.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            record.latency = time.monotonic() - started
+            self._finish(record)
+
+    def _call(self, record: CallRecord, request) -> Any:
+        """发送请求, 可重试的错误按指数退避重试"""
+        last_error = None
+        for attempt in range(self.max_retries + 1):
+            if not self.breaker.allow():
+                raise CircuitOpenError("LLM接口熔断中, 暂停调用") from last_error
+            record.attempts += 1
+            try:
+                response = request()
+            except BaseException as e:
+                if not isinstance(e, Exception) or not is_retryable(e):
+                    self._settle(e)
+                    raise
+                self.breaker.record_failure()
+                last_error = e
+                if attempt == self.max_retries:
+                    raise
+                delay = self._backoff_delay(attempt, e)
+                self._count_retry()
+                logger.warning(
+                    f"LLM接口调用 {attempt + 1}/{self.max_retries + 1} 失败: {e}，{delay:.2f}秒后重试"
+                )
+                time.sleep(delay)
+                continue
+            self.breaker.record_success()
+            return response
+
+    # ---- 异步接口 ----
+
+    def _async_client(self) -> Tuple[openai.AsyncOpenAI, asyncio.Semaphore]:
+        """获取绑定到当前事件循环的异步客户端和并发信号量"""
+        loop = asyncio.get_running_loop()
+        if self._async is None or self._async[0] is not loop:
+            client = openai.AsyncOpenAI(
+                api_key=self.api_key,
+                organization=self.organization,
+                base_url=self.base_url,
+                max_retries=0,
+                timeout=self._timeout,
+                http_client=openai.DefaultAsyncHttpxClient(limits=self._limits, timeout=self._timeout)
+            )
+            self._async = (loop, client, asyncio.Semaphore(self.max_concurrency))
+        return self._async[1], self._async[2]
+
+    async def acomplete(self, messages: List[Dict[str, str]], model: str,
+                        **params: Any) -> ChatResult:
+        """非流式聊天补全(asyncio版本, 参数和异常同complete)"""
+        client, slots = self._async_client()
+        record = CallRecord(model=model)
+        started = time.monotonic()
+        try:
+            async with slots:
+                self._enter()
+                try:
+                    response = await self._acall(record, lambda: client.chat.completions.create(
+                        model=model, messages=messages, **params))
+                finally:
+                    self._leave()
+            usage = usage_dict(response.usage)
+            self._set_usage(record, usage)
+            return ChatResult(content=response.choices[0].message.content, usage=usage, record=record)
+        except Exception as e:
+            record.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            record.latency = time.monotonic() - started
+            self._finish(record)
+
+    async def astream(self, messages: List[Dict[str, str]], model: str,
+                      **params: Any) -> AsyncIterator[str]:
+        """流式聊天补全(asyncio版本, 行为同stream)"""
+        client, slots = self._async_client()
+        record = CallRecord(model=model, stream=True)
+        started = time.monotonic()
+        usage = None
+        try:
+            async with slots:
+                self._enter()
+                try:
+                    response = await self._acall(record, lambda: client.chat.completions.create(
+                        model=model, messages=messages, stream=True,
+                        stream_options={"include_usage": True}, **params))
+                    try:
+                        async for chunk in response:
+                            if chunk.usage is not None:
+                                usage = chunk.usage
+                            if not chunk.choices:
+                                continue
+                            text = chunk.choices[0].delta.content
+                            if text:
+                                if record.first_chunk is None:
+                                    record.first_chunk = time.monotonic() - started
+                                yield text
+                    except Exception as e:
+                        if is_retryable(e):
+                            self.breaker.record_failure()
+                        raise
+                    finally:
+                        await response.close()
+                finally:
+                    self._leave()
+            self._set_usage(record, usage_dict(usage))
+        except BaseException as e:
+            if not isinstance(e, GeneratorExit):
+                record.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            record.latency = time.monotonic() - started
+            self._finish(record)
+
+    async def _acall(self, record: CallRecord, request) -> Any:
+        """发送请求(asyncio版本, 重试策略同_call)"""
+        last_error = None
+        for attempt in range(self.max_retries + 1):
+            if not self.breaker.allow():
+                raise CircuitOpenError("LLM接口熔断中, 暂停调用") from last_error
+            record.attempts += 1
+            try:
+                response = await request()
+            except BaseException as e:
+                if not isinstance(e, Exception) or not is_retryable(e):
+                    self._settle(e)
+                    raise
+                self.breaker.record_failure()
+                last_error = e
+                if attempt == self.max_retries:
+                    raise
+                delay = self._backoff_delay(attempt, e)
+                self._count_retry()
+                logger.warning(
+                    f"LLM接口调用 {attempt + 1}/{self.max_retries + 1} 失败: {e}，{delay:.2f}秒后重试"
+                )
+                await asyncio.sleep(delay)
+                continue
+            self.breaker.record_success()
+            return response
+
+    async def aclose(self) -> None:
+        """关闭当前事件循环中的异步连接池"""
+        if self._async is not None:
+            await self._async[1].close()
+            self._async = None
+
+    # ---- 公共逻辑 ----
+
+    def _settle(self, error: BaseException) -> None:
+        """不可重试的错误: 接口已返回响应(如400/401/422)时说明接口可用, 按成功计入熔断器;
+        其他情况(取消、本地错误等)无法判断接口状态, 只释放半开状态的试探名额
+        """
+        if isinstance(error, openai.APIStatusError):
+            self.breaker.record_success()
+        else:
+            self.breaker.release()
+
+    def _backoff_delay(self, attempt: int, error: BaseException) -> float:
+        """计算第attempt次重试前的等待时间(指数退避, 在上限的50%~100%之间随机抖动)
+
+        429响应带Retry-After时至少等待该时长(不超过retry_backoff_max)
+        """
+        delay = min(self.retry_backoff_max, self.retry_backoff * (2 ** attempt))
+        delay *= random.uniform(0.5, 1.0)
+        suggested = retry_after(error)
+        if suggested is not None:
+            delay = max(delay, min(suggested, self.retry_backoff_max))
+        return delay
+
+    @contextmanager
+    def _slot(self) -> Iterator[None]:
+        """占用一个并发名额(同步调用)"""
+        with self._slots:
+            self._enter()
+            try:
+                yield
+            finally:
+                self._leave()
+
+    def _enter(self) -> None:
+        with self._lock:
+            self._in_flight += 1
+
+    def _leave(self) -> None:
+        with self._lock:
+            self._in_flight -= 1
+
+    def _count_retry(self) -> None:
+        with self._lock:
+            self._retries += 1
+
+    def _set_usage(self, record: CallRecord, usage: Optional[Dict[str, int]]) -> None:
+        self._local.usage = usage
+        if usage is not None:
+            record.prompt_tokens = usage['prompt_tokens']
+            record.completion_tokens = usage['completion_tokens']
+
+    def _finish(self, record: CallRecord) -> None:
+        """记录调用指标并输出日志"""
+        if record.ok:
+            logger.info(
+                f"LLM调用完成({record.model}{', 流式' if record.stream else ''})，"
+                f"耗时: {record.latency:.2f}s"
+                + (f"，首段延迟: {record.first_chunk:.2f}s" if record.first_chunk is not None else "")
+                + (f"，重试{record.attempts - 1}次" if record.attempts > 1 else "")
+                + (f"，使用token数: {record.prompt_tokens + record.completion_tokens}"
+                   f"(提示{record.prompt_tokens}, 生成{record.completion_tokens})"
+                   if record.prompt_tokens is not None else "")
+            )
+        with self._lock:
+            self._history.append(record)
+            self._calls += 1
+            if not record.ok:
+                self._errors += 1
+            self._prompt_tokens += record.prompt_tokens or 0
+            self._completion_tokens += record.completion_tokens or 0
+
+    def last_usage(self) -> Optional[Dict[str, int]]:
+        """当前线程最近一次同步调用的token用量"""
+        return getattr(self._local, 'usage', None)
+
+    def recent_calls(self, limit: int = 20) -> List[Dict[str, Any]]:
+        """最近的调用指标(新的在前)"""
+        with self._lock:
+            records = list(self._history)[-limit:]
+        return [{
+            'model': r.model,
+            'stream': r.stream,
+            'started_at': r.started_at,
+            'latency': round(r.latency, 3),
+            'first_chunk': round(r.first_chunk, 3) if r.first_chunk is not None else None,
+            'attempts': r.attempts,
+            'prompt_tokens': r.prompt_tokens,
+            'completion_tokens': r.completion_tokens,
+            'error': r.error,
+        } for r in reversed(records)]
+
+    def stats(self) -> Dict[str, Any]:
+        """获取调用统计: 调用数、失败数、重试数、token用量、最近调用的延迟分布和熔断状态"""
+        with self._lock:
+            latencies = sorted(r.latency for r in self._history if r.ok)
+            first = [r.first_chunk for r in self._history if r.first_chunk is not None]
+            stats = {
+                'calls': self._calls,
+                'errors': self._errors,
+                'retries': self._retries,
+                'in_flight': self._in_flight,
+                'max_concurrency': self.max_concurrency,
+                'prompt_tokens': self._prompt_tokens,
+                'completion_tokens': self._completion_tokens,
+                'avg_latency': round(sum(latencies) / len(latencies), 3) if latencies else None,
+                'p95_latency': round(latencies[int(0.95 * (len(latencies) - 1))], 3) if latencies else None,
+                'avg_first_chunk': round(sum(first) / len(first), 3) if first else None,
+            }
+        stats['breaker'] = self.breaker.stats()
+        return stats
+
+    def close(self) -> None:
+        """关闭同步连接池"""
+        self.client.close()
+
+
+# 模块导出
+__all__ = [
+    'LLMClient', 'ChatResult', 'CallRecord', 'CircuitBreaker', 'CircuitOpenError',
+    'is_retryable', 'retry_after', 'usage_dict',
+]
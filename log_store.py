@@ -0,0 +1,260 @@
+"""
+日志存储模块
+
+以环形缓冲区保存结构化的日志记录, 每条记录带有单调递增的序号和所属任务ID,
+客户端只需按序号获取增量日志(或通过SSE接收推送), 无需每次读取全部日志
+
+主要功能:
+- LogStore: 固定容量的环形缓冲区, 支持按序号增量读取和阻塞等待新记录
+- LogStoreHandler: logging处理器, 将日志写入LogStore并标记当前任务ID
+- task_context: 设置当前线程(上下文)所属的任务, 其中产生的日志归属该任务
+- LogCollector: 绑定到root logger的日志收集器
+
+示例用法:
+    from log_store import LogCollector, task_context
+
+    log_collector = LogCollector(capacity=10000)
+    with task_context(task_id):
+        logging.getLogger(__name__).info("开始爬取...")
+    records = log_collector.get_logs(after=0, task_id=task_id)
+"""
+
+import contextvars
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+from sse_utils import format_sse
+
+# 当前上下文所属的任务ID(工作线程执行任务时设置)
+current_task_id: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar('current_task_id', default=None)
+
+# 日志时间格式
+TIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+
+@contextmanager
+def task_context(task_id: Optional[str]) -> Iterator[None]:
+    """在上下文中设置当前任务ID, 期间产生的日志归属该任务"""
+    token = current_task_id.set(task_id)
+    try:
+        yield
+    finally:
+        current_task_id.reset(token)
+
+
+class LogStore:
+    """带序号的环形日志缓冲区"""
+
+    def __init__(self, capacity: int = 10000):
+        """初始化缓冲区
+
+        Args:
+            capacity: 最多保留的日志条数, 超出后丢弃最早的记录
+        """
+        self.capacity = capacity
+        self._records: deque = deque(maxlen=capacity)
+        self._seq = 0
+        self._dropped = 0
+        self._cond = threading.Condition()
+
+    @property
+    def last_seq(self) -> int:
+        """最新一条日志的序号(尚无日志时为0)"""
+        with self._cond:
+            return self._seq
+
+    def append(self, level: str, message: str,
+               created: Optional[float] = None,
+               task_id: Optional[str] = None) -> int:
+        """追加一条日志并唤醒等待中的读取方
+
+        Returns:
+            新记录的序号
+        """
+        created = time.time() if created is None else created
+        with self._cond:
+            self._seq += 1
+            if len(self._records) == self.capacity:
+                self._dropped += 1
+            self._records.append({
+                'seq': self._seq,
+                'time': time.strftime(TIME_FORMAT, time.localtime(created)),
+                'level': level,
+                'message': message,
+                'task_id': task_id,
+            })
+            self._cond.notify_all()
+            return self._seq
+
+    def since(self, after: int = 0,
+              task_id: Optional[str] = None,
+              limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """获取序号大于after的日志
+
+        从缓冲区末尾向前扫描, 开销只与新增日志条数有关
+
+        Args:
+            after: 已收到的最后一条日志序号
+            task_id: 只返回该任务的日志, None表示只返回不属于任何任务的日志
+            limit: 最多返回的条数(返回最早的limit条)
+
+        Returns:
+            按序号升序排列的日志记录列表
+        """
+        with self._cond:
+            newer = []
+            for record in reversed(self._records):
+                if record['seq'] <= after:
+                    break
+                newer.append(record)
+        records = [r for r in reversed(newer) if r['task_id'] == task_id]
+        return records[:limit] if limit is not None else records
+
+    def wait(self, after: int, timeout: Optional[float] = None) -> int:
+        """阻塞等待序号大于after的新日志
+
+        Args:
+            after: 已收到的最后一条日志序号
+            timeout: 最长等待时间(秒)
+
+        Returns:
+            当前最新的日志序号
+        """
+        with self._cond:
+            self._cond.wait_for(lambda: self._seq > after, timeout=timeout)
+            return self._seq
+
+    def discard(self, task_id: str) -> int:
+        """移除某个任务的全部日志
+
+        Returns:
+            移除的条数
+        """
+        with self._cond:
+            kept = [r for r in self._records if r['task_id'] != task_id]
+            removed = len(self._records) - len(kept)
+            self._records = deque(kept, maxlen=self.capacity)
+            return removed
+
+    def clear(self) -> None:
+        """清空缓冲区(序号继续递增, 已连接的客户端不会重复收到旧日志)"""
+        with self._cond:
+            self._records.clear()
+
+    def stats(self) -> Dict[str, int]:
+        """获取缓冲区统计"""
+        with self._cond:
+            return {
+                'records': len(self._records),
+                'capacity': self.capacity,
+                'last_seq': self._seq,
+                'dropped': self._dropped,
+            }
+
+
+class LogStoreHandler(logging.Handler):
+    """将日志写入LogStore的logging处理器"""
+
+    def __init__(self, store: LogStore, level: int = logging.NOTSET):
+        super().__init__(level)
+        self.store = store
+
+    def emit(self, record: logging.LogRecord) -> None:
+        try:
+            self.store.append(record.levelname, self.format(record),
+                              created=record.created, task_id=current_task_id.get())
+        except Exception:
+            self.handleError(record)
+
+
+class LogCollector:
+    """日志收集器: 将root logger的日志收集到环形缓冲区"""
+
+    def __init__(self, capacity: int = 10000):
+        """初始化收集器并绑定到root logger
+
+        Args:
+            capacity: 最多保留的日志条数
+        """
+        self.store = LogStore(capacity)
+        self.handler = LogStoreHandler(self.store)
+        self.handler.setFormatter(logging.Formatter(fmt='%(message)s'))
+
+        # 绑定到 root logger，确保所有日志都会进来
+        root_logger = logging.getLogger()
+        root_logger.setLevel(logging.INFO)
+        # 避免重复添加 handler
+        if not any(isinstance(h, LogStoreHandler) for h in root_logger.handlers):
+            root_logger.addHandler(self.handler)
+
+    def get_logs(self, after: int = 0,
+                 task_id: Optional[str] = None,
+                 limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """获取序号大于after的日志(参数含义同LogStore.since)"""
+        return self.store.since(after, task_id=task_id, limit=limit)
+
+    def delta(self, after: int = 0,
+              task_id: Optional[str] = None,
+              limit: Optional[int] = None) -> Dict[str, Any]:
+        """获取增量日志及下次请求使用的游标
+
+        Returns:
+            {'records': 日志列表, 'last_seq': 下次请求的after}
+        """
+        # 先读取最新序号再扫描, 扫描期间写入的本任务日志不会被游标跳过
+        last_seq = self.store.last_seq
+        records = self.store.since(after, task_id=task_id, limit=limit)
+        if limit is not None and len(records) == limit:
+            cursor = records[-1]['seq']
+        else:
+            cursor = max(after, last_seq, records[-1]['seq'] if records else 0)
+        return {'records': records, 'last_seq': cursor}
+
+    def get_logger(self) -> logging.Logger:
+        return logging.getLogger()
+
+    def stream(self, after: int = 0,
+               task_id: Optional[str] = None,
+               heartbeat: float = 15.0,
+               max_duration: Optional[float] = 300.0) -> Iterator[str]:
+        """以SSE格式持续推送新日志
+
+        超过max_duration后结束响应, 浏览器的EventSource会携带Last-Event-ID自动重连,
+        避免长时间占用服务器线程
+
+        Args:
+            after: 从该序号之后开始推送
+            task_id: 只推送该任务的日志
+            heartbeat: 无新日志时发送心跳注释的间隔(秒)
+            max_duration: 单次连接的最长时间(秒), None表示不限
+
+        Yields:
+            SSE消息文本
+        """
+        deadline = None if max_duration is None else time.monotonic() + max_duration
+        yield format_sse(retry=1000)
+        while deadline is None or time.monotonic() < deadline:
+            last_seq = self.store.wait(after, timeout=heartbeat)
+            if last_seq <= after:
+                yield format_sse(comment='heartbeat')
+                continue
+            records = self.store.since(after, task_id=task_id)
+            for record in records:
+                yield format_sse(record, event_id=record['seq'])
+            # 其他任务的日志也推进游标; 读取期间新写入的记录可能已经推送, 取两者较大值
+            after = max(last_seq, records[-1]['seq']) if records else last_seq
+
+    def discard(self, task_id: str) -> int:
+        """移除某个任务的全部日志"""
+        return self.store.discard(task_id)
+
+    def stats(self) -> Dict[str, int]:
+        return self.store.stats()
+
+
+# 模块导出
+__all__ = ['LogStore', 'LogStoreHandler', 'LogCollector', 'task_context', 'current_task_id']
@@ -8,17 +8,35 @@ from dash import html
 from table_scraper import TableScraper
 from data_cleaner import DataCleaner
 from data_visualizer import DataVisualizer
-from openai_wrapper import AIDataAssistant
+from openai_wrapper import AIDataAssistant, DEEPSEEK_BASE_URL, load_report
+from report_renderer import ReportRenderer
 from number_converter import NumberConverter
+from pipeline import build_financial_pipeline, process_tables
+from sheet_store import STORE_NAME, export_workbook, load_sheets
+from results_cache import ResultsCache
+from sheet_view import SheetQuery
+from rate_limiter import HostRateLimiter
+from http_cache import ResponseCache
+from table_cache import TableCache
+from analysis_cache import AnalysisCache
+from prompt_builder import PromptBuilder
+from batch_runner import run_batch
+from log_store import LogCollector, task_context
+from task_events import TaskEventBus
+from task_registry import TaskRegistry
+from report_stream import ReportStreams
+from sse_utils import SSE_HEADERS, last_event_id
 from data_cleaner import DataCleaner
 from du_point_unit import create_app as create_du_point_app, run_app
 import pandas as pd
 import logging
 import os
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import partial
 from dotenv import load_dotenv
 from io import StringIO
 import sys
-import markdown # 导入 markdown 库
 
 
 
@@ -26,177 +44,211 @@ from io import StringIO
 import logging
 log = logging.getLogger('werkzeug')
 log.setLevel(logging.ERROR)
-class LogCollector:
-    def __init__(self):
-        self.log_buffer = StringIO()
-        #self.logger = logging.getLogger('smart_logger')
-        #self.logger.setLevel(logging.INFO)
-        self.handler = logging.StreamHandler(self.log_buffer)
-        self.handler.setFormatter(logging.Formatter(fmt='%(asctime)s - %(levelname)s - %(message)s',datefmt='%Y-%m-%d %H:%M:%S'))
-        
-
-        # 绑定到 root logger，确保所有日志都会进来
-        root_logger = logging.getLogger()
-        root_logger.setLevel(logging.INFO)
-        root_logger.addHandler(self.handler)
-        # 避免重复添加 handler
-        if not any(isinstance(h, logging.StreamHandler) for h in root_logger.handlers):
-            root_logger.addHandler(self.handler)
-
-        # 每次程序启动时清空日志缓存
-        self.log_buffer.truncate(0)
-        self.log_buffer.seek(0)
-
-    def get_logs(self):
-        self.log_buffer.seek(0)
-        logs = []
-        for line in self.log_buffer.readlines():
-            try:
-                time_part, rest = line.split(' - ', 1)
-                level, message = rest.split(' - ', 1)
-                logs.append({
-                    'time': time_part.strip(),
-                    'level': level.strip(),
-                    'message': message.strip()
-                })
-            except:
-                continue
-        return logs
-    def get_logger(self):
-        return logging.getLogger() 
-
-
 # 创建Flask应用
 app = Flask(__name__)
 app.config['UPLOAD_FOLDER'] = 'output'
 
+# 管道阶段名称 -> 任务事件阶段名称
+PIPELINE_STAGES = {'transpose': 'transposing', 'convert': 'converting', 'clean': 'cleaning'}
+
+
+def _no_progress(*args, **kwargs):
+    pass
+
+
 class MainApp:
     def __init__(self, log_collector):
         """初始化各功能模块"""
-        self.scraper = TableScraper(mode='js', driver_path='chromedriver.exe')
         load_dotenv()
-        self.ai_assistant = AIDataAssistant(api_key=os.getenv('OPENAI_API_KEY'))
+        # 浏览器池上限与后台工作线程数一致, 使并发任务各自使用独立的浏览器
+        # SCRAPER_MODE=api 时直接请求页面背后的数据接口, 不启动浏览器
+        # SCRAPER_RATE 为每个主机每秒最大请求数
+        # 快速模式下使用HTTP响应缓存(HTTP_CACHE_DIR, HTTP_CACHE_TTL秒)
+        mode = os.getenv('SCRAPER_MODE', 'js')
+        response_cache = ResponseCache(
+            os.getenv('HTTP_CACHE_DIR', 'cache/http'),
+            ttl=float(os.getenv('HTTP_CACHE_TTL', 24 * 3600))
+        ) if mode == 'fast' else None
+        # 页面抓取模式下缓存表格解析结果(TABLE_CACHE_DIR)
+        table_cache = TableCache(os.getenv('TABLE_CACHE_DIR', 'cache/tables')) if mode != 'api' else None
+        self.scraper = TableScraper(
+            mode=mode,
+            driver_path='chromedriver.exe',
+            pool_max_size=int(os.getenv('ANALYSIS_WORKERS', 2)),
+            rate_limiter=HostRateLimiter(rate=float(os.getenv('SCRAPER_RATE', 2))),
+            response_cache=response_cache,
+            table_cache=table_cache
+        )
+        # 相同数据和提示的AI分析结果缓存在ANALYSIS_CACHE_DIR, 有效期ANALYSIS_CACHE_TTL秒
+        self.analysis_cache = AnalysisCache(
+            os.getenv('ANALYSIS_CACHE_DIR', 'cache/analysis'),
+            ttl=float(os.getenv('ANALYSIS_CACHE_TTL', 7 * 24 * 3600))
+        )
+        # 报告保存后在后台渲染为HTML, /ai_analysis 页面只需查表
+        self.report_renderer = ReportRenderer(max_entries=int(os.getenv('REPORT_RENDER_CACHE_SIZE', 256)))
+        # PROMPT_TOKEN_BUDGET 为每次分析中数据部分的token预算;
+        # AI_STRUCTURED_OUTPUT=0 时不使用JSON模式, 报告直接保存为Markdown;
+        # LLM_MAX_CONCURRENCY 为所有任务合计同时进行的API请求数, LLM_BASE_URL 可指向本地模拟服务
+        self.ai_assistant = AIDataAssistant(
+            api_key=os.getenv('OPENAI_API_KEY'),
+            cache=self.analysis_cache,
+            prompt_builder=PromptBuilder(token_budget=int(os.getenv('PROMPT_TOKEN_BUDGET', 3000))),
+            structured=os.getenv('AI_STRUCTURED_OUTPUT', '1') != '0',
+            on_report_saved=self.report_renderer.prerender,
+            base_url=os.getenv('LLM_BASE_URL', DEEPSEEK_BASE_URL),
+            timeout=float(os.getenv('LLM_TIMEOUT', 120)),
+            max_concurrency=int(os.getenv('LLM_MAX_CONCURRENCY', 8)),
+            max_connections=int(os.getenv('LLM_MAX_CONNECTIONS', 10)),
+            max_retries=int(os.getenv('LLM_MAX_RETRIES', 3))
+        )
+        # AI_CONCURRENCY 为单个任务同时进行的AI分析请求数;
+        # 数据提示合计不超过 AI_PACK_TOKENS 的多个sheet合并为一次请求(默认0, 不合并);
+        # 合并的请求无法逐段输出, 其中各sheet的报告在整个请求完成后一次性输出
+        self.ai_concurrency = max(1, int(os.getenv('AI_CONCURRENCY', 5)))
+        self.ai_pack_tokens = int(os.getenv('AI_PACK_TOKENS', 0))
         self.log_collector = log_collector
         self.logger = log_collector.get_logger()
 
-    def run_pipeline(self, url: str):
-        """运行数据处理流程直到转置完成"""
+    def run_pipeline(self, url: str, output_dir: str = "output", keep_snapshots: bool = False,
+                     progress=None):
+        """运行数据处理流程直到转置完成
+
+        各阶段在内存中的sheet字典上依次执行, 最后写出一次列式存储(Excel在下载时按需生成)
+
+        Args:
+            url: 目标网页URL
+            output_dir: 输出目录(每个任务使用独立目录)
+            keep_snapshots: 是否在结果中附带各阶段的中间快照(用于调试)
+            progress: 进度回调, 以 progress(阶段, 百分比, 说明) 的形式调用
+        """
+        progress = progress or _no_progress
         try:
-            # 1. 爬取表格数据并保存为Excel
+            # 1. 爬取表格数据
             self.logger.info("开始爬取表格数据...")
+            progress('scraping', 5, "开始爬取表格数据...")
             tables = self.scraper.scrape_table(url)
             if not tables:
                 raise ValueError("未找到任何表格数据")
             
-            excel_path = os.path.join("output", "financial_data.xlsx")
+            data_path = os.path.join(output_dir, STORE_NAME)
             try:
-                os.makedirs("output", exist_ok=True, mode=0o777)
+                os.makedirs(output_dir, exist_ok=True, mode=0o777)
             except PermissionError:
                 self.logger.error("无法创建output目录，请检查权限")
                 raise
-            with pd.ExcelWriter(excel_path) as writer:
-                sheet_names = ["主要财务指标", "资产负债表", "利润表", "现金流量表"]
-                for i, table in enumerate(tables):
-                    name = sheet_names[i] if i < len(sheet_names) else f"Sheet{i+1}"
-                    table.to_excel(writer, sheet_name=name, index=False)
-            self.logger.info(f"表格数据已保存到: {excel_path}")
-
-            # 2. 数据转置
-            self.logger.info("开始数据转置...")
-            with pd.ExcelFile(excel_path) as excel:
-                sheets = {sheet: pd.read_excel(excel, sheet_name=sheet) for sheet in excel.sheet_names}
-            
-            for sheet_name, df in sheets.items():
-                # 将第一列设为索引后再转置
-                if len(df.columns) > 0:
-                    df = df.set_index(df.columns[0])
-                    sheets[sheet_name] = df.T
-            
-            with pd.ExcelWriter(excel_path) as writer:
-                for sheet_name, df in sheets.items():
-                    df.to_excel(writer, sheet_name=sheet_name, index=False)  
-
-            # 3. 数字转换并保存回原Excel
-            self.logger.info("开始数字转换...")
-            with pd.ExcelFile(excel_path) as excel:
-                sheets = {sheet: pd.read_excel(excel, sheet_name=sheet) for sheet in excel.sheet_names}
-            
-            converter = NumberConverter()
-            for sheet_name, df in sheets.items():
-                for col in df.columns:
-                    try:
-                        df = converter.convert_column(df, col)
-                    except Exception as e:
-                        logger.warning(f"跳过表 {sheet_name} 的列 {col}: {str(e)}")
-                sheets[sheet_name] = df
-            
-            with pd.ExcelWriter(excel_path) as writer:
-                for sheet_name, df in sheets.items():
-                    df.to_excel(writer, sheet_name=sheet_name, index=False)  # 保持转置后的格式
-            
-            # 4. 数据清洗并保存回原Excel
-            self.logger.info("开始数据清洗...")
-            with pd.ExcelFile(excel_path) as excel:
-                sheets = {sheet: pd.read_excel(excel, sheet_name=sheet) for sheet in excel.sheet_names}
-            
-            cleaner = DataCleaner()
-            for sheet_name, df in sheets.items():
-                sheets[sheet_name] = cleaner.clean_data(df)
-            
-            with pd.ExcelWriter(excel_path) as writer:
-                for sheet_name, df in sheets.items():
-                    df.to_excel(writer, sheet_name=sheet_name, index=False)  # 保持转置后的格式
+
+            # 2. 数据转置 -> 3. 数字转换 -> 4. 数据清洗
+            pipeline = build_financial_pipeline(keep_snapshots=keep_snapshots, logger=self.logger)
+            process_tables(tables, data_path, pipeline, on_stage=lambda name, index, total: progress(
+                PIPELINE_STAGES.get(name, name), 20 + 25 * index / total))
+            self.logger.info(f"表格数据已保存到: {data_path}")
             
             self.logger.info("数据转置完成!")
-            return {
+            result = {
                 'status': 'transpose_completed',
-                'excel_path': os.path.abspath(excel_path).replace("\\", "/")
+                'data_path': os.path.abspath(data_path).replace("\\", "/")
             }
+            if keep_snapshots:
+                result['snapshots'] = pipeline.snapshots
+            return result
 
 
         except Exception as e:
             self.logger.error(f"流程执行出错: {e}")
             raise
 
-    def continue_analysis(self, excel_path):
-        """继续执行可视化分析和AI分析"""
+    @staticmethod
+    def _sheet_task(sheet_name: str) -> str:
+        """根据sheet名称选择分析类型"""
+        if "Sheet1" in sheet_name or "主要财务指标" in sheet_name:
+            return "financial_metrics"
+        elif "资产负债表" in sheet_name:
+            return "balance_sheet"
+        elif "利润表" in sheet_name:
+            return "income_statement"
+        elif "现金流量表" in sheet_name:
+            return "cash_flow"
+        return "standard"
+
+    def continue_analysis(self, data_path, output_dir: str = "output", progress=None, reports=None):
+        """继续执行可视化分析和AI分析
+
+        各sheet的分析与汇总分析互不依赖, 同时提交到线程池并发执行(并发数见AI_CONCURRENCY),
+        总耗时接近最慢的一次请求; 数据较少的sheet可合并为一次请求(见AI_PACK_TOKENS, 合并的报告不逐段输出);
+        某个分析失败时等待其余分析完成后再抛出第一个错误
+
+        Args:
+            data_path: 转置完成后的数据存储路径(列式存储目录或Excel文件)
+            output_dir: 分析报告输出目录
+            progress: 进度回调, 每完成一个分析时调用(见run_pipeline)
+            reports: 报告流式输出接口(见report_stream.TaskReports), 提供时以流式方式生成报告,
+                按报告文件名写入模型逐段返回的文本
+        """
+        progress = progress or _no_progress
         try:
             # 直接进行AI分析
             self.logger.info("开始AI分析...")
-            with pd.ExcelFile(excel_path) as excel:
-                # 单sheet分析
-                for sheet_name in excel.sheet_names:
-                    df = pd.read_excel(excel, sheet_name=sheet_name)
-                    
-                    # 根据sheet名称选择分析类型
-                    if "Sheet1" in sheet_name or "主要财务指标" in sheet_name:
-                        task = "financial_metrics"
-                    elif "资产负债表" in sheet_name:
-                        task = "balance_sheet"
-                    elif "利润表" in sheet_name:
-                        task = "income_statement"
-                    elif "现金流量表" in sheet_name:
-                        task = "cash_flow"
-                    else:
-                        task = "standard"
-                    
-                    result = self.ai_assistant.analyzer.analyze(
-                        df, 
-                        task=task,
-                        output_md=f"output/{sheet_name}_analysis.md"
-                    )
-                
-                # 合并sheet2-sheet4分析
-                if len(excel.sheet_names) >= 4:
-                    combined_data = {}
-                    for sheet_name in excel.sheet_names[1:4]:  # sheet2-sheet4
-                        df = pd.read_excel(excel, sheet_name=sheet_name)
-                        combined_data[sheet_name] = df
-                    
-                    result = self.ai_assistant.analyzer.analyze_combined(
-                        combined_data,
-                        output_md="output/汇总分析_analysis.md"
-                    )
+            sheets = load_sheets(data_path)
+            sheet_names = list(sheets)
+            analyzer = self.ai_assistant.analyzer
+
+            # 单sheet分析; 数据较少的sheet在token预算内合并为一次请求, 减少请求次数
+            groups = (analyzer.plan_packs(sheets, self.ai_pack_tokens) if self.ai_pack_tokens > 0
+                      else [[name] for name in sheet_names])
+            jobs = {}
+            for names in groups:
+                if len(names) == 1:
+                    name = names[0]
+                    jobs[name] = (analyzer.analyze, (sheets[name],), {'task': self._sheet_task(name)}, names)
+                else:
+                    packed = {name: (sheets[name], self._sheet_task(name)) for name in names}
+                    jobs["+".join(names)] = (analyzer.analyze_packed, (packed,), {}, names)
+            # 合并sheet2-sheet4分析, 输入数据已就绪, 与单sheet分析同时开始
+            if len(sheet_names) >= 4:
+                combined_data = {name: sheets[name] for name in sheet_names[1:4]}  # sheet2-sheet4
+                jobs["汇总分析"] = (analyzer.analyze_combined, (combined_data,), {}, ["汇总分析"])
+            # 结构化结果保存为 <name>_analysis.json, 查看时再渲染为Markdown
+            suffix = analyzer.report_suffix
+            for func, _, kwargs, names in jobs.values():
+                output_mds = {name: os.path.join(output_dir, f"{name}_analysis{suffix}") for name in names}
+                on_chunks = {}
+                if reports is not None:
+                    for name in names:
+                        reports.open(f"{name}_analysis{suffix}")
+                        on_chunks[name] = partial(reports.write, f"{name}_analysis{suffix}")
+                if func == analyzer.analyze_packed:
+                    kwargs.update(output_mds=output_mds, on_chunks=on_chunks)
+                else:
+                    kwargs['output_md'] = output_mds[names[0]]
+                    if on_chunks:
+                        kwargs['on_chunk'] = on_chunks[names[0]]
+
+            progress('ai_analysis', 50, f"开始AI分析: {len(jobs)}项, 并发数{self.ai_concurrency}")
+            errors = []
+            with ThreadPoolExecutor(max_workers=min(self.ai_concurrency, len(jobs) or 1),
+                                    thread_name_prefix="ai-analysis") as executor:
+                # 每个请求复制一份调用方上下文, 分析线程中的日志仍归属当前任务
+                futures = {
+                    executor.submit(contextvars.copy_context().run, func, *args, **kwargs): name
+                    for name, (func, args, kwargs, _) in jobs.items()
+                }
+                for done, future in enumerate(as_completed(futures), start=1):
+                    name = futures[future]
+                    error = None
+                    try:
+                        future.result()
+                        message = f"AI分析完成: {name}"
+                    except Exception as e:
+                        self.logger.error(f"{name} AI分析出错: {e}")
+                        errors.append(e)
+                        error = str(e)
+                        message = f"AI分析失败: {name}"
+                    if reports is not None:
+                        for report_name in jobs[name][3]:
+                            reports.close(f"{report_name}_analysis{suffix}", error)
+                    progress('ai_analysis', 50 + 45 * done / len(jobs), message, sheet=name)
+            if errors:
+                raise errors[0]
             
             self.logger.info("所有流程完成!")
             return {}
@@ -212,41 +264,117 @@ def index():
 from threading import Thread
 from flask import jsonify, Response
 import time
-
-
-# 全局变量存储分析状态和结果
-analysis_status = {}
-analysis_results = {}
-
-def background_analysis(url, task_id):
+from task_executor import TaskExecutor, QueueFullError
+
+
+def forget_task(task_id):
+    """任务从登记表移除后, 释放其结果缓存、日志和事件"""
+    results_cache.invalidate(task_id)
+    log_collector.discard(task_id)
+    event_bus.discard(task_id)
+    report_streams.discard(task_id)
+    main_app.report_renderer.discard(task_executor.work_dir(task_id))
+
+def background_analysis(task_id, work_dir, url):
+    with task_context(task_id):
+        _run_analysis(task_id, work_dir, url)
+
+def _finish_cancelled(task_id):
+    """任务在处理中被重置: 登记最终结果, 由登记表删除其输出目录并释放事件、报告流等"""
+    task_registry.set_result(task_id, {'status': 'cancelled', 'error': None})
+    logger.info(f"任务 {task_id} 已取消")
+
+def _run_analysis(task_id, work_dir, url):
+    # 结果登记之后再发布对应事件, 客户端收到事件时结果页已可访问;
+    # 任务被重置后set_result返回False, 不再发布事件, 也不再继续后续分析
+    if task_registry.cancelled(task_id):
+        _finish_cancelled(task_id)
+        return
+    progress = partial(event_bus.publish, task_id)
     try:
         #main_app = MainApp(LogCollector())
-        initial_result = main_app.run_pipeline(url)
+        initial_result = main_app.run_pipeline(url, output_dir=work_dir, progress=progress)
         
         if initial_result['status'] == 'transpose_completed':
             # 先返回转置完成状态
-            analysis_results[task_id] = {
+            if not task_registry.set_result(task_id, {
                 'status': 'transpose_completed',
-                'excel_path': initial_result['excel_path'],
+                'data_path': initial_result['data_path'],
                 'error': None
-            }
+            }, finished=False):
+                _finish_cancelled(task_id)
+                return
+            progress('transpose_completed', 50, "数据转置完成!", redirect=f'/results?task_id={task_id}')
             
             # 继续执行后续分析
-            main_app.continue_analysis(initial_result['excel_path'])
-            analysis_results[task_id] = {
+            main_app.continue_analysis(initial_result['data_path'], output_dir=work_dir, progress=progress,
+                                       reports=report_streams.for_task(task_id))
+            if task_registry.set_result(task_id, {
                 'status': 'completed',
+                'data_path': initial_result['data_path'],
                 'error': None
-            }
+            }):
+                progress('completed', 100, "所有流程完成!", redirect=f'/results?task_id={task_id}')
 
     except Exception as e:
-        analysis_results[task_id] = {
+        if task_registry.set_result(task_id, {
+            'status': 'error',
+            'error': str(e)
+        }):
+            progress('error', None, str(e))
+
+def background_batch(task_id, work_dir, targets):
+    """批量抓取并处理多个证券代码, 每家公司的结果位于任务目录下的独立子目录"""
+    with task_context(task_id):
+        _run_batch(task_id, work_dir, targets)
+
+def _run_batch(task_id, work_dir, targets):
+    if task_registry.cancelled(task_id):
+        _finish_cancelled(task_id)
+        return
+    event_bus.publish(task_id, 'scraping', 5, f"开始批量抓取{len(targets)}个目标...")
+    try:
+        summary = run_batch(
+            targets,
+            output_dir=work_dir,
+            scraper=main_app.scraper,
+            max_workers=int(os.getenv('BATCH_WORKERS', 4))
+        )
+        if task_registry.set_result(task_id, {
+            'status': 'batch_completed',
+            'summary': summary,
+            'error': None
+        }):
+            event_bus.publish(task_id, 'batch_completed', 100, "批量处理完成", summary=summary)
+    except Exception as e:
+        if task_registry.set_result(task_id, {
             'status': 'error',
             'error': str(e)
-        }
+        }):
+            event_bus.publish(task_id, 'error', None, str(e))
+
 @app.route('/logs')
 def get_logs():
-    logs = log_collector.get_logs()
-    return jsonify(logs)
+    """增量日志: 返回序号大于after的日志
+
+    查询参数: after(已收到的最后序号), task_id(只返回该任务的日志), limit
+    """
+    try:
+        after = int(request.args.get('after', 0))
+        limit = int(request.args['limit']) if request.args.get('limit') else None
+    except ValueError:
+        return jsonify({'error': 'after/limit 必须为整数'}), 400
+    return jsonify(log_collector.delta(after, task_id=request.args.get('task_id'), limit=limit))
+
+@app.route('/logs/stream')
+def stream_logs():
+    """以Server-Sent Events推送新日志(查询参数同/logs, 重连时使用Last-Event-ID)"""
+    try:
+        after = last_event_id(request)
+    except ValueError:
+        return jsonify({'error': 'after 必须为整数'}), 400
+    return Response(log_collector.stream(after, task_id=request.args.get('task_id')),
+                    mimetype='text/event-stream', headers=SSE_HEADERS)
 
 @app.route('/analyze', methods=['POST'])
 def analyze():
@@ -255,23 +383,73 @@ def analyze():
         url = "https://emweb.securities.eastmoney.com/PC_HKF10/pages/home/index.html?code=03333&type=web&color=w#/newfinancialanalysis"
     
     task_id = str(time.time())
-    analysis_status[task_id] = 'processing'
+    task_registry.create(task_id, work_dir=task_executor.work_dir(task_id))
+    event_bus.publish(task_id, 'queued', 0, "任务已加入队列")
     
-    # 启动后台线程处理分析任务
-    thread = Thread(target=background_analysis, args=(url, task_id))
-    thread.start()
+    # 提交到后台任务队列, 队列已满时拒绝
+    try:
+        task_executor.submit(task_id, background_analysis, url)
+    except QueueFullError as e:
+        task_registry.remove(task_id)
+        return jsonify({'status': 'rejected', 'error': str(e)}), 503
     
     return jsonify({'task_id': task_id, 'status': 'processing'})
 
+@app.route('/batch_analyze', methods=['POST'])
+def batch_analyze():
+    """批量分析: codes为证券代码/URL列表(JSON数组, 或以逗号/空白分隔的字符串)"""
+    payload = request.get_json(silent=True) or {}
+    codes = payload.get('codes') or request.form.get('codes', '')
+    if isinstance(codes, str):
+        codes = codes.replace(',', ' ').split()
+    if not codes:
+        return jsonify({'status': 'error', 'error': '请提供证券代码列表'}), 400
+    
+    task_id = str(time.time())
+    task_registry.create(task_id, work_dir=task_executor.work_dir(task_id))
+    event_bus.publish(task_id, 'queued', 0, "任务已加入队列")
+    try:
+        task_executor.submit(task_id, background_batch, list(codes))
+    except QueueFullError as e:
+        task_registry.remove(task_id)
+        return jsonify({'status': 'rejected', 'error': str(e)}), 503
+    
+    return jsonify({'task_id': task_id, 'status': 'processing', 'total': len(codes)})
+
+@app.route('/metrics')
+def metrics():
+    """后台任务队列运行指标"""
+    return jsonify({
+        'executor': task_executor.stats(),
+        'driver_pool': main_app.scraper.driver_pool.stats() if main_app.scraper.mode == 'js' else None,
+        'rate_limiter': main_app.scraper.rate_limiter.stats(),
+        'http_cache': main_app.scraper.response_cache.stats() if main_app.scraper.response_cache else None,
+        'table_cache': main_app.scraper.table_cache.stats() if main_app.scraper.table_cache else None,
+        'results_cache': results_cache.stats(),
+        'logs': log_collector.stats(),
+        'task_events': event_bus.stats(),
+        'tasks': task_registry.stats(),
+        'report_streams': report_streams.stats(),
+        'analysis_cache': main_app.analysis_cache.stats(),
+        'llm': main_app.ai_assistant.wrapper.stats(),
+        'llm_coalescing': main_app.ai_assistant.analyzer.coalescer.stats(),
+        'report_renderer': main_app.report_renderer.stats()
+    })
+
 @app.route('/check_status/<task_id>')
 def check_status(task_id):
-    if task_id in analysis_results:
-        result = analysis_results[task_id]
+    result = task_registry.result(task_id)
+    if result is not None:
         if result['status'] == 'completed':
             return jsonify({
                 'status': 'completed',
                 'redirect': f'/results?task_id={task_id}'
             })
+        elif result['status'] == 'batch_completed':
+            return jsonify({
+                'status': 'batch_completed',
+                'summary': result['summary']
+            })
         elif result['status'] == 'transpose_completed':
             return jsonify({
                 'status': 'transpose_completed',
@@ -282,79 +460,65 @@ def check_status(task_id):
                 'status': 'error',
                 'error': result['error']
             })
-    elif task_id in analysis_status:
-        return jsonify({'status': 'processing'})
+    elif task_id in task_registry:
+        return jsonify({'status': 'processing', 'event': event_bus.latest(task_id)})
     else:
         return jsonify({'status': 'not_found'}), 404
 
+@app.route('/task_events/<task_id>')
+def poll_task_events(task_id):
+    """长轮询任务事件: 阻塞直到有序号大于after的事件或超时
+
+    查询参数: after(已收到的最后序号), timeout(秒, 最长60)
+    """
+    if not event_bus.has(task_id):
+        return jsonify({'status': 'not_found'}), 404
+    try:
+        after = int(request.args.get('after', 0))
+        timeout = min(float(request.args.get('timeout', 25)), 60.0)
+    except ValueError:
+        return jsonify({'error': 'after/timeout 必须为数字'}), 400
+    return jsonify({'events': event_bus.wait(task_id, after, timeout=timeout)})
+
+@app.route('/task_events/<task_id>/stream')
+def stream_task_events(task_id):
+    """以Server-Sent Events推送任务阶段事件, 任务结束后关闭连接"""
+    if not event_bus.has(task_id):
+        return jsonify({'status': 'not_found'}), 404
+    try:
+        after = last_event_id(request)
+    except ValueError:
+        return jsonify({'error': 'after 必须为整数'}), 400
+    return Response(event_bus.stream(task_id, after),
+                    mimetype='text/event-stream', headers=SSE_HEADERS)
+
 @app.route('/results')
 def show_results():
     task_id = request.args.get('task_id')
-    if not task_id or task_id not in analysis_results:
+    result = task_registry.result(task_id)
+    if result is None:
         return redirect(url_for('index'))
 
-    result = analysis_results[task_id]
-    logs = log_collector.get_logs()
+    logs = log_collector.get_logs(task_id=task_id)
 
     if result['status'] in ['completed', 'transpose_completed']:
-        excel_path = result.get('excel_path')
+        data_path = result.get('data_path')
         selected_year = request.args.get('year') # 获取选择的年份/时间点
 
-        key_metrics = []
-        available_years = []
-        excel_tables = {}
-        metrics_df = None # 用于存储主要财务指标的DataFrame
-
         try:
-            xls = pd.ExcelFile(excel_path)
-            for sheet in xls.sheet_names:
-                df = pd.read_excel(xls, sheet_name=sheet)
-                html_table = df.to_html(classes='table table-bordered table-striped', index=True)
-                excel_tables[sheet] = html_table
-
-                # 存储 "主要财务指标" DataFrame 并提取可用年份
-                if sheet == "主要财务指标" and not df.empty:
-                    metrics_df = df
-                    if len(df.columns) > 1:
-                        # 可用年份/时间点是除了第一列（指标名称）之外的所有列
-                        available_years = df.columns[1:].tolist()
-                        # 如果没有选择年份，或选择的年份无效，则默认选择最新的（最后一列）
-                        if not selected_year or selected_year not in available_years:
-                            selected_year = available_years[-1] if available_years else None
-                    else:
-                         logger.warning("主要财务指标 sheet 没有数据列。")
-
-
-            # 如果成功读取了指标表并且选定了年份，则提取该年份的数据
-            if metrics_df is not None and selected_year and selected_year in available_years:
-                metric_column_name = metrics_df.columns[0] # 指标名称列名
-                num_metrics_to_show = min(5, len(metrics_df)) # 最多显示5个
-
-                for i in range(num_metrics_to_show):
-                    metric_name = metrics_df.iloc[i][metric_column_name]
-                    metric_value = metrics_df.iloc[i][selected_year] # 使用选定年份的列
-
-                    # 格式化数值
-                    try:
-                        formatted_value = f"{float(metric_value):,.2f}" if pd.notna(metric_value) else "N/A"
-                    except (ValueError, TypeError):
-                        formatted_value = str(metric_value) if pd.notna(metric_value) else "N/A"
-
-                    key_metrics.append({
-                        'name': metric_name,
-                        'value': formatted_value
-                        # 'period' 不再单独附加，因为年份已选定
-                    })
-            elif metrics_df is not None and not available_years:
-                 logger.warning("主要财务指标 sheet 存在，但未能提取到任何年份/时间点列。")
-
+            # 同一任务的数据只读取和渲染一次, 切换年份只是查表
+            task_results = results_cache.get(task_id, data_path)
+            sheet_names = list(task_results.sheets)
+            available_years = task_results.available_years
+            selected_year = task_results.resolve_year(selected_year)
+            key_metrics = task_results.metrics_for(selected_year)
 
         except Exception as e:
-            logger.error(f"读取 Excel 或提取指标时出错: {e}")
+            logger.error(f"读取数据或提取指标时出错: {e}")
             return render_template('results.html',
-                                    error=f"Excel读取或指标提取失败: {e}",
-                                    excel_path=excel_path,
-                                    excel_tables={},
+                                    error=f"数据读取或指标提取失败: {e}",
+                                    data_path=data_path,
+                                    sheet_names=[],
                                     visualizations={},
                                     key_metrics=[],
                                     available_years=[],
@@ -365,8 +529,8 @@ def show_results():
 
         # 成功时传递所有需要的数据
         return render_template('results.html',
-                               excel_path=excel_path,
-                               excel_tables=excel_tables,
+                               data_path=data_path,
+                               sheet_names=sheet_names, # 表格数据由/sheet_data按需加载
                                visualizations={},
                                key_metrics=key_metrics,
                                available_years=available_years, # 传递可用年份列表
@@ -379,8 +543,8 @@ def show_results():
         # 在其他错误情况下也传递空数据
         return render_template('results.html',
                                error=result.get('error'),
-                               excel_path=None,
-                               excel_tables={},
+                               data_path=None,
+                               sheet_names=[],
                                visualizations={},
                                key_metrics=[],
                                available_years=[],
@@ -391,17 +555,49 @@ def show_results():
 
 
 
+@app.route('/sheet_data/<task_id>')
+def sheet_data(task_id):
+    """结果页表格分片数据
+
+    查询参数: sheet, offset, limit, col_offset, col_limit, columns, periods, sort, order(asc/desc), q
+    """
+    result = task_registry.result(task_id)
+    if not result or not result.get('data_path'):
+        return jsonify({'error': '任务不存在或数据尚未生成'}), 404
+    try:
+        task_results = results_cache.get(task_id, result['data_path'])
+        sheet = request.args.get('sheet') or next(iter(task_results.sheets), None)
+        payload = task_results.query(sheet, SheetQuery.from_args(request.args))
+    except ValueError as e:
+        return jsonify({'error': f"参数错误: {e}"}), 400
+    except KeyError as e:
+        return jsonify({'error': f"sheet或列不存在: {e}"}), 404
+    payload['sheets'] = list(task_results.sheets)
+    return jsonify(payload)
+
+def task_output_dir(task_id):
+    """获取任务的输出目录(未指定或未知的task_id使用输出根目录)"""
+    record = task_registry.get(task_id)
+    if record is not None and record.work_dir:
+        return record.work_dir
+    return app.config['UPLOAD_FOLDER']
+
 @app.route('/download/<file_type>')
 def download(file_type):
+    output_dir = task_output_dir(request.args.get('task_id'))
     if file_type == 'excel':
+        # Excel由列式存储按需生成, 存储未变化时复用
         filename = 'financial_data.xlsx'
+        store_dir = os.path.join(output_dir, STORE_NAME)
+        if os.path.isdir(store_dir):
+            export_workbook(store_dir, os.path.join(output_dir, filename))
     elif file_type == 'analysis':
         filename = 'combined_analysis.md'
     else:
         return "无效的文件类型", 404
     
     return send_from_directory(
-        app.config['UPLOAD_FOLDER'],
+        output_dir,
         filename,
         as_attachment=True
     )
@@ -412,17 +608,17 @@ def static_files(filename):
 
 @app.route('/du_point_analysis')
 def du_point_analysis():
-    excel_path = request.args.get('excel_path')
-    if not excel_path:
+    data_path = request.args.get('data_path') or request.args.get('excel_path')
+    if not data_path:
         return redirect(url_for('index'))
 
     
-    excel_path = os.path.abspath(excel_path).replace("\\", "/")
-    print(f"📂 du_point_analysis 收到 Excel 路径: {excel_path}")
+    data_path = os.path.abspath(data_path).replace("\\", "/")
+    print(f"📂 du_point_analysis 收到数据路径: {data_path}")
 
     try:
         from du_point_unit import create_app as create_du_point_app, run_app
-        du_point_app, _, _ = create_du_point_app(excel_path=excel_path)
+        du_point_app, _, _ = create_du_point_app(data_path=data_path)
         
         # 确保应用已正确初始化
         if du_point_app.layout is None:
@@ -447,17 +643,14 @@ def du_point_analysis():
         logger.error(f"杜邦分析启动失败: {e}")
         return render_template('results.html',
                                error=f"杜邦分析启动失败: {e}",
-                               excel_path=excel_path)
-
-import glob # 导入 glob 模块
+                               data_path=data_path)
 
 @app.route('/ai_analysis')
 def show_ai_analysis():
-    """显示AI分析结果页面，允许通过下拉列表选择单个 .md 文件"""
-    output_dir = app.config['UPLOAD_FOLDER']
-    all_md_files_paths = glob.glob(os.path.join(output_dir, '*.md'))
-    # 获取文件名列表并按字母排序
-    all_md_files = sorted([os.path.basename(f) for f in all_md_files_paths])
+    """显示AI分析结果页面，允许通过下拉列表选择单个报告文件(.md 或结构化的 _analysis.json)"""
+    task_id = request.args.get('task_id')
+    output_dir = task_output_dir(task_id)
+    all_md_files = list_reports(task_id, output_dir)
     
     # 获取请求的文件名，如果没有则使用排序后的第一个文件
     selected_file = request.args.get('file', all_md_files[0] if all_md_files else None)
@@ -474,14 +667,13 @@ def show_ai_analysis():
         # 如果请求的文件无效，则默认显示第一个文件
         selected_file = all_md_files[0] if all_md_files else None # 确保在文件列表为空时不会出错
     
-    # 如果有选定的文件（无论是默认还是请求的），则读取并显示
-    if selected_file:
+    streaming = report_streams.is_open(task_id, selected_file)
+    # 如果有选定的文件（无论是默认还是请求的），则读取并显示; 生成中的报告由页面通过SSE显示
+    if selected_file and not streaming:
         selected_file_path = os.path.join(output_dir, selected_file)
         try:
-            with open(selected_file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-                # 将 Markdown 转换为 HTML
-            html_analysis_result = markdown.markdown(content, extensions=['extra', 'sane_lists'])
+            # 报告保存时已在后台渲染, 文件未变化时直接使用缓存的 HTML
+            html_analysis_result = main_app.report_renderer.render(selected_file_path)
             logger.info(f"正在显示 AI 分析文件: {selected_file}")
         except Exception as e:
             error_message = f"读取文件 {selected_file} 时出错: {e}"
@@ -492,31 +684,87 @@ def show_ai_analysis():
                            analysis_result=html_analysis_result,
                            md_files=all_md_files, # 使用排序后的文件列表
                            selected_file=selected_file,
+                           task_id=task_id,
+                           streaming=streaming,
                            error_message=error_message)
 
+def list_reports(task_id, output_dir):
+    """任务的报告文件名列表(已保存的 .md、_analysis.json 和正在生成的报告), 按字母排序"""
+    # 目录列表按目录修改时间缓存, 不再每次请求都 glob
+    names = set(main_app.report_renderer.list_reports(output_dir))
+    if task_id:
+        names.update(report_streams.reports(task_id))
+    return sorted(names)
+
+@app.route('/ai_analysis/results')
+def ai_analysis_results():
+    """以JSON返回任务的结构化AI分析结果(summary/insights/recommendations), 便于跨证券比较
+
+    查询参数: task_id; 返回 {报告名称: 结果字段}, 只包含已保存的报告
+    """
+    task_id = request.args.get('task_id')
+    if task_id not in task_registry:
+        return jsonify({'error': '任务不存在'}), 404
+    output_dir = task_output_dir(task_id)
+    results = {}
+    for name in list_reports(None, output_dir):
+        try:
+            report = load_report(os.path.join(output_dir, name))
+        except (OSError, ValueError) as e:
+            logger.warning(f"读取报告 {name} 失败: {e}")
+            continue
+        results[name.rsplit('_analysis', 1)[0]] = report.to_dict()
+    return jsonify({'task_id': task_id, 'reports': results})
+
+@app.route('/ai_analysis/stream')
+def stream_ai_analysis():
+    """以Server-Sent Events推送正在生成的AI分析报告文本
+
+    查询参数: task_id, file(报告文件名); 报告不在生成中时直接发送done事件
+    """
+    task_id = request.args.get('task_id')
+    report = request.args.get('file')
+    if not task_id or not report:
+        return jsonify({'error': '缺少 task_id 或 file 参数'}), 400
+    try:
+        after = last_event_id(request)
+    except ValueError:
+        return jsonify({'error': 'after 必须为整数'}), 400
+    return Response(report_streams.stream(task_id, report, after),
+                    mimetype='text/event-stream', headers=SSE_HEADERS)
+
 @app.route('/reset_and_home')
 def reset_and_home():
     """清除指定任务的状态和结果，并重定向到首页"""
     task_id = request.args.get('task_id')
     if task_id:
-        # 从字典中移除任务条目，使用 pop 并提供默认值以避免 KeyErrors
-        analysis_status.pop(task_id, None)
-        analysis_results.pop(task_id, None)
+        # 移除任务登记及其输出目录, 同时释放结果缓存、日志和事件(见forget_task);
+        # 仍在处理中的任务在后台线程结束时释放
+        task_registry.remove(task_id)
         logger.info(f"任务 {task_id} 已被重置。")
     else:
         logger.warning("尝试重置任务，但未提供 task_id。")
-    
-    # 清空日志缓冲区，以便新任务从干净的日志开始
-    log_collector.log_buffer.truncate(0)
-    log_collector.log_buffer.seek(0)
-    logger.info("日志缓冲区已清空。")
 
     return redirect(url_for('index'))
 
 
-log_collector = LogCollector()
+log_collector = LogCollector(capacity=int(os.getenv('LOG_BUFFER_SIZE', 10000)))
 logger = log_collector.get_logger()
 main_app = MainApp(log_collector)
+event_bus = TaskEventBus()
+report_streams = ReportStreams()
+# 任务登记表: 最多保留TASK_REGISTRY_SIZE个任务, 已结束任务TASK_TTL秒未访问后过期
+task_registry = TaskRegistry(
+    max_tasks=int(os.getenv('TASK_REGISTRY_SIZE', 100)),
+    ttl=float(os.getenv('TASK_TTL', 6 * 3600)),
+    on_evict=forget_task
+)
+results_cache = ResultsCache(max_entries=int(os.getenv('RESULTS_CACHE_SIZE', 32)))
+task_executor = TaskExecutor(
+    max_workers=int(os.getenv('ANALYSIS_WORKERS', 2)),
+    max_queue_size=int(os.getenv('ANALYSIS_QUEUE_SIZE', 10)),
+    base_dir=app.config['UPLOAD_FOLDER']
+)
 
 
 if __name__ == "__main__":
@@ -4,8 +4,13 @@
 支持单位: 万亿(1000000000000), 千亿(100000000000), 百亿(10000000000), 十亿(1000000000), 
 亿(100000000), 千万(10000000), 百万(1000000), 十万(100000), 
 万(10000), 千(1000), 百(100), 十(10)
+
+convert_series/convert_dataframe 使用正则一次性提取"数字+单位", 
+并通过NumPy乘数表向量化计算, 适用于整列或整表转换
 """
 
+import re
+import numpy as np
 import pandas as pd
 from typing import Union, Dict, Any
 
@@ -26,6 +31,12 @@ class NumberConverter:
         '百': 100,
         '十': 10
     }
+
+    # 数字紧跟单位(单位按UNITS顺序匹配, 较长的单位优先), 单位之后的内容(如"元")忽略
+    UNIT_PATTERN = re.compile(
+        r'^\s*([+-]?(?:[0-9]+\.?[0-9]*|\.[0-9]+)(?:[eE][+-]?[0-9]+)?)\s*(' + '|'.join(UNITS) + ')'
+    )
+    MULTIPLIERS = np.array(list(UNITS.values()), dtype=np.float64)
     
     @classmethod
     def convert_number(cls, cn_str: Union[str, float, int]) -> Union[int, float, Any]:
@@ -72,6 +83,71 @@ class NumberConverter:
                     return cn_str  # 转换失败时返回原值
         return cn_str  # 如果没有单位，保持原样
 
+    @classmethod
+    def convert_series(cls, series: pd.Series) -> pd.Series:
+        """
+        向量化转换Series中的中文数字
+        
+        仅转换"数字+单位"形式的字符串, 其余值(纯数字、NaN、"--"等)保持原样,
+        常规输入下结果与逐个调用convert_number一致
+        
+        Args:
+            series: 待转换的Series
+        
+        Returns:
+            转换后的Series(未包含可转换值时返回原Series)
+            
+        Examples:
+            >>> NumberConverter.convert_series(pd.Series(["3.5亿", "-1.2万亿", "--"])).tolist()
+            [350000000.0, -1200000000000.0, '--']
+        """
+        if series.dtype != object:
+            return series
+        try:
+            parts = series.str.extract(cls.UNIT_PATTERN)
+        except AttributeError:
+            # 列中不含任何字符串
+            return series
+        
+        matched = parts[1].notna().to_numpy()
+        if not matched.any():
+            return series
+        
+        numbers = parts[0].to_numpy()[matched].astype(np.float64)
+        codes = pd.Categorical(parts[1].to_numpy()[matched], categories=list(cls.UNITS)).codes
+        result = series.copy()
+        result[matched] = numbers * cls.MULTIPLIERS[codes]
+        return result
+
+    @classmethod
+    def convert_dataframe(cls, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        转换整个DataFrame中的中文数字
+        
+        将所有object列的值拼接为一个Series后只做一次正则提取, 再按列还原
+        
+        Args:
+            df: 包含中文数字的DataFrame
+        
+        Returns:
+            转换后的DataFrame
+        """
+        positions = np.flatnonzero((df.dtypes == object).to_numpy())
+        if len(positions) == 0:
+            return df
+        
+        block = df.iloc[:, positions].to_numpy(dtype=object)
+        flat = pd.Series(block.ravel(order='F'), dtype=object)
+        converted = cls.convert_series(flat)
+        if converted is flat:
+            return df
+        
+        block = converted.to_numpy(dtype=object).reshape(block.shape, order='F')
+        df = df.copy()
+        for i, pos in enumerate(positions):
+            df.isetitem(pos, pd.Series(block[:, i], index=df.index, dtype=object))
+        return df
+
     @classmethod
     def convert_column(cls, df: pd.DataFrame, column_name: str) -> pd.DataFrame:
         """
@@ -84,23 +160,8 @@ class NumberConverter:
         Returns:
             转换后的DataFrame
         """
-        # 只转换包含中文数字单位的列或纯数字
-        col_str = df[column_name].astype(str)
-        
-        # 检查是否包含中文数字单位或符合数字格式
-        def is_convertible(s):
-            if pd.isna(s):
-                return False
-            try:
-                float(str(s))
-                return True
-            except ValueError:
-                return any(unit in str(s) for unit in cls.UNITS)
-        
-        if col_str.apply(is_convertible).any():
-            df[column_name] = df[column_name].apply(
-                lambda x: cls.convert_number(x) if is_convertible(str(x)) else x
-            )
+        series = df[column_name]
+        converted = cls.convert_series(series)
+        if converted is not series:
+            df[column_name] = converted
         return df
-
-    
\ No newline at end of file
@@ -6,20 +6,35 @@ Deepseek API封装工具
 
 # 标准库
 import logging  # 日志记录
+import os  # 报告临时文件替换
 import json  # JSON处理
-from typing import Optional, Dict, List, Union, Any  # 类型提示
-from dataclasses import dataclass  # 数据类装饰器
+import re  # 定位JSON字段
+import threading  # 合并进行中的相同请求
+from concurrent.futures import Future  # 共享进行中请求的结果
+from functools import partial  # 绑定请求参数
+from typing import Optional, Dict, List, Union, Any, Callable, Iterator, Tuple  # 类型提示
+from dataclasses import dataclass, field  # 数据类装饰器
 
 # 第三方库
 import openai  # OpenAI API客户端
 import pandas as pd  # 数据分析处理
 
+# 本地模块
+from sheet_store import load_sheets  # 列式数据存储读取
+from analysis_cache import AnalysisCache  # AI分析结果缓存
+from prompt_builder import PromptBuilder, estimate_tokens  # 按token预算压缩数据提示
+from llm_client import LLMClient  # 带连接池、重试和熔断的API客户端
+
 # 配置日志
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(levelname)s - %(message)s'
 )
 logger = logging.getLogger(__name__)
+
+# Deepseek API端点
+DEEPSEEK_BASE_URL = "https://api.deepseek.com/v1"
+
 # Markdown 输出规范指南
 MARKDOWN_GUIDELINES = """
 从现在开始，输出的 Markdown 必须满足以下要求：
@@ -38,13 +53,176 @@ MARKDOWN_GUIDELINES = """
 请严格遵守以上规则生成最终报告，保证缩进和空行正确。
 """
 
+# 结构化输出格式说明(JSON模式), summary放在最前以便流式显示
+STRUCTURED_OUTPUT_GUIDE = """
+以JSON对象返回结果，字段顺序和含义如下：
+{"summary": "完整的分析报告正文(Markdown格式，遵循上述Markdown规范)",
+ "insights": ["关键洞察，每条一句话"],
+ "recommendations": ["改进建议，每条一句话"]}
+"""
+
+# JSON模式的输出格式参数
+JSON_FORMAT = {"type": "json_object"}
+
+# 合并分析时每份报告预计的输出token数, 以及单次请求的输出上限(deepseek-chat最多8192)
+PACK_REPORT_TOKENS = 1500
+PACK_MAX_OUTPUT_TOKENS = 8192
+
 @dataclass
 class AnalysisResult:
     """数据分析结果容器"""
     summary: str
-    insights: List[str]
-    recommendations: List[str]
-    raw_response: str
+    insights: List[str] = field(default_factory=list)
+    recommendations: List[str] = field(default_factory=list)
+    raw_response: str = ""
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """紧凑的结果字段(不含原始响应), 用于缓存和JSON报告"""
+        return {
+            'summary': self.summary,
+            'insights': self.insights,
+            'recommendations': self.recommendations,
+        }
+        
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'AnalysisResult':
+        """由结果字段字典创建(忽略未知字段, 列表字段中的非字符串项转为字符串)"""
+        return cls(
+            summary=str(data.get('summary') or ""),
+            insights=[str(item) for item in data.get('insights') or []],
+            recommendations=[str(item) for item in data.get('recommendations') or []],
+            raw_response=data.get('raw_response') or "",
+        )
+        
+    def to_markdown(self) -> str:
+        """渲染为Markdown报告"""
+        parts = ["# 数据分析报告\n\n", f"## 摘要\n{self.summary}\n\n"]
+        if self.insights:
+            parts.append("## 关键洞察\n")
+            parts.extend(f"- {insight}\n" for insight in self.insights)
+            parts.append("\n")
+        if self.recommendations:
+            parts.append("## 建议\n")
+            parts.extend(f"- {rec}\n" for rec in self.recommendations)
+            parts.append("\n")
+        return "".join(parts)
+
+def load_report(file_path: str) -> AnalysisResult:
+    """读取保存的分析报告(.json为结构化结果, 其余按Markdown原文作为summary)"""
+    with open(file_path, 'r', encoding='utf-8') as f:
+        content = f.read()
+    if file_path.endswith('.json'):
+        return AnalysisResult.from_dict(json.loads(content))
+    return AnalysisResult(summary=content, raw_response=content)
+
+def report_markdown(file_path: str) -> str:
+    """读取保存的分析报告并返回Markdown文本(.json报告在此时才渲染)"""
+    if file_path.endswith('.json'):
+        return load_report(file_path).to_markdown()
+    with open(file_path, 'r', encoding='utf-8') as f:
+        return f.read()
+
+class JsonStringStream:
+    """从流式返回的JSON文本中增量解码某个字符串字段的值
+    
+    每次feed返回新解码出的文本, 转义序列被拆分到两段之间时留到下一段再解码
+    """
+    
+    def __init__(self, field_name: str):
+        self._start = re.compile(r'"%s"\s*:\s*"' % re.escape(field_name))
+        self._buffer = ""
+        self._pos: Optional[int] = None
+        self._done = False
+        
+    def feed(self, text: str) -> str:
+        self._buffer += text
+        if self._done:
+            return ""
+        if self._pos is None:
+            match = self._start.search(self._buffer)
+            if match is None:
+                return ""
+            self._pos = match.end()
+        buffer, end = self._buffer, self._pos
+        while end < len(buffer):
+            char = buffer[end]
+            if char == '"':
+                self._done = True
+                break
+            if char != '\\':
+                end += 1
+                continue
+            # 转义序列: \uXXXX(代理对为两个), 其余为两个字符
+            if buffer[end + 1:end + 2] == 'u':
+                size = 12 if buffer[end + 2:end + 4].lower() in ('d8', 'd9', 'da', 'db') else 6
+            else:
+                size = 2
+            if end + size > len(buffer):
+                break
+            end += size
+        piece = buffer[self._pos:end]
+        self._pos = end
+        try:
+            return json.loads(f'"{piece}"', strict=False)
+        except ValueError:
+            return piece
+
+class RequestCoalescer:
+    """合并进行中的相同请求
+    
+    多个任务同时分析同一证券时提示完全相同, 第一个调用方发出请求,
+    其余调用方等待并共享同一个结果(或异常), 不再重复调用API
+    """
+    
+    def __init__(self):
+        self._inflight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self._requests = 0
+        self._shared = 0
+        
+    def run(self, key: str, func: Callable[[], Any]) -> Tuple[Any, bool]:
+        """执行请求, 相同key的请求正在进行时等待其结果
+        
+        Args:
+            key: 请求键(见AnalysisCache.key)
+            func: 发出请求的函数
+            
+        Returns:
+            (结果, 是否共享了其他调用方的结果)
+            
+        Raises:
+            Exception: 请求失败时, 所有等待的调用方都会收到同一个异常
+        """
+        with self._lock:
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = self._inflight[key] = Future()
+                self._requests += 1
+            else:
+                self._shared += 1
+        if not leader:
+            return future.result(), True
+        try:
+            result = func()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result, False
+        finally:
+            with self._lock:
+                del self._inflight[key]
+                
+    def stats(self) -> Dict[str, int]:
+        """获取统计: 发出的请求数、共享结果的调用数和进行中的请求数"""
+        with self._lock:
+            return {
+                'requests': self._requests,
+                'shared': self._shared,
+                'in_flight': len(self._inflight),
+            }
 
 class DataAnalyzer:
     """数据分析工具类
@@ -56,20 +234,57 @@ class DataAnalyzer:
     - 预测建议
     """
     
-    def __init__(self, llm_client: Any):
+    def __init__(
+        self,
+        llm_client: Any,
+        cache: Optional[AnalysisCache] = None,
+        model: str = "deepseek-chat",
+        temperature: float = 0.7,
+        prompt_builder: Optional[PromptBuilder] = None,
+        coalescer: Optional[RequestCoalescer] = None,
+        structured: bool = False,
+        on_report_saved: Optional[Callable[[str], None]] = None
+    ):
         """初始化分析器
         
         Args:
             llm_client: 语言模型客户端(需实现chat_completion接口)
+            cache: 分析结果缓存(可选), 模型、温度和提示完全相同时直接返回缓存结果
+            model: 模型名称
+            temperature: 温度参数
+            prompt_builder: 数据提示构建器(默认使用3000 token预算)
+            coalescer: 进行中请求的合并器(默认新建), 相同提示的并发调用共享一次API请求
+            structured: 是否以JSON模式请求结构化结果(summary/insights/recommendations)
+            on_report_saved: 报告文件写完后的回调(可选), 接收文件路径(用于后台预渲染)
         """
         self.client = llm_client
+        self.cache = cache
+        self.prompt_builder = prompt_builder or PromptBuilder()
+        self.coalescer = coalescer or RequestCoalescer()
+        self.model = model
+        self.temperature = temperature
+        self.structured = structured
+        self.on_report_saved = on_report_saved
+        
+    @property
+    def report_suffix(self) -> str:
+        """报告文件后缀: 结构化结果保存为紧凑的JSON, 查看时再渲染为Markdown"""
+        return ".json" if self.structured else ".md"
+        
+    def _system_prompt(self, prompt: str) -> str:
+        """附加输出格式要求的系统提示"""
+        prompt = prompt + "\n\n" + MARKDOWN_GUIDELINES
+        if self.structured:
+            prompt += "\n" + STRUCTURED_OUTPUT_GUIDE
+        return prompt
         
     def analyze(
         self,
         df: pd.DataFrame,
         task: str = "standard",
         custom_prompt: Optional[str] = None,
-        output_md: Optional[str] = None
+        output_md: Optional[str] = None,
+        on_chunk: Optional[Callable[[str], None]] = None
     ) -> AnalysisResult:
         """执行数据分析
         
@@ -77,7 +292,8 @@ class DataAnalyzer:
             df: 输入DataFrame
             task: 分析类型(standard/trend/anomaly)
             custom_prompt: 自定义分析提示
-            output_md: 输出MD文件路径(可选)
+            output_md: 输出报告路径(可选), 以.json结尾时保存结构化结果
+            on_chunk: 流式回调(可选), 提供时以流式方式调用API, 每收到一段报告正文即调用
             
         Returns:
             AnalysisResult对象
@@ -90,15 +306,18 @@ class DataAnalyzer:
             raise ValueError("输入DataFrame不能为空")
             
         # 生成系统提示
-        system_prompt = self._get_system_prompt(task) + "\n\n" + MARKDOWN_GUIDELINES
+        system_prompt = self._system_prompt(self._get_system_prompt(task))
         
-        # 准备数据样本
-        sample = df.head(3).to_markdown()
-        stats = df.describe().to_markdown()
+        # 在token预算内选取最近的报告期和关键科目
+        data_prompt = self.prompt_builder.build(df)
+        logger.info(
+            f"数据提示: {len(data_prompt.periods)}/{data_prompt.total_periods}个报告期, "
+            f"{len(data_prompt.items)}/{data_prompt.total_items}个科目, 约{data_prompt.tokens} tokens"
+        )
         
         # 构建用户提示
         user_prompt = custom_prompt or self._get_default_prompt(task)
-        full_prompt = f"{user_prompt}\n\n数据样本:\n{sample}\n\n统计信息:\n{stats}"
+        full_prompt = f"{user_prompt}\n\n财务数据(按报告期, 含最近一期同比):\n{data_prompt.text}"
         
         # 调用API
         messages = [
@@ -106,14 +325,212 @@ class DataAnalyzer:
             {"role": "user", "content": full_prompt}
         ]
         
-        response = self.client.chat_completion(messages)
-        result = self._parse_response(response)
+        return self._complete(messages, output_md, on_chunk)
         
+    def _complete(
+        self,
+        messages: List[Dict[str, str]],
+        output_md: Optional[str] = None,
+        on_chunk: Optional[Callable[[str], None]] = None
+    ) -> AnalysisResult:
+        """调用API并保存报告, 提供on_chunk时以流式方式边生成边写入
+
+        配置了缓存时先按提示内容查找, 命中则直接保存报告(流式回调一次性收到全文);
+        相同提示的请求正在进行时等待并共享其结果
+        """
+        prompt_chars = sum(len(m['content']) for m in messages)
+        prompt_tokens = sum(estimate_tokens(m['content']) for m in messages)
+        logger.info(f"提示词长度: {prompt_chars}字符, 估计{prompt_tokens} tokens")
+        key = AnalysisCache.key(self.model, self.temperature, messages)
+        if self.cache is not None:
+            cached = self.cache.get(key)
+            if cached is not None:
+                result = AnalysisResult.from_dict(cached)
+                logger.info("命中AI分析缓存，跳过API调用")
+                self._deliver(result, output_md, on_chunk)
+                return result
+
+        result, shared = self.coalescer.run(key, partial(self._request, key, messages, output_md, on_chunk))
+        if shared:
+            logger.info("相同的AI分析请求正在进行，共享其结果")
+            self._deliver(result, output_md, on_chunk)
+        return result
+
+    def _request(
+        self,
+        key: str,
+        messages: List[Dict[str, str]],
+        output_md: Optional[str],
+        on_chunk: Optional[Callable[[str], None]]
+    ) -> AnalysisResult:
+        """调用API生成报告并写入缓存(缓存只保存紧凑的结果字段)"""
+        response_format = JSON_FORMAT if self.structured else None
+        if on_chunk is None:
+            response = self.client.chat_completion(messages, model=self.model, temperature=self.temperature,
+                                                   response_format=response_format)
+            result = self._parse_response(response)
+            if output_md:
+                self._save_report(result, output_md)
+        elif self.structured:
+            chunks = self.client.chat_completion(messages, model=self.model, temperature=self.temperature,
+                                                 stream=True, response_format=response_format)
+            response, streamed = self._stream_summary(chunks, on_chunk)
+            result = self._parse_response(response)
+            if not streamed:
+                on_chunk(result.summary)
+            if output_md:
+                self._save_report(result, output_md)
+        else:
+            chunks = self.client.chat_completion(messages, model=self.model,
+                                                 temperature=self.temperature, stream=True)
+            response = self._stream_md_report(chunks, output_md, on_chunk)
+            result = self._parse_response(response)
+
+        if self.cache is not None:
+            self.cache.put(key, result.to_dict(), tokens=self._last_tokens(), model=self.model)
+        return result
+
+    def _last_tokens(self) -> Optional[int]:
+        """当前线程最近一次API调用消耗的token数"""
+        usage = getattr(self.client, 'last_usage', lambda: None)()
+        return usage.get('total_tokens') if usage else None
+
+    def _deliver(
+        self,
+        result: AnalysisResult,
+        output_md: Optional[str],
+        on_chunk: Optional[Callable[[str], None]]
+    ) -> None:
+        """将已有的结果(缓存或共享的结果)保存为报告, 流式回调一次性收到全文"""
         if output_md:
-            self._save_md_report(result, output_md)
+            self._save_report(result, output_md)
+        if on_chunk is not None:
+            on_chunk(result.summary)
+
+    def plan_packs(self, sheets: Dict[str, pd.DataFrame], token_budget: int) -> List[List[str]]:
+        """按数据提示大小将sheet分组, 每组的数据提示合计不超过token_budget
+        
+        按数据提示从大到小依次放入第一个放得下的组; 每组的报告合计需在一次请求的输出上限内
+        (每份预计PACK_REPORT_TOKENS), 避免JSON被截断后逐个重新请求; 只含1个sheet的组应单独分析
+        
+        Args:
+            sheets: sheet名称和对应的DataFrame
+            token_budget: 每组数据提示的token上限
             
-        return result
+        Returns:
+            sheet名称分组列表
+        """
+        sizes = {name: self.prompt_builder.build(df).tokens for name, df in sheets.items()}
+        max_sheets = max(1, PACK_MAX_OUTPUT_TOKENS // PACK_REPORT_TOKENS)
+        groups: List[Tuple[List[str], int]] = []
+        for name in sorted(sizes, key=sizes.get, reverse=True):
+            for i, (names, used) in enumerate(groups):
+                if used + sizes[name] <= token_budget and len(names) < max_sheets:
+                    names.append(name)
+                    groups[i] = (names, used + sizes[name])
+                    break
+            else:
+                groups.append(([name], sizes[name]))
+        return [names for names, _ in groups]
+
+    def analyze_packed(
+        self,
+        sheets: Dict[str, Tuple[pd.DataFrame, str]],
+        output_mds: Optional[Dict[str, str]] = None,
+        on_chunks: Optional[Dict[str, Callable[[str], None]]] = None
+    ) -> Dict[str, AnalysisResult]:
+        """在一次请求中分析多个较小的sheet, 要求模型以JSON返回各sheet的报告
+        
+        系统提示中保留各sheet分析类型对应的角色说明; 合并的请求无法逐段输出,
+        各sheet的回调在整个请求完成后一次性收到全文; 模型返回的JSON无效或缺少某个sheet时,
+        对缺少的sheet单独调用analyze(提供回调时以流式方式)
         
+        Args:
+            sheets: sheet名称 -> (DataFrame, 分析类型)
+            output_mds: sheet名称 -> 输出MD文件路径(可选)
+            on_chunks: sheet名称 -> 回调(可选), 报告生成后一次性收到全文
+            
+        Returns:
+            sheet名称 -> AnalysisResult
+        """
+        if not sheets:
+            raise ValueError("输入数据不能为空")
+        output_mds = output_mds or {}
+        on_chunks = on_chunks or {}
+        
+        sections = []
+        for name, (df, task) in sheets.items():
+            data_prompt = self.prompt_builder.build(df)
+            sections.append(
+                f"=== {name} ===\n分析要求: {self._get_default_prompt(task).strip()}\n"
+                f"财务数据(按报告期, 含最近一期同比):\n{data_prompt.text}"
+            )
+        report_format = ("{\"summary\": \"<Markdown格式的分析报告>\", \"insights\": [\"<关键洞察>\"], "
+                         "\"recommendations\": [\"<改进建议>\"]}" if self.structured
+                         else "\"<Markdown格式的分析报告>\"")
+        roles = "\n".join(f"- {name}: {self._get_system_prompt(task)}" for name, (_, task) in sheets.items())
+        system_prompt = (
+            "你是一个资深财务数据分析师，请分别分析下列每份财务数据，各自给出完整的分析报告。"
+            f"以JSON对象返回结果，格式为 {{\"reports\": {{\"<数据名称>\": {report_format}}}}}，"
+            "数据名称与 === 标记中的名称完全一致。\n"
+            f"各份数据的分析侧重:\n{roles}"
+        ) + "\n\n" + MARKDOWN_GUIDELINES
+        messages = [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": "\n\n".join(sections)}
+        ]
+        logger.info(f"合并分析{len(sheets)}个sheet: {', '.join(sheets)}, "
+                    f"估计{sum(estimate_tokens(m['content']) for m in messages)} tokens")
+        
+        key = AnalysisCache.key(self.model, self.temperature, messages)
+        reports = self.cache.get(key) if self.cache is not None else None
+        if reports is not None:
+            logger.info("命中AI分析缓存，跳过API调用")
+        else:
+            reports, shared = self.coalescer.run(key, partial(self._request_packed, key, messages, list(sheets)))
+            if shared:
+                logger.info("相同的AI分析请求正在进行，共享其结果")
+        
+        results = {}
+        for name, (df, task) in sheets.items():
+            if name in reports:
+                results[name] = AnalysisResult.from_dict(reports[name])
+                self._deliver(results[name], output_mds.get(name), on_chunks.get(name))
+            else:
+                logger.warning(f"合并分析结果中缺少 {name}，单独分析")
+                results[name] = self.analyze(df, task=task, output_md=output_mds.get(name),
+                                             on_chunk=on_chunks.get(name))
+        return results
+
+    def _request_packed(
+        self,
+        key: str,
+        messages: List[Dict[str, str]],
+        names: List[str]
+    ) -> Dict[str, Dict[str, Any]]:
+        """调用API并按sheet拆分JSON结果, 全部sheet都有报告时写入缓存
+
+        输出上限按请求允许的最大值设置, 为多份报告留足空间
+        """
+        response = self.client.chat_completion(messages, model=self.model, temperature=self.temperature,
+                                               max_tokens=PACK_MAX_OUTPUT_TOKENS, response_format=JSON_FORMAT)
+        try:
+            reports = json.loads(response, strict=False).get('reports') or {}
+        except (ValueError, AttributeError):
+            logger.warning("合并分析返回的JSON无效")
+            reports = {}
+        parsed = {}
+        for name in names:
+            report = reports.get(name)
+            if isinstance(report, str):
+                parsed[name] = AnalysisResult(summary=report).to_dict()
+            elif isinstance(report, dict) and report.get('summary'):
+                parsed[name] = AnalysisResult.from_dict(report).to_dict()
+        reports = parsed
+        if self.cache is not None and len(reports) == len(names):
+            self.cache.put(key, reports, tokens=self._last_tokens(), model=self.model)
+        return reports
+
     def _get_system_prompt(self, task: str) -> str:
         """获取系统提示模板"""
         prompts = {
@@ -166,8 +583,20 @@ class DataAnalyzer:
         return prompts.get(task, prompts["standard"])
         
     def _parse_response(self, response: str) -> AnalysisResult:
-        """解析API响应"""
-        # 这里可以添加更复杂的解析逻辑
+        """解析API响应
+        
+        结构化模式下按JSON填充各字段; JSON无效或缺少summary时整段文本作为summary
+        """
+        if self.structured:
+            try:
+                data = json.loads(response, strict=False)
+                if isinstance(data, dict) and data.get('summary'):
+                    result = AnalysisResult.from_dict(data)
+                    result.raw_response = response
+                    return result
+            except ValueError:
+                pass
+            logger.warning("AI分析返回的不是有效的结构化结果，按文本保存")
         return AnalysisResult(
             summary=response,
             insights=[],
@@ -175,53 +604,119 @@ class DataAnalyzer:
             raw_response=response
         )
         
+    def _save_report(self, result: AnalysisResult, file_path: str) -> None:
+        """保存分析报告: .json后缀保存紧凑的结构化结果, 其余保存为MD文件"""
+        if file_path.endswith('.json'):
+            with open(file_path, 'w', encoding='utf-8') as f:
+                json.dump(result.to_dict(), f, ensure_ascii=False, separators=(',', ':'))
+        else:
+            self._save_md_report(result, file_path)
+        self._report_saved(file_path)
+        
+    def _report_saved(self, file_path: str) -> None:
+        """通知报告文件已写完"""
+        if self.on_report_saved is not None:
+            self.on_report_saved(file_path)
+        
     def _save_md_report(self, result: AnalysisResult, file_path: str) -> None:
         """保存分析结果为MD文件"""
         with open(file_path, 'w', encoding='utf-8') as f:
-            f.write(f"# 数据分析报告\n\n")
-            f.write(f"## 摘要\n{result.summary}\n\n")
-            if result.insights:
-                f.write(f"## 关键洞察\n")
-                for insight in result.insights:
-                    f.write(f"- {insight}\n")
-                f.write("\n")
-            if result.recommendations:
-                f.write(f"## 建议\n")
-                for rec in result.recommendations:
-                    f.write(f"- {rec}\n")
-                f.write("\n")
+            f.write(result.to_markdown())
                 
+    def _stream_summary(
+        self,
+        chunks: Iterator[str],
+        on_chunk: Callable[[str], None]
+    ) -> Tuple[str, bool]:
+        """结构化模式的流式调用: 从JSON文本中增量解码summary字段并转发给回调
+        
+        Returns:
+            (完整的响应文本, 是否已转发过summary文本)
+        """
+        parts = []
+        summary = JsonStringStream('summary')
+        streamed = False
+        for text in chunks:
+            parts.append(text)
+            decoded = summary.feed(text)
+            if decoded:
+                on_chunk(decoded)
+                streamed = True
+        return "".join(parts), streamed
+
+    def _stream_md_report(
+        self,
+        chunks: Iterator[str],
+        file_path: Optional[str],
+        on_chunk: Callable[[str], None]
+    ) -> str:
+        """逐段写入MD文件并转发给回调, 写完的文件与_save_md_report的输出一致
+
+        先写入同目录下的临时文件, 完整接收后再原子地替换为目标文件;
+        流式响应中途失败时删除临时文件, 不会留下被当作完整报告的半截文件
+
+        Returns:
+            完整的响应文本
+        """
+        parts = []
+        tmp_path = f"{file_path}.{os.getpid()}.{threading.get_ident()}.tmp" if file_path else None
+        f = open(tmp_path, 'w', encoding='utf-8') if tmp_path else None
+        try:
+            if f:
+                f.write(f"# 数据分析报告\n\n")
+                f.write(f"## 摘要\n")
+            for text in chunks:
+                parts.append(text)
+                if f:
+                    f.write(text)
+                on_chunk(text)
+            if f:
+                f.write("\n\n")
+                f.close()
+                os.replace(tmp_path, file_path)
+        except BaseException:
+            if f:
+                f.close()
+                try:
+                    os.remove(tmp_path)
+                except OSError:
+                    pass
+            raise
+        if file_path:
+            self._report_saved(file_path)
+        return "".join(parts)
+
     def analyze_excel(self, excel_path: str, output_dir: str) -> Dict[str, AnalysisResult]:
-        """分析Excel文件的所有sheet并生成MD报告
+        """分析数据文件的所有sheet并生成MD报告
         
         Args:
-            excel_path: Excel文件路径
+            excel_path: 列式存储目录或Excel文件路径
             output_dir: 输出目录
             
         Returns:
             包含每个sheet分析结果的字典
         """
         results = {}
-        with pd.ExcelFile(excel_path) as xls:
-            for sheet_name in xls.sheet_names:
-                df = pd.read_excel(xls, sheet_name=sheet_name)
-                result = self.analyze(
-                    df,
-                    output_md=f"{output_dir}/{sheet_name}_analysis.md"
-                )
-                results[sheet_name] = result
+        for sheet_name, df in load_sheets(excel_path).items():
+            result = self.analyze(
+                df,
+                output_md=f"{output_dir}/{sheet_name}_analysis.md"
+            )
+            results[sheet_name] = result
         return results
 
     def analyze_combined(
         self, 
         sheets_data: Dict[str, pd.DataFrame],
-        output_md: Optional[str] = None
+        output_md: Optional[str] = None,
+        on_chunk: Optional[Callable[[str], None]] = None
     ) -> AnalysisResult:
         """合并分析多个sheet的数据
         
         Args:
             sheets_data: 包含sheet名称和对应DataFrame的字典
             output_md: 输出MD文件路径(可选)
+            on_chunk: 流式回调(可选, 见analyze)
             
         Returns:
             合并分析结果
@@ -231,12 +726,15 @@ class DataAnalyzer:
             
         # 生成系统提示
         system_prompt = "你是一个资深财务分析师，请综合分析资产负债表、利润表和现金流量表"
+        if self.structured:
+            system_prompt = self._system_prompt(system_prompt)
         
-        # 准备数据样本
+        # 准备数据样本: 各sheet平分token预算
         samples = []
+        sheet_budget = self.prompt_builder.token_budget // len(sheets_data)
         for sheet_name, df in sheets_data.items():
-            sample = df.head(3).to_markdown()
-            samples.append(f"=== {sheet_name} 样本 ===\n{sample}")
+            data_prompt = self.prompt_builder.build(df, token_budget=sheet_budget)
+            samples.append(f"=== {sheet_name} ===\n{data_prompt.text}")
         
         # 构建用户提示
         user_prompt = """
@@ -255,26 +753,35 @@ class DataAnalyzer:
             {"role": "user", "content": full_prompt}
         ]
         
-        response = self.client.chat_completion(messages)
-        result = self._parse_response(response)
-        
-        if output_md:
-            self._save_md_report(result, output_md)
-            
-        return result
+        return self._complete(messages, output_md, on_chunk)
 
 class AIDataAssistant:
     """AI数据助手(整合Deepseek API和分析功能)"""
     
-    def __init__(self, api_key: str, organization: Optional[str] = None):
+    def __init__(
+        self,
+        api_key: str,
+        organization: Optional[str] = None,
+        cache: Optional[AnalysisCache] = None,
+        prompt_builder: Optional[PromptBuilder] = None,
+        structured: bool = False,
+        on_report_saved: Optional[Callable[[str], None]] = None,
+        **client_options: Any
+    ):
         """初始化AI助手
         
         Args:
             api_key: Deepseek API密钥
             organization: 组织ID(可选)
+            cache: 分析结果缓存(可选)
+            prompt_builder: 数据提示构建器(可选)
+            structured: 是否请求结构化结果(见DataAnalyzer)
+            on_report_saved: 报告文件写完后的回调(见DataAnalyzer)
+            **client_options: 传给DeepseekWrapper的API端点、并发、超时、重试等参数
         """
-        self.wrapper = DeepseekWrapper(api_key, organization)
-        self.analyzer = DataAnalyzer(self.wrapper)
+        self.wrapper = DeepseekWrapper(api_key, organization, **client_options)
+        self.analyzer = DataAnalyzer(self.wrapper, cache=cache, prompt_builder=prompt_builder,
+                                     structured=structured, on_report_saved=on_report_saved)
         logger.info("AI数据助手初始化完成")
     
     def analyze_data(self, df: pd.DataFrame, task: str = "standard") -> AnalysisResult:
@@ -316,51 +823,102 @@ class AIDataAssistant:
 class DeepseekWrapper:
     """Deepseek API客户端封装"""
     
-    def __init__(self, api_key: str, organization: Optional[str] = None):
-        """初始化OpenAI客户端
+    def __init__(
+        self,
+        api_key: str,
+        organization: Optional[str] = None,
+        base_url: str = DEEPSEEK_BASE_URL,
+        **client_options: Any
+    ):
+        """初始化API客户端
         
         Args:
-            api_key: OpenAI API密钥
+            api_key: Deepseek API密钥
             organization: 组织ID(可选)
+            base_url: API端点(可指向本地的OpenAI兼容模拟服务)
+            **client_options: 传给LLMClient的连接池、并发、超时、重试和熔断参数
         """
-        self.client = openai.OpenAI(
-            api_key=api_key,
-            organization=organization,
-            base_url="https://api.deepseek.com/v1"  # Deepseek API端点
-        )
+        self.llm = LLMClient(api_key, base_url=base_url, organization=organization, **client_options)
         logger.info("Deepseek客户端初始化完成")
 
+    @staticmethod
+    def _params(temperature: float, max_tokens: Optional[int],
+                response_format: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+        params = {'temperature': temperature}
+        if max_tokens is not None:
+            params['max_tokens'] = max_tokens
+        if response_format is not None:
+            params['response_format'] = response_format
+        return params
+
     def chat_completion(
         self,
         messages: List[Dict[str, str]],
         model: str = "deepseek-chat",  # Deepseek模型名称
         temperature: float = 0.7,
-        max_tokens: Optional[int] = None
-    ) -> str:
+        max_tokens: Optional[int] = None,
+        stream: bool = False,
+        response_format: Optional[Dict[str, str]] = None
+    ) -> Union[str, Iterator[str]]:
         """聊天补全接口
         
+        429、5xx和超时会自动重试, 连续失败时熔断(见LLMClient)
+        
         Args:
             messages: 消息列表
             model: 模型名称
             temperature: 温度参数
             max_tokens: 最大token数
+            stream: 是否流式返回
+            response_format: 输出格式(如 {"type": "json_object"})
             
         Returns:
-            模型生成的文本
+            模型生成的文本; stream=True时为逐段产出文本的迭代器
             
         Raises:
             openai.OpenAIError: API调用失败时抛出
         """
+        params = self._params(temperature, max_tokens, response_format)
+        if stream:
+            return self._stream_completion(messages, model, params)
         try:
-            response = self.client.chat.completions.create(
-                model=model,
-                messages=messages,
-                temperature=temperature,
-                max_tokens=max_tokens
-            )
-            content = response.choices[0].message.content
-            logger.info(f"成功获取聊天补全结果，使用token数: {response.usage.total_tokens}")
-            return content
+            return self.llm.complete(messages, model, **params).content
         except openai.OpenAIError as e:
             logger.error(f"OpenAI API调用失败: {e}")
             raise
+
+    async def achat_completion(
+        self,
+        messages: List[Dict[str, str]],
+        model: str = "deepseek-chat",
+        temperature: float = 0.7,
+        max_tokens: Optional[int] = None
+    ) -> str:
+        """聊天补全接口(asyncio版本, 参数同chat_completion)"""
+        try:
+            result = await self.llm.acomplete(messages, model, **self._params(temperature, max_tokens))
+            return result.content
+        except openai.OpenAIError as e:
+            logger.error(f"OpenAI API调用失败: {e}")
+            raise
+
+    def _stream_completion(
+        self,
+        messages: List[Dict[str, str]],
+        model: str,
+        params: Dict[str, Any]
+    ) -> Iterator[str]:
+        """流式聊天补全, 逐段产出模型生成的文本"""
+        try:
+            yield from self.llm.stream(messages, model, **params)
+        except openai.OpenAIError as e:
+            logger.error(f"OpenAI API流式调用失败: {e}")
+            raise
+
+    def last_usage(self) -> Optional[Dict[str, int]]:
+        """获取当前线程最近一次调用的token用量"""
+        return self.llm.last_usage()
+
+    def stats(self) -> Dict[str, Any]:
+        """获取API调用统计(延迟、重试、token用量和熔断状态)"""
+        return self.llm.stats()
@@ -0,0 +1,247 @@
+"""
+内存数据处理管道模块
+
+提供SheetPipeline类, 在内存中以 {sheet名称: DataFrame} 字典的形式
+依次执行各处理阶段(转置、数字转换、数据清洗等), 仅在最后写出一次结果
+
+主要功能:
+- 按顺序注册并执行处理阶段
+- 可选保留每个阶段的中间快照, 便于调试而无需回读磁盘
+- 模拟Excel读写对表头和空单元格的处理, 保证结果与逐阶段落盘一致
+
+示例用法:
+    from pipeline import SheetPipeline, tables_to_sheets, transpose_sheet
+
+    pipeline = SheetPipeline(keep_snapshots=True)
+    pipeline.add_stage("transpose", transpose_sheet, "开始数据转置...")
+    sheets = pipeline.run(tables_to_sheets(tables))
+    write_workbook(sheets, "output/financial_data.xlsx")
+
+    # 财务报表标准流程(转置 -> 数字转换 -> 数据清洗), 结果保存为列式存储
+    sheets = process_tables(tables, "output/financial_data")
+"""
+
+import logging
+from collections import defaultdict
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from data_cleaner import DataCleaner
+from number_converter import NumberConverter
+from sheet_store import save_sheets, write_workbook
+
+logger = logging.getLogger(__name__)
+
+# 默认的sheet名称(与爬取的表格顺序对应)
+SHEET_NAMES = ["主要财务指标", "资产负债表", "利润表", "现金流量表"]
+
+Sheets = Dict[str, pd.DataFrame]
+StageFunc = Callable[[str, pd.DataFrame], pd.DataFrame]
+StageCallback = Callable[[str, int, int], None]
+
+
+def normalize_columns(columns) -> List:
+    """按read_excel的规则规范化表头
+
+    空表头替换为 "Unnamed: i", 重复表头依次追加 ".1", ".2" 后缀
+
+    Args:
+        columns: 原始列名序列
+
+    Returns:
+        规范化后的列名列表
+    """
+    names = []
+    for i, col in enumerate(columns):
+        if col is None or (isinstance(col, float) and np.isnan(col)) or col == '':
+            col = f"Unnamed: {i}"
+        names.append(col)
+
+    counts = defaultdict(int)
+    for i, col in enumerate(names):
+        cur_count = counts[col]
+        while cur_count > 0:
+            counts[col] = cur_count + 1
+            col = f"{col}.{cur_count}"
+            cur_count = counts[col]
+        names[i] = col
+        counts[col] = cur_count + 1
+    return names
+
+
+def normalize_sheet(df: pd.DataFrame) -> pd.DataFrame:
+    """将DataFrame规范化为写入再读回Excel后的形态
+
+    - 表头按read_excel规则处理
+    - 空字符串视为缺失值, 末尾的空行被丢弃
+    - 全部可解析为数字的列转换为数值类型, 无缺失的整数值列转换为整型
+
+    Args:
+        df: 输入DataFrame
+
+    Returns:
+        规范化后的DataFrame
+    """
+    df = df.replace('', np.nan)
+    df.columns = normalize_columns(df.columns)
+
+    non_empty = np.flatnonzero(df.notna().any(axis=1).to_numpy())
+    df = df.iloc[:non_empty[-1] + 1 if len(non_empty) else 0].reset_index(drop=True)
+
+    columns = {}
+    for col in df.columns:
+        series = df[col]
+        if series.dtype == object:
+            try:
+                series = pd.to_numeric(series)
+            except (ValueError, TypeError):
+                pass
+        if series.dtype.kind == 'f' and series.notna().all() and (series % 1 == 0).all():
+            series = series.astype('int64')
+        columns[col] = series
+    return pd.DataFrame(columns, columns=df.columns).infer_objects()
+
+
+def tables_to_sheets(tables: List[pd.DataFrame],
+                     sheet_names: Optional[List[str]] = None) -> Sheets:
+    """将爬取的表格列表转换为sheet字典
+
+    Args:
+        tables: 表格DataFrame列表
+        sheet_names: sheet名称列表(默认为SHEET_NAMES, 不足部分使用SheetN)
+
+    Returns:
+        {sheet名称: DataFrame} 字典
+    """
+    sheet_names = sheet_names or SHEET_NAMES
+    sheets = {}
+    for i, table in enumerate(tables):
+        name = sheet_names[i] if i < len(sheet_names) else f"Sheet{i+1}"
+        sheets[name] = normalize_sheet(table)
+    return sheets
+
+
+def transpose_sheet(sheet_name: str, df: pd.DataFrame) -> pd.DataFrame:
+    """将第一列设为索引后转置
+
+    Args:
+        sheet_name: sheet名称
+        df: 输入DataFrame
+
+    Returns:
+        转置后的DataFrame(原列名不再保留为索引)
+    """
+    if len(df.columns) == 0:
+        return df
+    return normalize_sheet(df.set_index(df.columns[0]).T)
+
+
+def convert_sheet(sheet_name: str, df: pd.DataFrame) -> pd.DataFrame:
+    """数字转换阶段: 将中文单位数字转换为阿拉伯数字"""
+    try:
+        df = NumberConverter.convert_dataframe(df)
+    except Exception as e:
+        logger.warning(f"跳过表 {sheet_name} 的数字转换: {str(e)}")
+    return normalize_sheet(df)
+
+
+def clean_sheet(sheet_name: str, df: pd.DataFrame) -> pd.DataFrame:
+    """数据清洗阶段"""
+    return normalize_sheet(DataCleaner().clean_data(df))
+
+
+class SheetPipeline:
+    """多sheet内存处理管道
+
+    每个阶段接收sheet名称和对应的DataFrame并返回处理后的DataFrame,
+    管道按注册顺序对所有sheet依次执行各阶段
+    """
+
+    def __init__(self, keep_snapshots: bool = False, logger: Optional[logging.Logger] = None):
+        """初始化管道
+
+        Args:
+            keep_snapshots: 是否保留每个阶段结束后的快照
+            logger: 日志记录器(默认使用模块logger)
+        """
+        self.keep_snapshots = keep_snapshots
+        self.logger = logger or logging.getLogger(__name__)
+        self.stages = []
+        self.snapshots: Dict[str, Sheets] = {}
+
+    def add_stage(self, name: str, func: StageFunc, message: Optional[str] = None) -> 'SheetPipeline':
+        """注册处理阶段
+
+        Args:
+            name: 阶段名称(同时作为快照的键)
+            func: 处理函数, 接收(sheet名称, DataFrame)并返回DataFrame
+            message: 阶段开始时输出的日志
+
+        Returns:
+            管道自身, 便于链式调用
+        """
+        self.stages.append((name, func, message))
+        return self
+
+    def run(self, sheets: Sheets, on_stage: Optional[StageCallback] = None) -> Sheets:
+        """依次执行所有阶段
+
+        Args:
+            sheets: {sheet名称: DataFrame} 字典
+            on_stage: 每个阶段开始时的回调, 接收(阶段名称, 阶段序号, 阶段总数)
+
+        Returns:
+            处理完成后的sheet字典
+        """
+        self.snapshots = {}
+        if self.keep_snapshots:
+            self.snapshots["input"] = {name: df.copy() for name, df in sheets.items()}
+
+        for index, (name, func, message) in enumerate(self.stages):
+            if on_stage is not None:
+                on_stage(name, index, len(self.stages))
+            if message:
+                self.logger.info(message)
+            sheets = {sheet_name: func(sheet_name, df) for sheet_name, df in sheets.items()}
+            if self.keep_snapshots:
+                self.snapshots[name] = {sheet_name: df.copy() for sheet_name, df in sheets.items()}
+        return sheets
+
+
+def build_financial_pipeline(keep_snapshots: bool = False,
+                             logger: Optional[logging.Logger] = None) -> SheetPipeline:
+    """创建财务报表标准处理管道: 转置 -> 数字转换 -> 数据清洗"""
+    pipeline = SheetPipeline(keep_snapshots=keep_snapshots, logger=logger)
+    pipeline.add_stage("transpose", transpose_sheet, "开始数据转置...")
+    pipeline.add_stage("convert", convert_sheet, "开始数字转换...")
+    pipeline.add_stage("clean", clean_sheet, "开始数据清洗...")
+    return pipeline
+
+
+def process_tables(tables: List[pd.DataFrame],
+                   store_dir: str,
+                   pipeline: Optional[SheetPipeline] = None,
+                   on_stage: Optional[StageCallback] = None) -> Sheets:
+    """对爬取的表格执行标准处理流程并保存为列式存储
+
+    Args:
+        tables: 爬取的表格列表
+        store_dir: 输出存储目录(见sheet_store)
+        pipeline: 处理管道(默认使用build_financial_pipeline)
+        on_stage: 每个阶段开始时的回调(见SheetPipeline.run)
+
+    Returns:
+        处理完成后的sheet字典
+    """
+    pipeline = pipeline or build_financial_pipeline()
+    sheets = pipeline.run(tables_to_sheets(tables), on_stage=on_stage)
+    save_sheets(sheets, store_dir)
+    return sheets
+
+
+# 模块导出
+__all__ = ['SheetPipeline', 'SHEET_NAMES', 'normalize_columns', 'normalize_sheet',
+           'tables_to_sheets', 'transpose_sheet', 'convert_sheet', 'clean_sheet',
+           'write_workbook', 'build_financial_pipeline', 'process_tables']
@@ -0,0 +1,214 @@
+"""
+提示词压缩模块
+
+在给定的token预算内为AI分析挑选最有信息量的数据: 最近的若干报告期、关键财务科目
+以及同比变化, 代替 df.head(3) + df.describe() 的完整输出, 降低请求体积、延迟和费用
+
+处理后的sheet每行为一个报告期(首列为截止日期), 其余列为各财务科目
+
+主要功能:
+- estimate_tokens: 按字符类别估算token数(无需额外依赖)
+- PromptBuilder.build: 选取报告期和科目, 输出以科目为行、报告期为列的紧凑表格,
+  超出预算时依次减少科目和报告期
+
+示例用法:
+    from prompt_builder import PromptBuilder
+
+    builder = PromptBuilder(token_budget=3000)
+    data_prompt = builder.build(df)
+    logger.info(f"{data_prompt.tokens} tokens, {len(data_prompt.items)}个科目")
+    full_prompt = f"{user_prompt}\\n\\n{data_prompt.text}"
+"""
+
+import logging
+import math
+import re
+from dataclasses import dataclass, field
+from typing import Any, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# 优先保留的关键科目(按关键字匹配, 越靠前优先级越高)
+KEY_ITEMS = [
+    "营业收入", "营业总收入", "净利润", "归母净利润", "毛利", "营业利润", "每股收益", "EPS",
+    "ROE", "净资产收益率", "ROA", "毛利率", "净利率", "总资产", "总负债", "股东权益",
+    "资产负债率", "流动比率", "速动比率", "经营活动", "投资活动", "筹资活动", "现金及现金等价物",
+    "自由现金流", "货币资金", "应收", "存货",
+]
+
+# 中日韩文字(每个字约计1个token)
+_CJK = re.compile(r'[　-〿㐀-䶿一-鿿＀-￯]')
+
+
+def estimate_tokens(text: str) -> int:
+    """估算文本的token数: 中文字符每个约计1个token, 其余字符约每4个计1个token"""
+    cjk = len(_CJK.findall(text))
+    return cjk + math.ceil((len(text) - cjk) / 4)
+
+
+def format_number(value: Any) -> str:
+    """紧凑地格式化数值(大数使用亿/万为单位, 保留4位有效数字)"""
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return ""
+    if not isinstance(value, (int, float, np.number)):
+        return str(value)
+    value = float(value)
+    magnitude = abs(value)
+    if magnitude >= 1e8:
+        return f"{value / 1e8:.4g}亿"
+    if magnitude >= 1e4:
+        return f"{value / 1e4:.4g}万"
+    return f"{value:.4g}"
+
+
+def compact_markdown(table: pd.DataFrame) -> str:
+    """输出不含对齐空格的Markdown表格(单元格已为字符串)"""
+    lines = ["| |" + "|".join(str(c) for c in table.columns) + "|",
+             "|---" * (len(table.columns) + 1) + "|"]
+    for index, row in zip(table.index, table.itertuples(index=False)):
+        lines.append(f"|{index}|" + "|".join(row) + "|")
+    return "\n".join(lines)
+
+
+@dataclass
+class DataPrompt:
+    """压缩后的数据提示"""
+    text: str
+    tokens: int
+    periods: List[str] = field(default_factory=list)
+    items: List[str] = field(default_factory=list)
+    total_periods: int = 0
+    total_items: int = 0
+
+
+class PromptBuilder:
+    """按token预算构建数据提示"""
+
+    def __init__(self,
+                 token_budget: int = 3000,
+                 max_periods: int = 8,
+                 min_periods: int = 2,
+                 key_items: Optional[Sequence[str]] = None):
+        """初始化构建器
+
+        Args:
+            token_budget: 数据部分的token预算
+            max_periods: 最多保留的报告期数(从最近的开始)
+            min_periods: 超出预算时至少保留的报告期数
+            key_items: 优先保留的科目关键字(默认使用KEY_ITEMS)
+        """
+        self.token_budget = token_budget
+        self.max_periods = max_periods
+        self.min_periods = min_periods
+        self.key_items = list(key_items) if key_items is not None else KEY_ITEMS
+
+    @staticmethod
+    def _period_dates(labels: pd.Series) -> pd.Series:
+        """将报告期标签解析为日期(无法解析的为NaT)"""
+        text = labels.astype(str)
+        dates = pd.to_datetime(text, format='%y/%m/%d', errors='coerce')
+        if dates.notna().sum() < len(text) / 2:
+            dates = pd.to_datetime(text, errors='coerce', format='mixed')
+        return dates
+
+    def _item_rank(self, values: pd.DataFrame) -> List[Any]:
+        """科目排序: 关键科目在前, 其余按数据完整度和波动幅度排序"""
+        def priority(column: Any) -> int:
+            name = str(column)
+            for i, keyword in enumerate(self.key_items):
+                if keyword.lower() in name.lower():
+                    return i
+            return len(self.key_items)
+
+        coverage = values.notna().mean()
+        mean = values.abs().mean().replace(0, np.nan)
+        variation = (values.std() / mean).fillna(0)
+        return sorted(values.columns,
+                      key=lambda c: (priority(c), -coverage[c], -variation[c]))
+
+    @staticmethod
+    def _yoy(values: pd.DataFrame, dates: pd.Series, row: Any) -> pd.Series:
+        """计算某个报告期相对上年同期的变化率(找不到上年同期时为NaN)"""
+        if pd.isna(dates[row]):
+            return pd.Series(np.nan, index=values.columns)
+        previous = dates[dates == dates[row] - pd.DateOffset(years=1)]
+        if previous.empty:
+            return pd.Series(np.nan, index=values.columns)
+        prev = values.loc[previous.index[0]]
+        return (values.loc[row] - prev) / prev.abs().replace(0, np.nan)
+
+    def _render(self, values: pd.DataFrame, labels: pd.Series, dates: pd.Series,
+                rows: List[Any], items: List[Any]) -> str:
+        """渲染以科目为行、报告期为列的表格, 附最近一期同比变化"""
+        table = values.loc[rows, items].T
+        table.columns = [str(labels[r]) for r in rows]
+        body = table.apply(lambda col: col.map(format_number))
+        yoy = self._yoy(values, dates, rows[0])[items] if rows else None
+        if yoy is not None and yoy.notna().any():
+            body[f"{table.columns[0]}同比"] = yoy.map(lambda v: "" if pd.isna(v) else f"{v:+.1%}")
+        body.index = [str(i) for i in items]
+        return compact_markdown(body)
+
+    def build(self, df: pd.DataFrame, token_budget: Optional[int] = None) -> DataPrompt:
+        """构建数据提示
+
+        Args:
+            df: sheet数据(首列为报告期)
+            token_budget: 本次使用的token预算(默认使用构建器的预算)
+
+        Returns:
+            DataPrompt实例
+        """
+        budget = token_budget or self.token_budget
+        if df.empty or len(df.columns) < 2:
+            text = df.head(3).to_markdown()
+            return DataPrompt(text=text, tokens=estimate_tokens(text))
+
+        labels = df.iloc[:, 0]
+        values = df.iloc[:, 1:].apply(pd.to_numeric, errors='coerce')
+        values = values.loc[:, values.notna().any()]
+        if values.empty:
+            text = df.head(3).to_markdown()
+            return DataPrompt(text=text, tokens=estimate_tokens(text))
+
+        # 报告期从最近的开始; 无法解析日期时保持原顺序
+        dates = self._period_dates(labels)
+        if dates.notna().sum() >= len(dates) / 2:
+            order = list(dates.sort_values(ascending=False, na_position='last').index)
+        else:
+            order = list(df.index)
+        items = self._item_rank(values)
+
+        n_periods = min(self.max_periods, len(order))
+        n_items = len(items)
+        while True:
+            rows = order[:n_periods]
+            text = self._render(values, labels, dates, rows, items[:n_items])
+            tokens = estimate_tokens(text)
+            if tokens <= budget:
+                break
+            # 先按超出比例减少科目(不少于8个或总数的1/4), 再减少报告期, 仍超出时继续减少科目
+            if n_items > max(8, len(items) // 4):
+                n_items = max(8, int(n_items * budget / tokens * 0.95), len(items) // 4)
+            elif n_periods > self.min_periods:
+                n_periods -= 1
+            elif n_items > 1:
+                n_items = max(1, int(n_items * budget / tokens * 0.95))
+            else:
+                break
+
+        return DataPrompt(
+            text=text,
+            tokens=tokens,
+            periods=[str(labels[r]) for r in rows],
+            items=[str(c) for c in items[:n_items]],
+            total_periods=len(order),
+            total_items=len(items),
+        )
+
+
+# 模块导出
+__all__ = ['PromptBuilder', 'DataPrompt', 'estimate_tokens', 'format_number', 'compact_markdown', 'KEY_ITEMS']
@@ -0,0 +1,160 @@
+"""
+请求限速模块
+
+提供基于令牌桶算法的限速器, 按主机分别控制请求速率
+
+主要功能:
+- TokenBucket: 线程安全的令牌桶, 支持突发容量和阻塞等待
+- HostRateLimiter: 按URL主机名维护独立的令牌桶, 可为特定主机单独配置速率
+
+示例用法:
+    from rate_limiter import HostRateLimiter
+
+    limiter = HostRateLimiter(rate=2.0, burst=4)
+    limiter.acquire("https://datacenter.eastmoney.com/api")  # 超速时阻塞等待
+"""
+
+import logging
+import threading
+import time
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """令牌桶"""
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        """初始化令牌桶
+
+        Args:
+            rate: 每秒补充的令牌数
+            capacity: 桶容量(允许的突发请求数), 默认为max(1, rate)
+
+        Raises:
+            ValueError: rate不大于0或capacity小于1时
+        """
+        if rate <= 0:
+            raise ValueError("rate必须大于0")
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        if self.capacity < 1:
+            raise ValueError("capacity必须不小于1")
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self, tokens: float = 1) -> float:
+        """尝试获取令牌
+
+        Returns:
+            0表示获取成功, 否则为需要等待的秒数
+        """
+        with self._lock:
+            self._refill()
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return 0.0
+            return (tokens - self._tokens) / self.rate
+
+    def acquire(self, tokens: float = 1, timeout: Optional[float] = None) -> bool:
+        """获取令牌, 令牌不足时阻塞等待
+
+        Args:
+            tokens: 需要的令牌数
+            timeout: 最长等待时间(秒), None表示一直等待
+
+        Returns:
+            是否在超时前获取到令牌
+
+        Raises:
+            ValueError: tokens超过桶容量(永远无法获取)时
+        """
+        if tokens > self.capacity:
+            raise ValueError(f"请求的令牌数{tokens}超过桶容量{self.capacity}")
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            wait = self.try_acquire(tokens)
+            if wait == 0:
+                return True
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining < wait:
+                    return False
+            time.sleep(wait)
+
+
+class HostRateLimiter:
+    """按主机限速器"""
+
+    def __init__(self,
+                 rate: float = 2.0,
+                 burst: Optional[float] = None,
+                 host_rates: Optional[Dict[str, float]] = None):
+        """初始化限速器
+
+        Args:
+            rate: 每个主机默认的每秒请求数
+            burst: 每个主机允许的突发请求数(默认等于max(1, rate))
+            host_rates: 特定主机的每秒请求数, 如 {"datacenter.eastmoney.com": 5}
+
+        Raises:
+            ValueError: burst小于1时
+        """
+        if burst is not None and burst < 1:
+            raise ValueError("burst必须不小于1")
+        self.rate = rate
+        self.burst = burst
+        self.host_rates = host_rates or {}
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+        self._waited = 0.0
+        self._requests = 0
+
+    def bucket(self, host: str) -> TokenBucket:
+        """获取主机对应的令牌桶(不存在时创建)"""
+        with self._lock:
+            bucket = self._buckets.get(host)
+            if bucket is None:
+                rate = self.host_rates.get(host, self.rate)
+                bucket = TokenBucket(rate, self.burst)
+                self._buckets[host] = bucket
+            return bucket
+
+    def acquire(self, url: str, timeout: Optional[float] = None) -> bool:
+        """在请求url前获取对应主机的令牌
+
+        Args:
+            url: 即将请求的URL
+            timeout: 最长等待时间(秒)
+
+        Returns:
+            是否在超时前获取到令牌
+        """
+        host = urlparse(url).netloc
+        started = time.monotonic()
+        acquired = self.bucket(host).acquire(timeout=timeout)
+        with self._lock:
+            self._requests += 1
+            self._waited += time.monotonic() - started
+        return acquired
+
+    def stats(self) -> Dict[str, float]:
+        """获取限速统计"""
+        with self._lock:
+            return {
+                'hosts': len(self._buckets),
+                'requests': self._requests,
+                'total_wait_seconds': round(self._waited, 3),
+            }
+
+
+# 模块导出
+__all__ = ['TokenBucket', 'HostRateLimiter']
@@ -0,0 +1,178 @@
+"""
+分析报告渲染缓存模块
+
+为/ai_analysis页面缓存报告渲染后的HTML(按文件路径和修改时间判断是否有效)以及各输出目录的
+报告文件列表(按目录的修改时间判断是否有效); 报告保存后在后台线程预先渲染,
+页面访问时只需查表, 无需每次glob目录、读取文件并转换Markdown
+
+示例用法:
+    from report_renderer import ReportRenderer
+
+    renderer = ReportRenderer(max_entries=256)
+    renderer.prerender("output/<task_id>/利润表_analysis.json")   # 保存报告后调用
+    names = renderer.list_reports("output/<task_id>")
+    html = renderer.render("output/<task_id>/利润表_analysis.json")
+"""
+
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Tuple
+
+import markdown
+
+from openai_wrapper import report_markdown
+
+logger = logging.getLogger(__name__)
+
+# Markdown转换使用的扩展
+MARKDOWN_EXTENSIONS = ['extra', 'sane_lists']
+
+
+def is_report(name: str) -> bool:
+    """是否为AI分析报告文件(.md 或结构化的 _analysis.json)"""
+    return name.endswith('.md') or name.endswith('_analysis.json')
+
+
+def file_stamp(path: str) -> Tuple[int, int]:
+    """文件的(修改时间纳秒, 大小), 用于判断渲染结果是否有效
+
+    Raises:
+        OSError: 文件不存在时
+    """
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size
+
+
+class ReportRenderer:
+    """报告HTML和目录列表缓存(LRU), 支持后台预渲染"""
+
+    def __init__(self, max_entries: int = 256, max_dirs: int = 128, workers: int = 1):
+        """初始化渲染缓存
+
+        Args:
+            max_entries: 最多缓存的报告HTML数
+            max_dirs: 最多缓存的目录列表数
+            workers: 后台渲染线程数
+        """
+        self.max_entries = max_entries
+        self.max_dirs = max_dirs
+        self._html: "OrderedDict[str, Tuple[Tuple[int, int], str]]" = OrderedDict()
+        self._dirs: "OrderedDict[str, Tuple[int, List[str]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="report-render")
+        self._hits = 0
+        self._misses = 0
+        self._prerendered = 0
+        self._render_seconds = 0.0
+        self._index_hits = 0
+        self._index_scans = 0
+
+    def list_reports(self, directory: str) -> List[str]:
+        """目录中的报告文件名(按字母排序), 目录修改时间不变时直接返回上次的列表
+
+        新建、删除或重命名文件都会更新目录的修改时间; 目录在最近一秒内修改过时总是重新扫描,
+        避免文件系统时间精度不足时漏掉同一时刻新建的文件; 目录不存在时返回空列表
+        """
+        try:
+            mtime = os.stat(directory).st_mtime_ns
+        except OSError:
+            return []
+        settled = time.time_ns() - mtime > 1_000_000_000
+        with self._lock:
+            entry = self._dirs.get(directory)
+            if settled and entry is not None and entry[0] == mtime:
+                self._dirs.move_to_end(directory)
+                self._index_hits += 1
+                return list(entry[1])
+            self._index_scans += 1
+
+        with os.scandir(directory) as it:
+            names = sorted(e.name for e in it if e.is_file() and is_report(e.name))
+        with self._lock:
+            self._dirs[directory] = (mtime, names)
+            self._dirs.move_to_end(directory)
+            while len(self._dirs) > self.max_dirs:
+                self._dirs.popitem(last=False)
+        return list(names)
+
+    def render(self, path: str) -> str:
+        """获取报告的HTML, 缓存不存在或文件已变化时重新渲染
+
+        Raises:
+            OSError: 文件不存在或无法读取时
+            ValueError: 结构化报告不是有效的JSON时
+        """
+        stamp = file_stamp(path)
+        with self._lock:
+            entry = self._html.get(path)
+            if entry is not None and entry[0] == stamp:
+                self._html.move_to_end(path)
+                self._hits += 1
+                return entry[1]
+            self._misses += 1
+        return self._render(path, stamp)
+
+    def _render(self, path: str, stamp: Tuple[int, int]) -> str:
+        """读取报告并转换为HTML, 写入缓存"""
+        started = time.perf_counter()
+        html = markdown.markdown(report_markdown(path), extensions=MARKDOWN_EXTENSIONS)
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            self._render_seconds += elapsed
+            # 渲染期间文件可能再次变化, 只保留较新的结果
+            current = self._html.get(path)
+            if current is None or current[0] <= stamp:
+                self._html[path] = (stamp, html)
+                self._html.move_to_end(path)
+            while len(self._html) > self.max_entries:
+                self._html.popitem(last=False)
+        return html
+
+    def prerender(self, path: str) -> None:
+        """在后台线程渲染刚保存的报告(失败时只记录日志, 页面访问时会重新尝试)"""
+        self._executor.submit(self._prerender, path)
+
+    def _prerender(self, path: str) -> None:
+        try:
+            stamp = file_stamp(path)
+            with self._lock:
+                entry = self._html.get(path)
+                if entry is not None and entry[0] == stamp:
+                    return
+            self._render(path, stamp)
+            with self._lock:
+                self._prerendered += 1
+        except Exception as e:
+            logger.warning(f"预渲染报告 {path} 失败: {e}")
+
+    def discard(self, directory: str) -> None:
+        """移除目录下所有报告的缓存(任务被删除时调用)"""
+        prefix = os.path.join(directory, '')
+        with self._lock:
+            for path in [p for p in self._html if p.startswith(prefix)]:
+                del self._html[path]
+            self._dirs.pop(directory, None)
+
+    def stats(self) -> Dict[str, Any]:
+        """获取缓存统计"""
+        with self._lock:
+            renders = self._misses + self._prerendered
+            return {
+                'entries': len(self._html),
+                'max_entries': self.max_entries,
+                'hits': self._hits,
+                'misses': self._misses,
+                'prerendered': self._prerendered,
+                'avg_render_ms': round(self._render_seconds / renders * 1000, 2) if renders else None,
+                'dirs': len(self._dirs),
+                'index_hits': self._index_hits,
+                'index_scans': self._index_scans,
+            }
+
+
+# 模块导出
+__all__ = ['ReportRenderer', 'MARKDOWN_EXTENSIONS', 'file_stamp', 'is_report']
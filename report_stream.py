@@ -0,0 +1,168 @@
+"""
+分析报告流式输出模块
+
+AI分析以流式方式生成时, 将模型逐段返回的文本按(任务ID, 报告文件名)缓存在内存中,
+页面通过SSE订阅, 第一段文本生成后即可显示, 无需等待整份报告完成
+
+示例用法:
+    from report_stream import ReportStreams
+
+    streams = ReportStreams()
+    reports = streams.for_task(task_id)
+    reports.open("利润表_analysis.md")
+    reports.write("利润表_analysis.md", "营业收入同比增长...")
+    reports.close("利润表_analysis.md")
+
+    for message in streams.stream(task_id, "利润表_analysis.md"):   # SSE
+        ...
+"""
+
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from sse_utils import format_sse
+
+
+@dataclass
+class _Report:
+    """单份报告的已生成文本"""
+    chunks: List[str] = field(default_factory=list)
+    done: bool = False
+    error: Optional[str] = None
+    started_at: float = field(default_factory=time.monotonic)
+    first_chunk_at: Optional[float] = None
+
+
+class TaskReports:
+    """绑定到单个任务的报告写入接口"""
+
+    def __init__(self, streams: 'ReportStreams', task_id: str):
+        self.streams = streams
+        self.task_id = task_id
+
+    def open(self, report: str) -> None:
+        self.streams.open(self.task_id, report)
+
+    def write(self, report: str, text: str) -> None:
+        self.streams.write(self.task_id, report, text)
+
+    def close(self, report: str, error: Optional[str] = None) -> None:
+        self.streams.close(self.task_id, report, error)
+
+
+class ReportStreams:
+    """按任务和报告缓存流式生成的文本, 并支持阻塞等待新文本"""
+
+    def __init__(self):
+        self._reports: Dict[Tuple[str, str], _Report] = {}
+        self._cond = threading.Condition()
+
+    def for_task(self, task_id: str) -> TaskReports:
+        """获取绑定到任务的写入接口"""
+        return TaskReports(self, task_id)
+
+    def open(self, task_id: str, report: str) -> None:
+        """开始一份报告(已存在时重新开始)"""
+        with self._cond:
+            self._reports[(task_id, report)] = _Report()
+            self._cond.notify_all()
+
+    def write(self, task_id: str, report: str, text: str) -> None:
+        """追加一段文本"""
+        if not text:
+            return
+        with self._cond:
+            entry = self._reports.setdefault((task_id, report), _Report())
+            if entry.first_chunk_at is None:
+                entry.first_chunk_at = time.monotonic()
+            entry.chunks.append(text)
+            self._cond.notify_all()
+
+    def close(self, task_id: str, report: str, error: Optional[str] = None) -> None:
+        """结束一份报告"""
+        with self._cond:
+            entry = self._reports.setdefault((task_id, report), _Report())
+            entry.done = True
+            entry.error = error
+            self._cond.notify_all()
+
+    def is_open(self, task_id: Optional[str], report: Optional[str]) -> bool:
+        """报告是否正在生成"""
+        with self._cond:
+            entry = self._reports.get((task_id, report))
+            return entry is not None and not entry.done
+
+    def reports(self, task_id: str) -> List[str]:
+        """任务已开始的报告列表"""
+        with self._cond:
+            return [report for (tid, report) in self._reports if tid == task_id]
+
+    def wait(self, task_id: str, report: str, after: int = 0,
+             timeout: Optional[float] = None) -> Tuple[List[str], bool, Optional[str]]:
+        """阻塞等待第after段之后的新文本或报告结束
+
+        Returns:
+            (新文本段列表, 报告是否已结束, 错误信息); 报告不存在时视为已结束
+        """
+        def ready() -> bool:
+            entry = self._reports.get((task_id, report))
+            return entry is None or entry.done or len(entry.chunks) > after
+
+        with self._cond:
+            self._cond.wait_for(ready, timeout=timeout)
+            entry = self._reports.get((task_id, report))
+            if entry is None:
+                return [], True, None
+            return entry.chunks[after:], entry.done, entry.error
+
+    def stream(self, task_id: str, report: str, after: int = 0,
+               heartbeat: float = 15.0,
+               max_duration: Optional[float] = 300.0) -> Iterator[str]:
+        """以SSE格式推送报告文本, 报告结束后发送done事件并关闭
+
+        Args:
+            task_id: 任务ID
+            report: 报告文件名
+            after: 已收到的文本段数
+            heartbeat: 无新文本时发送心跳注释的间隔(秒)
+            max_duration: 单次连接的最长时间(秒), 超时后由客户端携带Last-Event-ID重连
+
+        Yields:
+            SSE消息文本
+        """
+        deadline = None if max_duration is None else time.monotonic() + max_duration
+        yield format_sse(retry=1000)
+        while deadline is None or time.monotonic() < deadline:
+            chunks, done, error = self.wait(task_id, report, after, timeout=heartbeat)
+            for text in chunks:
+                after += 1
+                yield format_sse({'text': text}, event='chunk', event_id=after)
+            if done:
+                yield format_sse({'error': error}, event='done')
+                return
+            if not chunks:
+                yield format_sse(comment='heartbeat')
+
+    def discard(self, task_id: str) -> None:
+        """移除任务的全部报告文本"""
+        with self._cond:
+            for key in [key for key in self._reports if key[0] == task_id]:
+                del self._reports[key]
+
+    def stats(self) -> Dict[str, Any]:
+        """获取统计: 报告数、生成中的报告数、缓存的字符数和平均首段延迟"""
+        with self._cond:
+            entries = list(self._reports.values())
+            first = [e.first_chunk_at - e.started_at for e in entries if e.first_chunk_at is not None]
+            return {
+                'reports': len(entries),
+                'streaming': sum(1 for e in entries if not e.done),
+                'chars': sum(len(c) for e in entries for c in e.chunks),
+                'avg_first_chunk_seconds': round(sum(first) / len(first), 3) if first else None,
+            }
+
+
+# 模块导出
+__all__ = ['ReportStreams', 'TaskReports']
@@ -0,0 +1,180 @@
+"""
+结果页缓存模块
+
+为/results页面缓存每个任务的sheet数据、关键指标以及按需计算的
+排序结果和过滤用的行文本, 按task_id和数据文件的修改时间判断是否有效;
+切换数据周期或翻页只需查表, 无需重新读取数据
+
+示例用法:
+    from results_cache import ResultsCache
+
+    cache = ResultsCache(max_entries=32)
+    results = cache.get(task_id, data_path)
+    metrics = results.metrics_for(selected_year)
+    cache.invalidate(task_id)
+"""
+
+import logging
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+import pandas as pd
+
+from sheet_store import data_version, load_sheets
+from sheet_view import SheetQuery, row_text, slice_sheet, sort_order
+
+logger = logging.getLogger(__name__)
+
+# 关键指标卡片数量上限
+MAX_KEY_METRICS = 5
+
+# 结果页主要财务指标sheet
+METRICS_SHEET = "主要财务指标"
+
+
+@dataclass
+class TaskResults:
+    """单个任务的结果页数据"""
+    version: float
+    sheets: Dict[str, pd.DataFrame]
+    available_years: List[Any] = field(default_factory=list)
+    key_metrics: Dict[Any, List[Dict[str, str]]] = field(default_factory=dict)
+    _orders: Dict[Any, Any] = field(default_factory=dict, repr=False)
+    _texts: Dict[str, pd.Series] = field(default_factory=dict, repr=False)
+
+    def resolve_year(self, year: Optional[Any]) -> Optional[Any]:
+        """未选择或选择无效时默认使用最新(最后一列)的数据周期"""
+        if year is not None and year in self.key_metrics:
+            return year
+        return self.available_years[-1] if self.available_years else None
+
+    def metrics_for(self, year: Optional[Any]) -> List[Dict[str, str]]:
+        """获取指定数据周期的关键指标"""
+        return self.key_metrics.get(year, [])
+
+    def query(self, sheet_name: str, query: SheetQuery) -> Dict[str, Any]:
+        """查询sheet的一个窗口, 排序结果和行文本在首次使用后缓存
+
+        Raises:
+            KeyError: sheet或列不存在时
+        """
+        df = self.sheets[sheet_name]
+        order = None
+        if query.sort_by is not None and query.sort_by in map(str, df.columns):
+            key = (sheet_name, query.sort_by, query.ascending)
+            if key not in self._orders:
+                column = next(c for c in df.columns if str(c) == query.sort_by)
+                self._orders[key] = sort_order(df, column, query.ascending)
+            order = self._orders[key]
+        text = None
+        if query.search:
+            if sheet_name not in self._texts:
+                self._texts[sheet_name] = row_text(df)
+            text = self._texts[sheet_name]
+        payload = slice_sheet(df, query, order=order, text=text)
+        payload['sheet'] = sheet_name
+        return payload
+
+
+def _format_value(value: Any) -> str:
+    """格式化指标数值"""
+    try:
+        return f"{float(value):,.2f}" if pd.notna(value) else "N/A"
+    except (ValueError, TypeError):
+        return str(value) if pd.notna(value) else "N/A"
+
+
+def build_task_results(data_path: str) -> TaskResults:
+    """读取数据并预先计算结果页所需的全部内容
+
+    Args:
+        data_path: 列式存储目录或Excel文件路径
+
+    Returns:
+        TaskResults实例
+    """
+    version = data_version(data_path)
+    sheets = load_sheets(data_path)
+    results = TaskResults(version=version, sheets=sheets)
+
+    metrics_df = sheets.get(METRICS_SHEET)
+    if metrics_df is None or metrics_df.empty:
+        return results
+    if len(metrics_df.columns) <= 1:
+        logger.warning("主要财务指标 sheet 没有数据列。")
+        return results
+
+    # 可用年份/时间点是除了第一列（指标名称）之外的所有列
+    results.available_years = metrics_df.columns[1:].tolist()
+    name_column = metrics_df.columns[0]
+    head = metrics_df.head(MAX_KEY_METRICS)
+    for year in results.available_years:
+        results.key_metrics[year] = [
+            {'name': name, 'value': _format_value(value)}
+            for name, value in zip(head[name_column], head[year])
+        ]
+    return results
+
+
+class ResultsCache:
+    """按任务缓存结果页数据(LRU)"""
+
+    def __init__(self, max_entries: int = 32):
+        """初始化缓存
+
+        Args:
+            max_entries: 最多缓存的任务数
+        """
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, TaskResults]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    def get(self, task_id: str, data_path: str) -> TaskResults:
+        """获取任务的结果页数据, 缓存不存在或数据文件已变化时重新构建
+
+        Args:
+            task_id: 任务ID
+            data_path: 任务的数据路径
+
+        Returns:
+            TaskResults实例
+        """
+        version = data_version(data_path)
+        with self._lock:
+            entry = self._entries.get(task_id)
+            if entry is not None and entry.version == version:
+                self._entries.move_to_end(task_id)
+                self._hits += 1
+                return entry
+            self._misses += 1
+
+        entry = build_task_results(data_path)
+        with self._lock:
+            self._entries[task_id] = entry
+            self._entries.move_to_end(task_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return entry
+
+    def invalidate(self, task_id: str) -> None:
+        """移除任务的缓存"""
+        with self._lock:
+            self._entries.pop(task_id, None)
+
+    def stats(self) -> Dict[str, int]:
+        """获取缓存统计"""
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'hits': self._hits,
+                'misses': self._misses,
+            }
+
+
+# 模块导出
+__all__ = ['ResultsCache', 'TaskResults', 'build_task_results']
@@ -0,0 +1,265 @@
+"""
+列式数据存储模块
+
+将处理完成的 {sheet名称: DataFrame} 字典保存为目录形式的列式存储:
+每个sheet一个Feather文件, 另有manifest.json记录sheet顺序、原始列名和编码方式。
+各读取方从该存储加载数据(内存映射), Excel文件仅在需要下载时按需生成
+
+主要功能:
+- save_sheets/load_sheets: 保存和加载sheet字典, 结果与Excel读写往返一致
+- 混合类型的object列按JSON编码保存, 加载时还原
+- load_sheets同时兼容旧的.xlsx文件(一次读取所有sheet)
+- export_workbook: 按需生成Excel, 存储未变化时复用已生成的文件
+
+示例用法:
+    from sheet_store import save_sheets, load_sheets, export_workbook
+
+    save_sheets(sheets, "output/financial_data")
+    sheets = load_sheets("output/financial_data")
+    excel_path = export_workbook("output/financial_data")
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from cache_utils import atomic_write
+
+# pyarrow为可选依赖, 未安装时只能读取Excel文件
+try:
+    import pyarrow as pa
+    from pyarrow import feather
+except ImportError:
+    pa = None
+    feather = None
+
+logger = logging.getLogger(__name__)
+
+# 存储目录名(位于任务输出目录下)
+STORE_NAME = "financial_data"
+MANIFEST_NAME = "manifest.json"
+FORMAT_VERSION = 1
+
+Sheets = Dict[str, pd.DataFrame]
+
+
+def _json_default(value: Any) -> Any:
+    """JSON编码numpy标量等非标准类型"""
+    if hasattr(value, 'item'):
+        return value.item()
+    return str(value)
+
+
+def _encode_column(series: pd.Series) -> Tuple[pd.Series, bool]:
+    """将无法直接存入Arrow的object列编码为JSON字符串
+
+    Returns:
+        (编码后的列, 是否进行了JSON编码)
+    """
+    if series.dtype != object:
+        return series, False
+    values = series[series.notna()]
+    if values.map(type).eq(str).all():
+        return series.where(series.notna(), None), False
+    encoded = series.map(lambda v: None if pd.isna(v) else json.dumps(v, ensure_ascii=False, default=_json_default))
+    return encoded, True
+
+
+def _decode_column(series: pd.Series, json_encoded: bool) -> pd.Series:
+    """还原object列: 缺失值统一为NaN, JSON编码的列逐个解码"""
+    if series.dtype != object:
+        return series
+    if json_encoded:
+        return series.map(lambda v: np.nan if v is None else json.loads(v)).astype(object)
+    return series.where(series.notna(), np.nan)
+
+
+def store_path_for(path: str) -> str:
+    """获取与路径对应的存储目录(xxx.xlsx -> xxx)"""
+    root, ext = os.path.splitext(path)
+    return root if ext.lower() in ('.xlsx', '.xls') else path
+
+
+def is_store(path: str) -> bool:
+    """判断路径是否为列式存储目录"""
+    return os.path.isfile(os.path.join(path, MANIFEST_NAME))
+
+
+def save_sheets(sheets: Sheets, store_dir: str) -> str:
+    """保存sheet字典到列式存储
+
+    先写入新的sheet文件, 最后原子地替换manifest, 读取方不会看到写了一半的存储;
+    上一代sheet文件保留到下一次保存时再删除, 仍持有旧manifest的读取方可以继续加载
+
+    Args:
+        sheets: {sheet名称: DataFrame} 字典
+        store_dir: 存储目录
+
+    Returns:
+        存储目录路径
+
+    Raises:
+        ImportError: 未安装pyarrow时
+    """
+    if pa is None:
+        raise ImportError("列式存储需要安装pyarrow: pip install pyarrow")
+    os.makedirs(store_dir, exist_ok=True)
+    stamp = time.time_ns()
+    try:
+        previous = {entry['file'] for entry in read_manifest(store_dir)['sheets']}
+    except (OSError, ValueError, KeyError):
+        previous = set()
+
+    entries = []
+    for i, (name, df) in enumerate(sheets.items()):
+        frame = {}
+        json_columns = []
+        for pos in range(len(df.columns)):
+            series, encoded = _encode_column(df.iloc[:, pos])
+            frame[str(pos)] = series.reset_index(drop=True)
+            if encoded:
+                json_columns.append(pos)
+        table = pa.Table.from_pandas(pd.DataFrame(frame), preserve_index=False)
+
+        filename = f"sheet_{i}_{stamp}.feather"
+        feather.write_feather(table, os.path.join(store_dir, filename), compression='uncompressed')
+        entries.append({
+            'name': name,
+            'file': filename,
+            'columns': list(df.columns),
+            'rows': len(df),
+            'json_columns': json_columns,
+        })
+
+    manifest = {'version': FORMAT_VERSION, 'created_at': time.time(), 'sheets': entries}
+    atomic_write(os.path.join(store_dir, MANIFEST_NAME),
+                 json.dumps(manifest, ensure_ascii=False, default=_json_default, indent=2).encode('utf-8'))
+
+    # 清理更早的sheet文件, 上一代保留给可能仍在读取旧manifest的读取方
+    current = {entry['file'] for entry in entries} | previous
+    for filename in os.listdir(store_dir):
+        if filename.endswith('.feather') and filename not in current:
+            try:
+                os.remove(os.path.join(store_dir, filename))
+            except OSError:
+                pass
+    logger.info(f"数据已保存到列式存储: {store_dir}")
+    return store_dir
+
+
+def data_version(path: str) -> float:
+    """获取数据的版本(存储manifest或Excel文件的修改时间), 用于缓存失效判断
+
+    Raises:
+        FileNotFoundError: 路径不存在时
+    """
+    store_dir = path if is_store(path) else store_path_for(path)
+    if is_store(store_dir):
+        return os.path.getmtime(os.path.join(store_dir, MANIFEST_NAME))
+    return os.path.getmtime(path)
+
+
+def read_manifest(store_dir: str) -> Dict[str, Any]:
+    """读取存储的manifest"""
+    with open(os.path.join(store_dir, MANIFEST_NAME), 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _load_entry(store_dir: str, entry: Dict[str, Any], memory_map: bool) -> pd.DataFrame:
+    table = feather.read_table(os.path.join(store_dir, entry['file']), memory_map=memory_map)
+    df = table.to_pandas()
+    if len(df.columns) == 0:
+        return pd.DataFrame(index=pd.RangeIndex(entry['rows']), columns=entry['columns'])
+    json_columns = set(entry.get('json_columns', []))
+    for pos in range(len(df.columns)):
+        df.isetitem(pos, _decode_column(df.iloc[:, pos], pos in json_columns))
+    df.columns = entry['columns']
+    return df
+
+
+def read_excel_sheets(source: Any, sheet_names: Optional[List[str]] = None) -> Sheets:
+    """一次性读取Excel文件(路径或文件对象)中的sheet"""
+    return pd.read_excel(source, sheet_name=sheet_names)
+
+
+def load_sheets(path: str,
+                sheet_names: Optional[List[str]] = None,
+                memory_map: bool = True) -> Sheets:
+    """加载sheet字典
+
+    Args:
+        path: 存储目录, 或Excel文件路径(存在对应存储目录时优先读取存储)
+        sheet_names: 只加载指定的sheet, None表示全部
+        memory_map: 是否以内存映射方式读取Feather文件
+
+    Returns:
+        {sheet名称: DataFrame} 字典(保持保存时的sheet顺序)
+
+    Raises:
+        FileNotFoundError: 路径不存在时
+    """
+    store_dir = path if is_store(path) else store_path_for(path)
+    if pa is not None and is_store(store_dir):
+        manifest = read_manifest(store_dir)
+        return {
+            entry['name']: _load_entry(store_dir, entry, memory_map)
+            for entry in manifest['sheets']
+            if sheet_names is None or entry['name'] in sheet_names
+        }
+    if os.path.isfile(path):
+        return read_excel_sheets(path, sheet_names)
+    raise FileNotFoundError(f"未找到数据文件: {path}")
+
+
+def write_workbook(sheets: Sheets, excel_path: str) -> None:
+    """将sheet字典一次性写入Excel文件
+
+    Args:
+        sheets: {sheet名称: DataFrame} 字典
+        excel_path: 输出文件路径
+    """
+    with pd.ExcelWriter(excel_path) as writer:
+        for sheet_name, df in sheets.items():
+            df.to_excel(writer, sheet_name=sheet_name, index=False)
+
+
+def export_workbook(store_dir: str, excel_path: Optional[str] = None) -> str:
+    """由列式存储按需生成Excel文件
+
+    已存在且比manifest新的Excel文件直接复用
+
+    Args:
+        store_dir: 存储目录
+        excel_path: 输出路径(默认为存储目录同名的.xlsx)
+
+    Returns:
+        Excel文件路径
+    """
+    excel_path = excel_path or f"{store_dir}.xlsx"
+    manifest_path = os.path.join(store_dir, MANIFEST_NAME)
+    if os.path.exists(excel_path) and (
+            not os.path.exists(manifest_path) or os.path.getmtime(excel_path) >= os.path.getmtime(manifest_path)):
+        return excel_path
+
+    # 临时文件名区分进程和线程, 同一进程内并发导出时互不覆盖
+    tmp_path = f"{excel_path}.{os.getpid()}.{threading.get_ident()}.tmp.xlsx"
+    try:
+        write_workbook(load_sheets(store_dir), tmp_path)
+        os.replace(tmp_path, excel_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    logger.info(f"已生成Excel文件: {excel_path}")
+    return excel_path
+
+
+# 模块导出
+__all__ = ['STORE_NAME', 'save_sheets', 'load_sheets', 'read_manifest', 'read_excel_sheets',
+           'write_workbook', 'export_workbook', 'store_path_for', 'is_store', 'data_version']
@@ -0,0 +1,147 @@
+"""
+表格分片查询模块
+
+从内存中的sheet数据中取出行/列窗口, 支持按数据周期筛选、按列排序和关键字过滤,
+供结果页按需加载可见区域的数据
+
+示例用法:
+    from sheet_view import SheetQuery, slice_sheet
+
+    query = SheetQuery(offset=0, limit=100, sort_by="营业收入", ascending=False)
+    payload = slice_sheet(df, query)
+"""
+
+import json
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+# 单次请求允许返回的最大行数和列数
+MAX_ROWS = 500
+MAX_COLUMNS = 200
+
+
+@dataclass
+class SheetQuery:
+    """分片查询参数"""
+    offset: int = 0                                     # 起始行
+    limit: int = 100                                    # 行数
+    col_offset: int = 0                                 # 起始列(不含首列)
+    col_limit: Optional[int] = None                     # 列数(不含首列), None表示全部
+    columns: List[str] = field(default_factory=list)    # 指定列(优先于列窗口)
+    periods: List[str] = field(default_factory=list)    # 按首列取值筛选行(如报告期)
+    sort_by: Optional[str] = None                       # 排序列
+    ascending: bool = True
+    search: Optional[str] = None                        # 行内任一单元格包含该关键字
+
+    @classmethod
+    def from_args(cls, args: Dict[str, Any]) -> 'SheetQuery':
+        """由请求参数构建查询, 列表参数使用逗号分隔"""
+        def as_list(name: str) -> List[str]:
+            value = args.get(name) or ''
+            return [item for item in value.split(',') if item]
+
+        def as_int(name: str, default: Optional[int]) -> Optional[int]:
+            value = args.get(name)
+            return int(value) if value not in (None, '') else default
+
+        return cls(
+            offset=max(0, as_int('offset', 0)),
+            limit=min(MAX_ROWS, max(0, as_int('limit', 100))),
+            col_offset=max(0, as_int('col_offset', 0)),
+            col_limit=as_int('col_limit', None),
+            columns=as_list('columns'),
+            periods=as_list('periods'),
+            sort_by=args.get('sort') or None,
+            ascending=(args.get('order') or 'asc').lower() != 'desc',
+            search=args.get('q') or None,
+        )
+
+
+def row_text(df: pd.DataFrame) -> pd.Series:
+    """将每行所有单元格拼接为小写文本(用于关键字过滤)"""
+    if df.empty:
+        return pd.Series([], index=df.index, dtype=object)
+    cells = df.astype(object).where(df.notna(), '').astype(str)
+    return cells.agg('\x1f'.join, axis=1).str.lower()
+
+
+def sort_order(df: pd.DataFrame, column: str, ascending: bool) -> np.ndarray:
+    """按列排序后的行位置(缺失值排在最后, 排序稳定)"""
+    series = df[column]
+    numeric = pd.to_numeric(series, errors='coerce')
+    key = numeric if numeric.notna().sum() >= series.notna().sum() else series.astype(str)
+    return np.asarray(key.reset_index(drop=True).sort_values(
+        ascending=ascending, na_position='last', kind='stable').index)
+
+
+def _json_rows(window: pd.DataFrame) -> List[List[Any]]:
+    """转换为可JSON序列化的行列表(NaN -> null)"""
+    return json.loads(window.to_json(orient='values', date_format='iso', force_ascii=False))
+
+
+def slice_sheet(df: pd.DataFrame,
+                query: SheetQuery,
+                order: Optional[np.ndarray] = None,
+                text: Optional[pd.Series] = None) -> Dict[str, Any]:
+    """按查询参数取出sheet的一个窗口
+
+    Args:
+        df: sheet数据
+        query: 查询参数
+        order: 预先计算的排序行位置(为None时按需计算)
+        text: 预先计算的行文本(为None时按需计算)
+
+    Returns:
+        包含列名、行数据和总行/列数的字典
+
+    Raises:
+        KeyError: 指定的排序列或列不存在时
+    """
+    all_columns = list(df.columns)
+    # 请求参数均为字符串, 按列名的字符串形式匹配
+    names = [str(c) for c in all_columns]
+    if query.columns:
+        missing = [c for c in query.columns if c not in names]
+        if missing:
+            raise KeyError(f"列不存在: {missing}")
+        selected = [c for c, name in zip(all_columns, names) if name in query.columns]
+    else:
+        rest = all_columns[1:]
+        end = None if query.col_limit is None else query.col_offset + min(query.col_limit, MAX_COLUMNS)
+        selected = rest[query.col_offset:end]
+    # 首列(指标名称/报告期)总是返回
+    if all_columns and all_columns[0] not in selected:
+        selected = [all_columns[0]] + selected
+
+    positions = np.arange(len(df))
+    if query.sort_by is not None:
+        if query.sort_by not in names:
+            raise KeyError(f"排序列不存在: {query.sort_by}")
+        if order is None:
+            order = sort_order(df, all_columns[names.index(query.sort_by)], query.ascending)
+        positions = order
+
+    mask = np.ones(len(df), dtype=bool)
+    if query.periods and all_columns:
+        mask &= df.iloc[:, 0].astype(str).isin(query.periods).to_numpy()
+    if query.search:
+        text = text if text is not None else row_text(df)
+        mask &= text.str.contains(query.search.lower(), regex=False).to_numpy()
+    positions = positions[mask[positions]]
+
+    window = positions[query.offset:query.offset + query.limit]
+    column_positions = [all_columns.index(c) for c in selected]
+    return {
+        'columns': [str(c) for c in selected],
+        'rows': _json_rows(df.iloc[window, column_positions]),
+        'offset': query.offset,
+        'total_rows': int(len(positions)),
+        'total_columns': len(all_columns),
+    }
+
+
+# 模块导出
+__all__ = ['SheetQuery', 'slice_sheet', 'sort_order', 'row_text', 'MAX_ROWS']
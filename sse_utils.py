@@ -0,0 +1,71 @@
+"""
+Server-Sent Events 工具模块
+
+生成SSE协议的消息文本, 并解析客户端的续传位置
+
+示例用法:
+    from sse_utils import format_sse, last_event_id
+
+    yield format_sse({'seq': 1, 'message': '...'}, event_id=1)
+    after = last_event_id(request, default=0)
+"""
+
+import json
+from typing import Any, Optional
+
+# SSE响应头: 禁止缓存和代理缓冲, 保证消息及时送达
+SSE_HEADERS = {
+    'Cache-Control': 'no-cache',
+    'X-Accel-Buffering': 'no',
+}
+
+
+def format_sse(data: Any = None,
+               event: Optional[str] = None,
+               event_id: Optional[Any] = None,
+               retry: Optional[int] = None,
+               comment: Optional[str] = None) -> str:
+    """生成一条SSE消息
+
+    Args:
+        data: 消息数据(非字符串时按JSON编码)
+        event: 事件类型
+        event_id: 事件ID(客户端重连时通过Last-Event-ID带回)
+        retry: 建议客户端的重连间隔(毫秒)
+        comment: 注释行(用于心跳)
+
+    Returns:
+        以空行结尾的消息文本
+    """
+    lines = []
+    if comment is not None:
+        lines.append(f": {comment}")
+    if retry is not None:
+        lines.append(f"retry: {retry}")
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    if event is not None:
+        lines.append(f"event: {event}")
+    if data is not None:
+        text = data if isinstance(data, str) else json.dumps(data, ensure_ascii=False, default=str)
+        lines.extend(f"data: {line}" for line in text.split('\n'))
+    return '\n'.join(lines) + '\n\n'
+
+
+def last_event_id(request: Any, default: int = 0, param: str = 'after') -> int:
+    """获取客户端的续传位置: 优先使用重连时的Last-Event-ID请求头, 其次为查询参数
+
+    Args:
+        request: Flask请求对象
+        default: 两者均未提供时的默认值
+        param: 查询参数名
+
+    Raises:
+        ValueError: 参数不是整数时
+    """
+    value = request.headers.get('Last-Event-ID') or request.args.get(param)
+    return int(value) if value not in (None, '') else default
+
+
+# 模块导出
+__all__ = ['format_sse', 'last_event_id', 'SSE_HEADERS']
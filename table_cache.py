@@ -0,0 +1,149 @@
+"""
+表格解析结果缓存模块
+
+提供TableCache类, 以<table>元素HTML的内容哈希为键, 将解析得到的DataFrame
+以Feather列式格式保存在磁盘上; 表格内容未变化时直接加载, 跳过表头识别、
+colspan/rowspan展开和列对齐
+
+主要功能:
+- 内容哈希作为缓存键, 与页面URL无关, 相同表格在不同页面间共享
+- Feather文件以内存映射方式读取
+- 原始列名(可能重复或为空)保存在文件元数据中, 加载后完全还原
+- 缓存目录超过大小上限时按最近访问时间(LRU)淘汰
+
+示例用法:
+    from table_cache import TableCache
+
+    cache = TableCache("cache/tables")
+    key = cache.key(parser.table_html(table))
+    df = cache.get(key)
+    if df is None:
+        df = parser.parse_table(table)
+        cache.put(key, df)
+"""
+
+import json
+import logging
+import os
+import threading
+from typing import Any, Dict, Optional
+
+import pandas as pd
+
+from cache_utils import cache_key, evict_lru, touch
+
+# pyarrow为可选依赖
+try:
+    import pyarrow as pa
+    from pyarrow import feather
+except ImportError:
+    pa = None
+    feather = None
+
+logger = logging.getLogger(__name__)
+
+# 解析结果格式版本, 解析逻辑变化时递增以使旧缓存失效
+FORMAT_VERSION = 1
+
+# 保存原始列名和行数的元数据键
+COLUMNS_METADATA_KEY = b'smart_finance.columns'
+ROWS_METADATA_KEY = b'smart_finance.rows'
+
+
+class TableCache:
+    """表格解析结果缓存"""
+
+    def __init__(self, cache_dir: str = "cache/tables", max_size_bytes: int = 100 * 1024 * 1024):
+        """初始化缓存
+
+        Args:
+            cache_dir: 缓存目录
+            max_size_bytes: 缓存目录的最大总字节数
+
+        Raises:
+            ImportError: 未安装pyarrow时
+        """
+        if pa is None:
+            raise ImportError("表格缓存需要安装pyarrow: pip install pyarrow")
+        self.cache_dir = cache_dir
+        self.max_size_bytes = max_size_bytes
+        os.makedirs(cache_dir, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evicted = 0
+
+    @staticmethod
+    def key(table_html: str) -> str:
+        """根据表格HTML计算缓存键"""
+        return cache_key('table', FORMAT_VERSION, table_html)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.feather")
+
+    def get(self, key: str) -> Optional[pd.DataFrame]:
+        """读取缓存的DataFrame, 不存在或损坏时返回None"""
+        path = self._path(key)
+        try:
+            table = feather.read_table(path, memory_map=True)
+        except (OSError, pa.ArrowInvalid):
+            with self._lock:
+                self._misses += 1
+            return None
+
+        df = table.to_pandas()
+        metadata = table.schema.metadata or {}
+        if COLUMNS_METADATA_KEY in metadata:
+            df.columns = json.loads(metadata[COLUMNS_METADATA_KEY])
+        if len(df.columns) == 0 and ROWS_METADATA_KEY in metadata:
+            # 没有列的表格在Arrow中不保留行数
+            df = pd.DataFrame(index=pd.RangeIndex(int(metadata[ROWS_METADATA_KEY])))
+        touch(path)
+        with self._lock:
+            self._hits += 1
+        return df
+
+    def put(self, key: str, df: pd.DataFrame) -> None:
+        """保存DataFrame
+
+        Feather要求列名唯一且为字符串, 因此按位置命名列, 原始列名和行数写入元数据
+        """
+        frame = df.copy(deep=False)
+        frame.columns = [str(i) for i in range(len(df.columns))]
+        table = pa.Table.from_pandas(frame, preserve_index=False)
+        metadata = dict(table.schema.metadata or {})
+        metadata[COLUMNS_METADATA_KEY] = json.dumps(list(df.columns), ensure_ascii=False).encode('utf-8')
+        metadata[ROWS_METADATA_KEY] = str(len(df)).encode('utf-8')
+        table = table.replace_schema_metadata(metadata)
+
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            feather.write_feather(table, tmp_path, compression='uncompressed')
+            os.replace(tmp_path, path)
+        except (OSError, pa.ArrowException) as e:
+            logger.warning(f"写入表格缓存失败: {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return
+
+        evicted = evict_lru(self.cache_dir, self.max_size_bytes)
+        if evicted:
+            with self._lock:
+                self._evicted += evicted
+
+    def stats(self) -> Dict[str, Any]:
+        """获取缓存统计"""
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                'hits': self._hits,
+                'misses': self._misses,
+                'evicted': self._evicted,
+                'hit_rate': round(self._hits / lookups, 3) if lookups else 0.0,
+            }
+
+
+# 模块导出
+__all__ = ['TableCache']
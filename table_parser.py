@@ -0,0 +1,278 @@
+"""
+表格解析模块
+
+提供可插拔的HTML表格解析后端, 将<table>元素转换为DataFrame
+
+主要功能:
+- BeautifulSoupTableParser: 基于BeautifulSoup的实现, 安装了lxml时使用lxml构建文档树,
+  与LxmlTableParser对省略结束标签等HTML5写法的处理保持一致
+- LxmlTableParser: 基于lxml/XPath的快速实现, 只提取<table>子树中的单元格
+- 两个后端共用同一套表头识别、colspan/rowspan展开和列对齐逻辑,
+  对同一页面产生完全一致的DataFrame
+
+示例用法:
+    from table_parser import get_parser
+
+    parser = get_parser('lxml')
+    tables = parser.parse(html)
+"""
+
+import logging
+from typing import Dict, List, NamedTuple, Optional
+
+import pandas as pd
+from bs4 import BeautifulSoup
+
+# lxml为可选依赖, 未安装时回退到BeautifulSoup
+try:
+    from lxml import html as lxml_html
+except ImportError:
+    lxml_html = None
+
+logger = logging.getLogger(__name__)
+
+# html.parser不会自动闭合省略的</td>/</tr>, 单元格会相互嵌套; 有lxml时使用同一个文档树构建器
+BS4_FEATURES = 'lxml' if lxml_html is not None else 'html.parser'
+
+
+class Cell(NamedTuple):
+    """单元格"""
+    text: str
+    colspan: int
+    rowspan: int
+    is_header: bool
+
+
+class Row(NamedTuple):
+    """表格行"""
+    is_header: bool
+    cells: List[Cell]
+
+
+def expand_rows(rows: List[Row]) -> List[List[str]]:
+    """展开colspan和rowspan, 得到每行的单元格文本
+
+    跨行单元格会在后续行的相同列位置重复出现
+
+    Args:
+        rows: 表格行列表
+
+    Returns:
+        每行展开后的文本列表
+    """
+    pending: Dict[int, list] = {}  # 列位置 -> [文本, 剩余行数]
+    grid = []
+
+    for row in rows:
+        values = []
+
+        def take(col):
+            text, remaining = pending[col]
+            if remaining <= 1:
+                del pending[col]
+            else:
+                pending[col][1] = remaining - 1
+            values.append(text)
+
+        for cell in row.cells:
+            while len(values) in pending:
+                take(len(values))
+            start = len(values)
+            values.extend([cell.text] * cell.colspan)
+            if cell.rowspan > 1:
+                for col in range(start, start + cell.colspan):
+                    pending[col] = [cell.text, cell.rowspan - 1]
+
+        # 行尾的跨行单元格
+        for col in sorted(c for c in pending if c >= len(values)):
+            values.extend([''] * (col - len(values)))
+            take(col)
+        grid.append(values)
+    return grid
+
+
+def build_dataframe(rows: List[Row]) -> pd.DataFrame:
+    """根据表格行构建DataFrame
+
+    - 表头: class包含header的行, 没有时使用第一行
+    - 数据: 所有不含header单元格的非空行, 按表头长度截断或补齐
+
+    Args:
+        rows: 表格行列表
+
+    Returns:
+        表格数据DataFrame
+    """
+    grid = expand_rows(rows)
+
+    # 解析表头 - 处理可能的多级表头
+    header_positions = [i for i, row in enumerate(rows) if row.is_header]
+    if not header_positions and rows:
+        header_positions = [0]
+    headers = []
+    for i in header_positions:
+        headers.extend(grid[i])
+
+    # 解析表格内容 - 自动对齐列数
+    data = []
+    for row, values in zip(rows, grid):
+        if row.cells and not any(cell.is_header for cell in row.cells):
+            if len(values) > len(headers):
+                values = values[:len(headers)]
+            elif len(values) < len(headers):
+                values = values + [''] * (len(headers) - len(values))
+            data.append(values)
+
+    # 创建DataFrame - 处理可能为空的情况
+    if not headers:
+        headers = [f'Column_{i}' for i in range(1, len(data[0])+1)] if data else ['Data']
+    if not data:
+        return pd.DataFrame(columns=headers)
+    return pd.DataFrame(data, columns=headers[:len(data[0])])
+
+
+class TableParser:
+    """表格解析后端基类"""
+
+    name = ''
+
+    def find_tables(self, html: str, table_attrs: Optional[Dict] = None) -> list:
+        """查找页面中的表格元素"""
+        raise NotImplementedError
+
+    def table_rows(self, table) -> List[Row]:
+        """提取表格元素中的所有行"""
+        raise NotImplementedError
+
+    def table_html(self, table) -> str:
+        """获取表格元素的HTML(用于计算解析结果缓存键)"""
+        raise NotImplementedError
+
+    def parse_table(self, table) -> pd.DataFrame:
+        """将单个表格元素解析为DataFrame"""
+        return build_dataframe(self.table_rows(table))
+
+    def parse(self, html: str, table_attrs: Optional[Dict] = None) -> List[pd.DataFrame]:
+        """解析页面中的所有表格
+
+        Args:
+            html: 页面HTML
+            table_attrs: 表格属性字典，用于定位特定表格
+
+        Returns:
+            DataFrame列表
+        """
+        return [self.parse_table(table) for table in self.find_tables(html, table_attrs)]
+
+
+class BeautifulSoupTableParser(TableParser):
+    """BeautifulSoup解析后端"""
+
+    name = 'bs4'
+
+    def find_tables(self, html: str, table_attrs: Optional[Dict] = None) -> list:
+        soup = BeautifulSoup(html, BS4_FEATURES)
+        return soup.find_all('table', attrs=table_attrs) if table_attrs else soup.find_all('table')
+
+    def table_html(self, table) -> str:
+        return str(table)
+
+    def table_rows(self, table) -> List[Row]:
+        rows = []
+        for tr in table.find_all('tr'):
+            cells = [
+                Cell(
+                    cell.get_text(strip=True),
+                    int(cell.get('colspan', 1)),
+                    int(cell.get('rowspan', 1)),
+                    'header' in cell.get('class', [])
+                )
+                for cell in tr.find_all(['td', 'th'])
+            ]
+            rows.append(Row('header' in ' '.join(tr.get('class', [])).lower(), cells))
+        return rows
+
+
+class LxmlTableParser(TableParser):
+    """lxml/XPath解析后端"""
+
+    name = 'lxml'
+
+    # 与BeautifulSoup的get_text一致, 不包含脚本和样式内容
+    TEXT_XPATH = './/text()[not(ancestor::script) and not(ancestor::style) and not(ancestor::template)]'
+
+    def __init__(self):
+        if lxml_html is None:
+            raise ImportError("lxml解析后端需要安装lxml: pip install lxml")
+
+    @staticmethod
+    def _matches(element, table_attrs: Dict) -> bool:
+        """检查元素属性是否满足table_attrs"""
+        for key, expected in table_attrs.items():
+            value = element.get(key)
+            if expected is True:
+                if value is None:
+                    return False
+            elif key == 'class':
+                if value is None or (expected not in value.split() and expected != value):
+                    return False
+            elif value != expected:
+                return False
+        return True
+
+    def find_tables(self, html: str, table_attrs: Optional[Dict] = None) -> list:
+        if not html or not html.strip():
+            return []
+        root = lxml_html.fromstring(html)
+        tables = root.xpath('//table')
+        if table_attrs:
+            tables = [table for table in tables if self._matches(table, table_attrs)]
+        return tables
+
+    def table_html(self, table) -> str:
+        return lxml_html.tostring(table, encoding='unicode')
+
+    def _text(self, element) -> str:
+        return ''.join(text.strip() for text in element.xpath(self.TEXT_XPATH))
+
+    def table_rows(self, table) -> List[Row]:
+        rows = []
+        for tr in table.xpath('.//tr'):
+            cells = [
+                Cell(
+                    self._text(cell),
+                    int(cell.get('colspan', 1)),
+                    int(cell.get('rowspan', 1)),
+                    'header' in (cell.get('class') or '').split()
+                )
+                for cell in tr.xpath('.//td|.//th')
+            ]
+            rows.append(Row('header' in (tr.get('class') or '').lower(), cells))
+        return rows
+
+
+PARSERS = {
+    'bs4': BeautifulSoupTableParser,
+    'lxml': LxmlTableParser,
+}
+
+
+def get_parser(name: str = 'auto') -> TableParser:
+    """获取表格解析后端
+
+    Args:
+        name: 后端名称('lxml', 'bs4'), 'auto'表示优先使用lxml
+
+    Returns:
+        TableParser实例
+    """
+    if name == 'auto':
+        name = 'lxml' if lxml_html is not None else 'bs4'
+    if name not in PARSERS:
+        raise ValueError(f"不支持的解析后端: {name}, 可选: {list(PARSERS)}")
+    return PARSERS[name]()
+
+
+# 模块导出
+__all__ = ['TableParser', 'BeautifulSoupTableParser', 'LxmlTableParser', 'get_parser',
+           'build_dataframe', 'expand_rows']
@@ -4,26 +4,43 @@
 提供TableScraper类用于从网页抓取表格数据并保存为结构化格式(CSV/Excel)
 
 主要功能:
-- 支持快速模式(requests+BeautifulSoup)和JS渲染模式(Selenium)
-- 自动处理多级表头和单元格合并
+- 支持快速模式(requests)、JS渲染模式(Selenium)和API模式(直接请求页面背后的数据接口)
+- 可选的表格解析后端(lxml/BeautifulSoup)
+- 自动处理多级表头和单元格合并(colspan/rowspan)
 - 智能表格数据对齐
 - 支持多表格同时抓取
-- 自动重试机制
+- JS模式使用预热的浏览器驱动池, 支持并行抓取
+- JS模式按表格行数稳定或自定义条件判断数据就绪, 不再固定等待
+- 指数退避+随机抖动的自动重试机制
+- 记录导航、渲染等待、解析各阶段耗时
+- 批量抓取多个证券代码/URL, 按主机限速, 支持断点续跑
+- 快速模式可选的HTTP响应磁盘缓存(TTL + ETag/Last-Modified条件请求)
+- 可选的表格解析结果缓存, 内容未变化的表格直接加载, 跳过解析
 - 完善的日志记录
 
 示例用法:
     from table_scraper import TableScraper
     
-    # 快速模式
-    scraper = TableScraper(mode='fast')
+    # 快速模式, 重复抓取同一页面时使用缓存
+    scraper = TableScraper(mode='fast', response_cache=ResponseCache("cache/http"),
+                           table_cache=TableCache("cache/tables"))
     tables = scraper.scrape_table("https://example.com")
     scraper.save_to_excel(tables, "output/data")
     
-    # JS模式(需要chromedriver)
-    scraper = TableScraper(mode='js', driver_path="chromedriver.exe")
+    # JS模式(需要chromedriver), 最多同时使用3个浏览器
+    scraper = TableScraper(mode='js', driver_path="chromedriver.exe", pool_max_size=3)
     tables = scraper.scrape_table("https://example.com")
     scraper.save_to_csv(tables, "output/data")
     
+    # API模式(东方财富F10页面, 无需浏览器)
+    scraper = TableScraper(mode='api')
+    tables = scraper.scrape_table(build_f10_url("03333"))
+    
+    # 批量抓取, 每完成一家公司即回调处理
+    scraper = TableScraper(mode='api', rate_limiter=HostRateLimiter(rate=2))
+    scraper.scrape_batch(["03333", "00700"], max_workers=4,
+                         progress_file="output/progress.json", on_result=handle)
+    
 注意事项:
 - JS模式需要安装Selenium和对应浏览器驱动
 - 建议使用try-finally确保资源释放
@@ -31,22 +48,41 @@
 
 # HTTP请求库 - 用于发送网络请求
 import requests
-# HTML解析库 - 用于解析网页内容
-from bs4 import BeautifulSoup
+# 表格解析后端 - 用于将网页中的表格解析为DataFrame
+from table_parser import get_parser
+# 连接池与重试配置 - 用于复用HTTP连接
+from requests.adapters import HTTPAdapter
+# 东方财富数据接口 - 用于API模式
+from eastmoney_api import (DATACENTER_URL, REPORT_SPECS, build_f10_url, extract_records,
+                           parse_f10_url, records_to_table, report_params)
 # 数据分析库 - 用于处理表格数据
 import pandas as pd
 # 日志记录库 - 用于记录程序运行日志
 import logging
 # 类型提示 - 用于类型注解
-from typing import List, Dict, Optional, Literal, Union
+from typing import Any, Callable, List, Dict, Optional, Literal, Union
+# 并发执行 - 用于批量抓取
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+# JSON处理 - 用于保存批量抓取进度
+import json
 # 操作系统接口 - 用于文件路径操作
 import os
 # 时间库 - 用于时间相关操作
 import time
-# 浏览器自动化库 - 用于处理需要JavaScript渲染的网页
-from selenium import webdriver
-# Chrome浏览器选项配置 - 用于设置无头模式等参数
-from selenium.webdriver.chrome.options import Options
+# 随机数 - 用于重试退避的随机抖动
+import random
+# 线程库 - 用于按线程记录各阶段耗时
+import threading
+# 上下文变量 - 用于将当前任务上下文(日志归属)传递到抓取线程
+import contextvars
+# 浏览器驱动池 - 用于复用需要JavaScript渲染的网页的浏览器
+from driver_pool import DriverPool
+# 按主机限速 - 用于批量抓取时控制请求频率
+from rate_limiter import HostRateLimiter
+# HTTP响应缓存 - 用于快速模式避免重复下载未变化的页面
+from http_cache import ResponseCache
+# 表格解析结果缓存 - 用于跳过未变化表格的解析
+from table_cache import TableCache
 # 元素定位器 - 提供By.CSS_SELECTOR等定位方式
 from selenium.webdriver.common.by import By
 # 显式等待工具 - 用于等待特定元素加载完成
@@ -64,45 +100,85 @@ logger = logging.getLogger(__name__)
 class TableScraper:
     def __init__(self, 
                  headers: Optional[Dict] = None,
-                 mode: Literal['fast', 'js'] = 'fast',
-                 driver_path: Optional[str] = None):
+                 mode: Literal['fast', 'js', 'api'] = 'fast',
+                 driver_path: Optional[str] = None,
+                 pool_min_size: int = 1,
+                 pool_max_size: int = 2,
+                 max_pages_per_driver: int = 50,
+                 retry_backoff: float = 0.5,
+                 retry_backoff_max: float = 8.0,
+                 parser: Literal['auto', 'lxml', 'bs4'] = 'auto',
+                 api_base_url: str = DATACENTER_URL,
+                 pool_connections: int = 10,
+                 pool_maxsize: int = 20,
+                 rate_limiter: Optional[HostRateLimiter] = None,
+                 response_cache: Optional[ResponseCache] = None,
+                 table_cache: Optional[TableCache] = None):
         """初始化爬虫
         
         Args:
             headers: 请求头字典
-            mode: 爬取模式 ('fast'=快速模式, 'js'=JS渲染模式)
+            mode: 爬取模式 ('fast'=快速模式, 'js'=JS渲染模式, 'api'=数据接口模式)
             driver_path: 浏览器驱动路径(仅JS模式需要)
+            pool_min_size: 预热的最小浏览器数(仅JS模式)
+            pool_max_size: 同时使用的最大浏览器数(仅JS模式)
+            max_pages_per_driver: 单个浏览器处理的页面数达到该值后回收重建(仅JS模式)
+            retry_backoff: 重试退避的初始等待时间(秒)
+            retry_backoff_max: 重试退避的最长等待时间(秒)
+            parser: 表格解析后端('lxml', 'bs4'), 'auto'表示已安装lxml时优先使用lxml
+            api_base_url: 数据接口地址(仅API模式, 可指向本地桩服务进行测试)
+            pool_connections: HTTP连接池缓存的主机数
+            pool_maxsize: 每个主机保持的最大连接数
+            rate_limiter: 按主机限速器, 每次网络请求前获取令牌(默认不限速)
+            response_cache: HTTP响应缓存(仅快速模式, 默认不缓存)
+            table_cache: 表格解析结果缓存(快速模式和JS模式, 默认不缓存)
         """
         self.mode = mode
         self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
         self.headers = headers or {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
         }
+        self.retry_backoff = retry_backoff
+        self.retry_backoff_max = retry_backoff_max
+        self.parser = get_parser(parser)
+        self.api_base_url = api_base_url
+        self.rate_limiter = rate_limiter
+        self.response_cache = response_cache
+        self.table_cache = table_cache
+        self._local = threading.local()
         
         if mode == 'js':
-            from selenium.webdriver.chrome.service import Service
-            options = Options()
-            options.add_argument('--headless')
-            options.add_argument('--disable-gpu')
-            options.add_argument('--no-sandbox')
-            service = Service(executable_path=driver_path)
-            self.driver = webdriver.Chrome(
-                service=service,
-                options=options
+            self.driver_pool = DriverPool(
+                driver_path=driver_path,
+                min_size=pool_min_size,
+                max_size=pool_max_size,
+                max_pages=max_pages_per_driver
             )
 
     def scrape_table(self, 
                    url: str, 
                    table_attrs: Optional[Dict] = None,
                    table_index: Optional[int] = None,
-                   max_retries: int = 3) -> List[pd.DataFrame]:
+                   max_retries: int = 3,
+                   ready_selector: Optional[str] = None,
+                   ready_script: Optional[str] = None,
+                   render_timeout: float = 15) -> List[pd.DataFrame]:
         """从指定URL抓取表格数据
         
+        JS模式默认在页面表格行数连续多次不再变化时认为数据已就绪,
+        也可以通过ready_selector/ready_script指定就绪条件
+        
         Args:
             url: 目标网页URL
             table_attrs: 表格属性字典，用于定位特定表格
             table_index: 表格索引(从0开始)，None表示返回所有表格
-            max_retries: 最大重试次数(仅JS模式)
+            max_retries: 最大重试次数(JS模式和API模式)
+            ready_selector: 出现即表示数据就绪的CSS选择器(仅JS模式)
+            ready_script: 返回真值即表示数据就绪的JS脚本(仅JS模式)
+            render_timeout: 等待数据就绪的超时时间(秒, 仅JS模式)
             
         Returns:
             包含表格数据的DataFrame列表
@@ -117,82 +193,14 @@ class TableScraper:
             if not url.startswith(('http://', 'https://')):
                 raise ValueError("无效的URL格式，必须以http://或https://开头")
                 
-            if self.mode == 'fast':
-                response = self.session.get(url, headers=self.headers)
-                response.raise_for_status()
-                soup = BeautifulSoup(response.text, 'html.parser')
-                tables = soup.find_all('table', attrs=table_attrs) if table_attrs else soup.find_all('table')
-            else:
-                for attempt in range(max_retries):
-                    try:
-                        self.driver.get(url)
-                        # 等待页面完全加载
-                        WebDriverWait(self.driver, 15).until(
-                            lambda d: d.execute_script('return document.readyState') == 'complete')
-                        
-                        # 智能等待表格出现
-                        WebDriverWait(self.driver, 15).until(
-                            EC.presence_of_element_located((By.CSS_SELECTOR, 'table')))
-                            
-                        # 滚动到表格位置确保完全渲染
-                        table = self.driver.find_element(By.CSS_SELECTOR, 'table')
-                        self.driver.execute_script("arguments[0].scrollIntoView(true);", table)
-                        
-                        # 添加额外等待确保数据加载
-                        time.sleep(1)
-                        
-                        html = self.driver.page_source
-                        soup = BeautifulSoup(html, 'html.parser')
-                        tables = soup.find_all('table', attrs=table_attrs) if table_attrs else soup.find_all('table')
-                        break
-                    except Exception as e:
-                        if attempt == max_retries - 1:
-                            raise
-                        logger.warning(f"尝试 {attempt + 1}/{max_retries} 失败: {str(e)}")
-                        time.sleep(2)
+            timings = {'navigation': 0.0, 'render_wait': 0.0, 'parse': 0.0}
+            self._local.timings = timings
             
-            if not tables:
-                raise ValueError("未找到表格元素")
-                
-            results = []
-            for table in tables:
-                # 解析表头 - 处理可能的多级表头
-                headers = []
-                header_rows = table.find_all('tr', class_=lambda x: x and 'header' in x.lower()) or [table.find('tr')]
-                
-                for row in header_rows:
-                    for th in row.find_all(['th', 'td']):
-                        colspan = int(th.get('colspan', 1))
-                        if colspan > 1:
-                            headers.extend([th.get_text(strip=True)] * colspan)
-                        else:
-                            headers.append(th.get_text(strip=True))
-                
-                # 解析表格内容 - 自动对齐列数
-                data = []
-                for row in table.find_all('tr'):
-                    cells = row.find_all(['td', 'th'])
-                    if cells and not any('header' in c.get('class', []) for c in cells):
-                        row_data = []
-                        for cell in cells:
-                            colspan = int(cell.get('colspan', 1))
-                            row_data.extend([cell.get_text(strip=True)] * colspan)
-                        
-                        # 自动对齐列数
-                        if len(row_data) > len(headers):
-                            row_data = row_data[:len(headers)]
-                        elif len(row_data) < len(headers):
-                            row_data.extend([''] * (len(headers) - len(row_data)))
-                        
-                        data.append(row_data)
-                        
-                # 创建DataFrame - 处理可能为空的情况
-                if not headers:
-                    headers = [f'Column_{i}' for i in range(1, len(data[0])+1)] if data else ['Data']
-                
-                df = pd.DataFrame(data, columns=headers[:len(data[0])] if data else pd.DataFrame(columns=headers))
-                results.append(df)
-                logger.info(f"成功抓取表格数据，共{len(df)}行")
+            if self.mode == 'api':
+                results = self._scrape_api(url, max_retries, timings)
+            else:
+                html = self._fetch_html(url, max_retries, ready_selector, ready_script, render_timeout, timings)
+                results = self._parse_html(html, table_attrs, timings)
             
             if table_index is not None:
                 if table_index >= len(results):
@@ -207,10 +215,299 @@ class TableScraper:
             logger.error(f"解析表格时出错: {e}")
             raise
             
+    def _fetch_html(self,
+                    url: str,
+                    max_retries: int,
+                    ready_selector: Optional[str],
+                    ready_script: Optional[str],
+                    render_timeout: float,
+                    timings: Dict[str, float]) -> str:
+        """获取页面HTML(快速模式直接请求, JS模式使用浏览器渲染)"""
+        if self.mode == 'fast':
+            started = time.perf_counter()
+            if self.response_cache is not None:
+                # 缓存命中时不发出请求, 也不占用限速令牌
+                html = self.response_cache.fetch(self.session, url, self.headers, before_request=self._throttle)
+                logger.info(f"HTTP缓存统计: {self.response_cache.stats()}")
+            else:
+                self._throttle(url)
+                response = self.session.get(url, headers=self.headers)
+                response.raise_for_status()
+                html = response.text
+            timings['navigation'] = time.perf_counter() - started
+            return html
+        
+        for attempt in range(max_retries):
+            try:
+                # 从驱动池借出浏览器, 失效的浏览器会在归还时被丢弃
+                with self.driver_pool.driver() as driver:
+                    self._throttle(url)
+                    started = time.perf_counter()
+                    driver.get(url)
+                    timings['navigation'] = time.perf_counter() - started
+                    
+                    # 等待表格数据就绪
+                    started = time.perf_counter()
+                    self._wait_until_ready(driver, ready_selector, ready_script, render_timeout)
+                    timings['render_wait'] = time.perf_counter() - started
+                    
+                    return driver.page_source
+            except Exception as e:
+                if attempt == max_retries - 1:
+                    raise
+                delay = self._backoff_delay(attempt)
+                logger.warning(f"尝试 {attempt + 1}/{max_retries} 失败: {str(e)}，{delay:.2f}秒后重试")
+                time.sleep(delay)
+
+    def _parse_html(self, html: str, table_attrs: Optional[Dict], timings: Dict[str, float]) -> List[pd.DataFrame]:
+        """解析页面中的表格"""
+        started = time.perf_counter()
+        tables = self.parser.find_tables(html, table_attrs)
+        
+        if not tables:
+            raise ValueError("未找到表格元素")
+            
+        results = []
+        for table in tables:
+            df = self._parse_table(table)
+            results.append(df)
+            logger.info(f"成功抓取表格数据，共{len(df)}行")
+        
+        timings['parse'] = time.perf_counter() - started
+        if self.table_cache is not None:
+            logger.info(f"表格缓存统计: {self.table_cache.stats()}")
+        logger.info(
+            f"抓取耗时: 导航{timings['navigation']:.2f}秒, "
+            f"渲染等待{timings['render_wait']:.2f}秒, 解析{timings['parse']:.2f}秒"
+        )
+        return results
+
+    def _parse_table(self, table) -> pd.DataFrame:
+        """解析单个表格, 启用缓存时内容未变化的表格直接从缓存加载"""
+        if self.table_cache is None:
+            return self.parser.parse_table(table)
+        key = self.table_cache.key(self.parser.table_html(table))
+        df = self.table_cache.get(key)
+        if df is None:
+            df = self.parser.parse_table(table)
+            self.table_cache.put(key, df)
+        return df
+
+    def _fetch_json(self, url: str, params: Dict, max_retries: int = 3) -> Dict:
+        """请求数据接口并返回JSON, 失败时按指数退避重试"""
+        for attempt in range(max_retries):
+            try:
+                self._throttle(url)
+                response = self.session.get(url, params=params, headers=self.headers, timeout=15)
+                response.raise_for_status()
+                return response.json()
+            except (requests.RequestException, ValueError) as e:
+                if attempt == max_retries - 1:
+                    raise
+                delay = self._backoff_delay(attempt)
+                logger.warning(f"接口请求 {attempt + 1}/{max_retries} 失败: {str(e)}，{delay:.2f}秒后重试")
+                time.sleep(delay)
+
+    def _scrape_api(self, url: str, max_retries: int, timings: Dict[str, float]) -> List[pd.DataFrame]:
+        """API模式: 将页面URL映射到数据接口, 并将JSON直接转换为表格
+        
+        返回的表格与页面渲染后抓取的表格顺序和结构一致
+        (主要财务指标、资产负债表、利润表、现金流量表)
+        """
+        market, secucode = parse_f10_url(url)
+        results = []
+        for spec in REPORT_SPECS[market]:
+            started = time.perf_counter()
+            payload = self._fetch_json(self.api_base_url, report_params(spec, secucode), max_retries)
+            timings['navigation'] += time.perf_counter() - started
+            
+            started = time.perf_counter()
+            records = extract_records(payload)
+            if not records:
+                raise ValueError(f"数据接口未返回{spec.sheet_name}数据: {secucode}")
+            df = records_to_table(spec, records)
+            timings['parse'] += time.perf_counter() - started
+            results.append(df)
+            logger.info(f"成功获取{spec.sheet_name}数据，共{len(df)}行")
+        
+        logger.info(f"抓取耗时: 接口请求{timings['navigation']:.2f}秒, 解析{timings['parse']:.2f}秒")
+        return results
+
+    def _throttle(self, url: str) -> None:
+        """请求前按主机限速"""
+        if self.rate_limiter is not None:
+            self.rate_limiter.acquire(url)
+
+    @staticmethod
+    def resolve_target(target: str, market: str = 'HK') -> str:
+        """将证券代码转换为F10页面URL, URL原样返回"""
+        if target.startswith(('http://', 'https://')):
+            return target
+        return build_f10_url(target, market)
+
+    @staticmethod
+    def _load_progress(progress_file: Optional[str]) -> Dict[str, Any]:
+        if progress_file and os.path.exists(progress_file):
+            try:
+                with open(progress_file, 'r', encoding='utf-8') as f:
+                    progress = json.load(f)
+                return {'completed': list(progress.get('completed', [])),
+                        'failed': dict(progress.get('failed', {}))}
+            except (OSError, ValueError) as e:
+                logger.warning(f"读取进度文件失败, 将重新开始: {e}")
+        return {'completed': [], 'failed': {}}
+
+    @staticmethod
+    def _save_progress(progress_file: Optional[str], progress: Dict[str, Any]) -> None:
+        """原子地写出进度文件, 中断时不会留下损坏的文件"""
+        if not progress_file:
+            return
+        directory = os.path.dirname(progress_file)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{progress_file}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(progress, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, progress_file)
+
+    def scrape_batch(self,
+                     targets: List[str],
+                     max_workers: int = 4,
+                     progress_file: Optional[str] = None,
+                     on_result: Optional[Callable[[str, List[pd.DataFrame]], Any]] = None,
+                     market: str = 'HK',
+                     **scrape_kwargs) -> Dict[str, Any]:
+        """并发抓取多个证券代码或URL
+        
+        抓取在线程池中并发执行, 每完成一个目标即在调用线程中执行on_result,
+        因此处理(如写入管道)与后续目标的抓取重叠进行; 同时在途的目标数
+        限制为max_workers的2倍, 避免处理较慢时已抓取的表格堆积在内存中。
+        指定progress_file时每个目标完成后写出进度, 重新运行时跳过已完成的目标。
+        
+        Args:
+            targets: 证券代码(如 "03333")或页面URL列表
+            max_workers: 并发抓取线程数(JS模式下实际并发受驱动池大小限制)
+            progress_file: 进度文件路径(JSON), None表示不记录进度
+            on_result: 回调函数, 接收(目标, 表格列表); 抛出异常时该目标记为失败
+            market: 证券代码所属市场
+            **scrape_kwargs: 传递给scrape_table的其他参数
+            
+        Returns:
+            包含 completed(已完成目标)、failed(目标 -> 错误信息)、skipped(跳过的已完成目标) 的字典
+        """
+        progress = self._load_progress(progress_file)
+        done = set(progress['completed'])
+        skipped = [t for t in targets if t in done]
+        pending = [t for t in dict.fromkeys(targets) if t not in done]
+        if skipped:
+            logger.info(f"跳过进度文件中已完成的{len(skipped)}个目标")
+        logger.info(f"开始批量抓取: {len(pending)}个目标, {max_workers}个并发线程")
+        
+        def finish(target: str, error: Optional[str]) -> None:
+            if error is None:
+                progress['completed'].append(target)
+                progress['failed'].pop(target, None)
+            else:
+                progress['failed'][target] = error
+            self._save_progress(progress_file, progress)
+        
+        remaining = iter(pending)
+        in_flight = {}
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="scrape-batch") as executor:
+            def submit_next() -> None:
+                target = next(remaining, None)
+                if target is not None:
+                    # 每个任务复制一份调用方上下文, 抓取线程中的日志仍归属当前任务
+                    future = executor.submit(contextvars.copy_context().run, self.scrape_table,
+                                             self.resolve_target(target, market), **scrape_kwargs)
+                    in_flight[future] = target
+            
+            for _ in range(max_workers * 2):
+                submit_next()
+            while in_flight:
+                finished, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    target = in_flight.pop(future)
+                    submit_next()
+                    try:
+                        tables = future.result()
+                        if on_result is not None:
+                            on_result(target, tables)
+                    except Exception as e:
+                        logger.error(f"批量抓取 {target} 失败: {e}")
+                        finish(target, str(e))
+                    else:
+                        finish(target, None)
+        
+        done = set(progress['completed'])
+        completed = [t for t in pending if t in done]
+        failed = {t: progress['failed'][t] for t in pending if t in progress['failed']}
+        logger.info(f"批量抓取完成: 成功{len(completed)}个, 失败{len(failed)}个, 跳过{len(skipped)}个")
+        return {'completed': completed, 'failed': failed, 'skipped': skipped}
+
+    @property
+    def last_timings(self) -> Dict[str, float]:
+        """当前线程最近一次抓取的各阶段耗时(秒)
+        
+        包含 navigation(页面请求/导航)、render_wait(等待数据就绪)、parse(表格解析)
+        """
+        return dict(getattr(self._local, 'timings', {}))
+
+    def _backoff_delay(self, attempt: int) -> float:
+        """计算第attempt次重试前的等待时间(指数退避, 在上限的50%~100%之间随机抖动)"""
+        delay = min(self.retry_backoff_max, self.retry_backoff * (2 ** attempt))
+        return delay * random.uniform(0.5, 1.0)
+
+    def _wait_until_ready(self,
+                          driver,
+                          ready_selector: Optional[str] = None,
+                          ready_script: Optional[str] = None,
+                          timeout: float = 15,
+                          poll_interval: float = 0.2,
+                          stable_polls: int = 3) -> None:
+        """等待页面表格数据就绪
+        
+        Args:
+            driver: WebDriver实例
+            ready_selector: 出现即表示就绪的CSS选择器
+            ready_script: 返回真值即表示就绪的JS脚本
+            timeout: 超时时间(秒)
+            poll_interval: 轮询间隔(秒)
+            stable_polls: 默认模式下表格行数连续不变的轮询次数
+            
+        Raises:
+            TimeoutException: 超时仍未就绪时
+        """
+        wait = WebDriverWait(driver, timeout, poll_frequency=poll_interval)
+        if ready_script:
+            wait.until(lambda d: d.execute_script(ready_script), "自定义就绪脚本等待超时")
+            return
+        if ready_selector:
+            wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, ready_selector)),
+                       f"等待元素 {ready_selector} 超时")
+            return
+        
+        # 等待表格出现并滚动到表格位置, 触发懒加载
+        table = wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, 'table')), "等待表格出现超时")
+        driver.execute_script("arguments[0].scrollIntoView(true);", table)
+        
+        # 表格总行数连续stable_polls次不变时认为数据加载完成
+        state = {'count': -1, 'stable': 0}
+        
+        def rows_stable(d):
+            count = d.execute_script("return document.querySelectorAll('table tr').length")
+            if count and count == state['count']:
+                state['stable'] += 1
+            else:
+                state['count'], state['stable'] = count, 0
+            return state['stable'] >= stable_polls
+        
+        wait.until(rows_stable, "等待表格数据稳定超时")
+
     def close(self):
-        """关闭浏览器驱动(仅JS模式需要)"""
-        if hasattr(self, 'driver'):
-            self.driver.quit()
+        """关闭浏览器驱动池(仅JS模式需要)"""
+        if hasattr(self, 'driver_pool'):
+            self.driver_pool.close()
 
     def save_to_csv(self, 
                   df: Union[pd.DataFrame, List[pd.DataFrame]], 
@@ -276,5 +573,5 @@ class TableScraper:
             raise
 
 # 模块导出
-__all__ = ['TableScraper']
+__all__ = ['TableScraper', 'build_f10_url']
 
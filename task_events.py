@@ -0,0 +1,194 @@
+"""
+任务事件模块
+
+记录分析任务的阶段变化(爬取、转置、数字转换、数据清洗、AI分析等), 每个事件带有
+进度百分比、任务总耗时和各阶段耗时; 客户端通过长轮询或SSE等待新事件, 无需定时查询状态
+
+示例用法:
+    from task_events import TaskEventBus
+
+    bus = TaskEventBus()
+    bus.publish(task_id, 'scraping', 5, "开始爬取表格数据...")
+    events = bus.wait(task_id, after=0, timeout=25)   # 长轮询
+    for message in bus.stream(task_id):               # SSE
+        ...
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional
+
+from sse_utils import format_sse
+
+logger = logging.getLogger(__name__)
+
+# 任务结束阶段: 推送后SSE连接随之关闭
+TERMINAL_STAGES = frozenset({'completed', 'batch_completed', 'error'})
+
+
+@dataclass
+class _TaskTimeline:
+    """单个任务的事件记录和阶段计时"""
+    started_at: float
+    events: deque
+    stage: Optional[str] = None
+    stage_started_at: float = 0.0
+    durations: Dict[str, float] = field(default_factory=dict)
+    seq: int = 0
+
+
+class TaskEventBus:
+    """任务阶段事件总线"""
+
+    def __init__(self, max_events_per_task: int = 200):
+        """初始化事件总线
+
+        Args:
+            max_events_per_task: 每个任务最多保留的事件数
+        """
+        self.max_events_per_task = max_events_per_task
+        self._tasks: Dict[str, _TaskTimeline] = {}
+        self._cond = threading.Condition()
+
+    def publish(self, task_id: str, stage: str,
+                progress: Optional[float] = None,
+                message: Optional[str] = None,
+                **data: Any) -> Dict[str, Any]:
+        """发布任务事件
+
+        阶段发生变化时结束上一阶段的计时; 同一阶段可多次发布(如逐个sheet的AI分析)
+
+        Args:
+            task_id: 任务ID
+            stage: 阶段名称
+            progress: 进度百分比(0-100), None表示沿用上一事件的进度
+            message: 事件说明
+            **data: 附加数据(如sheet名称)
+
+        Returns:
+            发布的事件
+        """
+        now = time.monotonic()
+        with self._cond:
+            timeline = self._tasks.get(task_id)
+            if timeline is None:
+                timeline = _TaskTimeline(started_at=now, events=deque(maxlen=self.max_events_per_task))
+                self._tasks[task_id] = timeline
+            if stage != timeline.stage:
+                if timeline.stage is not None:
+                    elapsed = now - timeline.stage_started_at
+                    timeline.durations[timeline.stage] = round(
+                        timeline.durations.get(timeline.stage, 0.0) + elapsed, 3)
+                timeline.stage = stage
+                timeline.stage_started_at = now
+            if progress is None:
+                progress = timeline.events[-1]['progress'] if timeline.events else 0
+            timeline.seq += 1
+            event = {
+                'seq': timeline.seq,
+                'task_id': task_id,
+                'stage': stage,
+                'progress': round(min(max(progress, 0), 100), 1),
+                'message': message,
+                'elapsed': round(now - timeline.started_at, 3),
+                'stage_elapsed': round(now - timeline.stage_started_at, 3),
+                'durations': dict(timeline.durations),
+                'time': time.time(),
+                'data': data,
+            }
+            timeline.events.append(event)
+            self._cond.notify_all()
+        return event
+
+    def _snapshot(self, task_id: str, after: int) -> List[Dict[str, Any]]:
+        """在持有锁时取出序号大于after的事件"""
+        timeline = self._tasks.get(task_id)
+        if timeline is None:
+            return []
+        return [e for e in timeline.events if e['seq'] > after]
+
+    def events(self, task_id: str, after: int = 0) -> List[Dict[str, Any]]:
+        """获取任务序号大于after的事件"""
+        with self._cond:
+            return self._snapshot(task_id, after)
+
+    def latest(self, task_id: str) -> Optional[Dict[str, Any]]:
+        """获取任务的最新事件, 附带当前阶段已持续的时间"""
+        with self._cond:
+            timeline = self._tasks.get(task_id)
+            if timeline is None or not timeline.events:
+                return None
+            event = dict(timeline.events[-1])
+            if event['stage'] not in TERMINAL_STAGES:
+                event['stage_elapsed'] = round(time.monotonic() - timeline.stage_started_at, 3)
+            return event
+
+    def has(self, task_id: str) -> bool:
+        """任务是否有事件记录"""
+        with self._cond:
+            return task_id in self._tasks
+
+    def wait(self, task_id: str, after: int = 0, timeout: Optional[float] = None) -> List[Dict[str, Any]]:
+        """阻塞等待任务的新事件(长轮询)
+
+        Args:
+            task_id: 任务ID
+            after: 已收到的最后一个事件序号
+            timeout: 最长等待时间(秒)
+
+        Returns:
+            序号大于after的事件列表, 超时时为空列表
+        """
+        with self._cond:
+            self._cond.wait_for(lambda: bool(self._snapshot(task_id, after)), timeout=timeout)
+            return self._snapshot(task_id, after)
+
+    def stream(self, task_id: str, after: int = 0,
+               heartbeat: float = 15.0,
+               max_duration: Optional[float] = 300.0) -> Iterator[str]:
+        """以SSE格式推送任务事件, 推送结束阶段的事件后关闭
+
+        Args:
+            task_id: 任务ID
+            after: 从该序号之后开始推送
+            heartbeat: 无新事件时发送心跳注释的间隔(秒)
+            max_duration: 单次连接的最长时间(秒), 超时后由客户端携带Last-Event-ID重连
+
+        Yields:
+            SSE消息文本
+        """
+        latest = self.latest(task_id)
+        if latest is not None and latest['stage'] in TERMINAL_STAGES and latest['seq'] <= after:
+            return
+        deadline = None if max_duration is None else time.monotonic() + max_duration
+        yield format_sse(retry=1000)
+        while deadline is None or time.monotonic() < deadline:
+            events = self.wait(task_id, after, timeout=heartbeat)
+            if not events:
+                yield format_sse(comment='heartbeat')
+                continue
+            for event in events:
+                yield format_sse(event, event='stage', event_id=event['seq'])
+                after = event['seq']
+                if event['stage'] in TERMINAL_STAGES:
+                    return
+
+    def discard(self, task_id: str) -> None:
+        """移除任务的事件记录"""
+        with self._cond:
+            self._tasks.pop(task_id, None)
+
+    def stats(self) -> Dict[str, int]:
+        """获取事件总线统计"""
+        with self._cond:
+            return {
+                'tasks': len(self._tasks),
+                'events': sum(len(t.events) for t in self._tasks.values()),
+            }
+
+
+# 模块导出
+__all__ = ['TaskEventBus', 'TERMINAL_STAGES']
@@ -0,0 +1,199 @@
+"""
+后台任务执行模块
+
+提供TaskExecutor类, 以固定数量的工作线程和有界队列执行分析任务
+
+主要功能:
+- 可配置的工作线程数和队列容量
+- 队列已满时拒绝任务(或在超时时间内阻塞等待, 实现背压)
+- 为每个任务分配独立的工作目录, 避免并发任务互相覆盖输出文件
+- 统计队列深度、运行中任务数和排队等待时间
+
+示例用法:
+    from task_executor import TaskExecutor, QueueFullError
+
+    executor = TaskExecutor(max_workers=2, max_queue_size=10)
+    try:
+        executor.submit(task_id, run_task, url)   # run_task(task_id, work_dir, url)
+    except QueueFullError:
+        ...
+"""
+
+import logging
+import os
+import queue
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class QueueFullError(RuntimeError):
+    """任务队列已满, 无法接收新任务"""
+
+
+@dataclass
+class _Job:
+    """队列中的任务"""
+    task_id: str
+    func: Callable
+    args: Tuple
+    kwargs: Dict[str, Any]
+    work_dir: str
+    submitted_at: float = field(default_factory=time.monotonic)
+
+
+class TaskExecutor:
+    """基于有界队列的工作线程池"""
+
+    def __init__(self,
+                 max_workers: int = 2,
+                 max_queue_size: int = 10,
+                 base_dir: str = "output",
+                 block: bool = False,
+                 block_timeout: Optional[float] = None,
+                 name: str = "task-worker"):
+        """初始化执行器并启动工作线程
+
+        Args:
+            max_workers: 工作线程数
+            max_queue_size: 等待队列容量
+            base_dir: 任务工作目录的根目录
+            block: 队列已满时是否阻塞等待(否则立即拒绝)
+            block_timeout: 阻塞等待的最长时间(秒), None表示一直等待
+            name: 工作线程名称前缀
+        """
+        if max_workers < 1:
+            raise ValueError("max_workers必须大于0")
+        self.max_workers = max_workers
+        self.max_queue_size = max_queue_size
+        self.base_dir = base_dir
+        self.block = block
+        self.block_timeout = block_timeout
+
+        self._queue = queue.Queue(maxsize=max_queue_size)
+        self._lock = threading.Lock()
+        self._running = 0
+        self._submitted = 0
+        self._completed = 0
+        self._failed = 0
+        self._rejected = 0
+        self._max_wait = 0.0
+        self._recent_waits = deque(maxlen=100)
+        self._shutdown = False
+
+        self._workers = []
+        for i in range(max_workers):
+            worker = threading.Thread(target=self._worker_loop, name=f"{name}-{i}", daemon=True)
+            worker.start()
+            self._workers.append(worker)
+        logger.info(f"任务执行器已启动: {max_workers}个工作线程, 队列容量{max_queue_size}")
+
+    def work_dir(self, task_id: str) -> str:
+        """获取任务的工作目录路径"""
+        return os.path.join(self.base_dir, task_id)
+
+    def submit(self, task_id: str, func: Callable, *args, **kwargs) -> str:
+        """提交任务
+
+        任务执行时以 func(task_id, work_dir, *args, **kwargs) 的形式调用
+
+        Args:
+            task_id: 任务ID
+            func: 任务函数
+            *args, **kwargs: 传递给任务函数的其他参数
+
+        Returns:
+            任务的工作目录
+
+        Raises:
+            QueueFullError: 队列已满(或阻塞等待超时)时
+            RuntimeError: 执行器已关闭时
+        """
+        if self._shutdown:
+            raise RuntimeError("任务执行器已关闭")
+
+        job = _Job(task_id, func, args, kwargs, self.work_dir(task_id))
+        try:
+            self._queue.put(job, block=self.block, timeout=self.block_timeout)
+        except queue.Full:
+            with self._lock:
+                self._rejected += 1
+            logger.warning(f"任务队列已满({self.max_queue_size}), 拒绝任务 {task_id}")
+            raise QueueFullError("服务器繁忙，请稍后重试")
+
+        with self._lock:
+            self._submitted += 1
+        logger.info(f"任务 {task_id} 已加入队列, 当前排队数: {self._queue.qsize()}")
+        return job.work_dir
+
+    def _worker_loop(self) -> None:
+        """工作线程主循环"""
+        while True:
+            job = self._queue.get()
+            if job is None:
+                self._queue.task_done()
+                break
+
+            wait_time = time.monotonic() - job.submitted_at
+            with self._lock:
+                self._running += 1
+                self._recent_waits.append(wait_time)
+                self._max_wait = max(self._max_wait, wait_time)
+
+            try:
+                os.makedirs(job.work_dir, exist_ok=True)
+                job.func(job.task_id, job.work_dir, *job.args, **job.kwargs)
+                with self._lock:
+                    self._completed += 1
+            except Exception as e:
+                with self._lock:
+                    self._failed += 1
+                logger.error(f"任务 {job.task_id} 执行失败: {e}")
+            finally:
+                with self._lock:
+                    self._running -= 1
+                self._queue.task_done()
+
+    def stats(self) -> Dict[str, Any]:
+        """获取执行器运行指标
+
+        Returns:
+            包含队列深度、运行中任务数、累计计数和排队等待时间的字典
+        """
+        with self._lock:
+            waits = list(self._recent_waits)
+            return {
+                'workers': self.max_workers,
+                'queue_depth': self._queue.qsize(),
+                'max_queue_size': self.max_queue_size,
+                'running': self._running,
+                'submitted': self._submitted,
+                'completed': self._completed,
+                'failed': self._failed,
+                'rejected': self._rejected,
+                'avg_wait_seconds': round(sum(waits) / len(waits), 3) if waits else 0.0,
+                'max_wait_seconds': round(self._max_wait, 3),
+            }
+
+    def shutdown(self, wait: bool = True) -> None:
+        """关闭执行器
+
+        已在队列中的任务会先执行完毕
+
+        Args:
+            wait: 是否等待所有工作线程退出
+        """
+        self._shutdown = True
+        for _ in self._workers:
+            self._queue.put(None)
+        if wait:
+            for worker in self._workers:
+                worker.join()
+
+
+# 模块导出
+__all__ = ['TaskExecutor', 'QueueFullError']
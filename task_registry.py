@@ -0,0 +1,248 @@
+"""
+任务登记模块
+
+记录分析任务的状态和结果, 容量有上限并按最近访问时间淘汰(LRU), 超过TTL未访问的
+已结束任务自动过期; 淘汰时删除任务的输出目录并通知调用方释放相关缓存.
+仍在处理中的任务被移除时先标记为已取消, 等后台线程登记最终结果时再释放
+
+示例用法:
+    from task_registry import TaskRegistry
+
+    registry = TaskRegistry(max_tasks=100, ttl=6 * 3600, on_evict=forget_task)
+    registry.create(task_id, work_dir="output/<task_id>")
+    registry.set_result(task_id, {'status': 'completed', 'data_path': ...})
+    result = registry.result(task_id)
+"""
+
+import logging
+import os
+import shutil
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class TaskRecord:
+    """单个任务的登记信息"""
+    task_id: str
+    work_dir: Optional[str] = None
+    result: Optional[Dict[str, Any]] = None                 # 最近一次登记的结果(可能是中间结果)
+    finished: bool = False                                  # 登记了最终结果后为True
+    cancelled: bool = False                                 # 处理中被移除, 结束后释放
+    created_at: float = field(default_factory=time.time)
+    last_access: float = field(default_factory=time.monotonic)
+    disk_bytes: int = 0
+
+    @property
+    def processing(self) -> bool:
+        """任务是否仍在处理中(包括已有中间结果、后续阶段仍在运行的任务), 处理中的任务不会被淘汰"""
+        return not self.finished
+
+
+def dir_size(path: Optional[str]) -> int:
+    """统计目录下所有文件的总字节数"""
+    total = 0
+    if not path:
+        return total
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return total
+
+
+class TaskRegistry:
+    """有容量上限和过期时间的任务登记表"""
+
+    def __init__(self,
+                 max_tasks: int = 100,
+                 ttl: Optional[float] = 6 * 3600,
+                 cleanup_files: bool = True,
+                 on_evict: Optional[Callable[[str], None]] = None):
+        """初始化登记表
+
+        Args:
+            max_tasks: 最多保留的任务数(处理中的任务不会被淘汰)
+            ttl: 已结束任务最近一次访问后的保留时间(秒), None表示不过期
+            cleanup_files: 淘汰任务时是否删除其输出目录
+            on_evict: 任务被移除后的回调, 接收task_id(用于释放缓存、日志等)
+        """
+        self.max_tasks = max_tasks
+        self.ttl = ttl
+        self.cleanup_files = cleanup_files
+        self.on_evict = on_evict
+        self._tasks: "OrderedDict[str, TaskRecord]" = OrderedDict()
+        # 处理中被移除的任务 -> (登记信息, 结束后是否删除输出目录)
+        self._cancelled: Dict[str, Tuple[TaskRecord, bool]] = {}
+        self._lock = threading.Lock()
+        self._evicted = 0
+        self._expired = 0
+
+    def _is_expired(self, record: TaskRecord, now: float) -> bool:
+        return self.ttl is not None and not record.processing and now - record.last_access > self.ttl
+
+    def _collect(self) -> List[TaskRecord]:
+        """在持有锁时取出过期任务和超出容量的最久未访问任务"""
+        now = time.monotonic()
+        removed = []
+        for task_id, record in list(self._tasks.items()):
+            if self._is_expired(record, now):
+                removed.append(self._tasks.pop(task_id))
+                self._expired += 1
+        for task_id, record in list(self._tasks.items()):
+            if len(self._tasks) <= self.max_tasks:
+                break
+            if not record.processing:
+                removed.append(self._tasks.pop(task_id))
+                self._evicted += 1
+        return removed
+
+    def _release(self, records: List[TaskRecord], cleanup: bool = True) -> None:
+        """删除任务输出目录并通知回调(在锁外执行)"""
+        for record in records:
+            if cleanup and self.cleanup_files and record.work_dir:
+                shutil.rmtree(record.work_dir, ignore_errors=True)
+            if self.on_evict is not None:
+                try:
+                    self.on_evict(record.task_id)
+                except Exception as e:
+                    logger.warning(f"释放任务 {record.task_id} 的资源失败: {e}")
+            logger.info(f"任务 {record.task_id} 已移除")
+
+    def create(self, task_id: str, work_dir: Optional[str] = None) -> TaskRecord:
+        """登记新任务(处理中), 必要时淘汰过期和最久未访问的已结束任务"""
+        record = TaskRecord(task_id=task_id, work_dir=work_dir)
+        with self._lock:
+            self._tasks[task_id] = record
+            removed = self._collect()
+        self._release(removed)
+        return record
+
+    def set_result(self, task_id: str, result: Dict[str, Any], finished: bool = True) -> bool:
+        """记录任务结果并更新输出目录大小
+
+        已取消的任务不再登记结果; 登记其最终结果时释放任务(删除输出目录并通知回调)
+
+        Args:
+            task_id: 任务ID
+            result: 任务结果
+            finished: 是否为最终结果; 中间结果(如转置完成后AI分析仍在运行)为False,
+                任务在登记最终结果之前不会被淘汰或过期
+
+        Returns:
+            任务是否仍在登记表中(已被重置的任务不会重新登记, 调用方不应再发布该任务的事件)
+        """
+        with self._lock:
+            record = self._tasks.get(task_id)
+            if record is None and task_id in self._cancelled:
+                record = self._cancelled[task_id][0]
+        if record is None:
+            return False
+        size = dir_size(record.work_dir)
+        with self._lock:
+            if record.cancelled:
+                cancelled = self._cancelled.pop(task_id, None) if finished else None
+            else:
+                cancelled = None
+                record.result = result
+                record.finished = finished
+                record.disk_bytes = size
+                record.last_access = time.monotonic()
+        if cancelled is not None:
+            self._release([cancelled[0]], cleanup=cancelled[1])
+        return not record.cancelled
+
+    def cancelled(self, task_id: str) -> bool:
+        """任务是否在处理中被移除(后台线程可据此提前结束, 并登记最终结果以释放任务)"""
+        with self._lock:
+            return task_id in self._cancelled
+
+    def get(self, task_id: Optional[str]) -> Optional[TaskRecord]:
+        """获取任务登记信息并刷新最近访问时间, 已过期的任务被移除并返回None"""
+        if not task_id:
+            return None
+        expired = None
+        with self._lock:
+            record = self._tasks.get(task_id)
+            if record is not None and self._is_expired(record, time.monotonic()):
+                expired = self._tasks.pop(task_id)
+                self._expired += 1
+                record = None
+            elif record is not None:
+                record.last_access = time.monotonic()
+                self._tasks.move_to_end(task_id)
+        if expired is not None:
+            self._release([expired])
+        return record
+
+    def result(self, task_id: Optional[str]) -> Optional[Dict[str, Any]]:
+        """获取任务结果(可能是中间结果), 任务不存在或尚无结果时返回None"""
+        record = self.get(task_id)
+        return record.result if record is not None else None
+
+    def __contains__(self, task_id: Optional[str]) -> bool:
+        return self.get(task_id) is not None
+
+    def remove(self, task_id: str, cleanup: bool = True) -> bool:
+        """移除任务
+
+        Args:
+            task_id: 任务ID
+            cleanup: 是否删除任务的输出目录
+
+        处理中的任务先标记为已取消, 后台线程登记最终结果时再删除输出目录并通知回调,
+        避免仍在运行的任务重新创建已删除的目录、事件和报告流
+
+        Returns:
+            任务是否存在
+        """
+        with self._lock:
+            record = self._tasks.pop(task_id, None)
+            if record is not None and record.processing:
+                record.cancelled = True
+                self._cancelled[task_id] = (record, cleanup)
+        if record is None:
+            return False
+        if record.cancelled:
+            logger.info(f"任务 {task_id} 仍在处理中, 结束后释放")
+        else:
+            self._release([record], cleanup=cleanup)
+        return True
+
+    def purge(self) -> int:
+        """移除所有过期任务和超出容量的任务
+
+        Returns:
+            移除的任务数
+        """
+        with self._lock:
+            removed = self._collect()
+        self._release(removed)
+        return len(removed)
+
+    def stats(self) -> Dict[str, Any]:
+        """获取登记表统计(会先清理过期任务)"""
+        self.purge()
+        with self._lock:
+            records = list(self._tasks.values())
+            return {
+                'tasks': len(records),
+                'processing': sum(1 for r in records if r.processing),
+                'cancelled': len(self._cancelled),
+                'max_tasks': self.max_tasks,
+                'ttl_seconds': self.ttl,
+                'disk_bytes': sum(r.disk_bytes for r in records),
+                'evicted': self._evicted,
+                'expired': self._expired,
+            }
+
+
+# 模块导出
+__all__ = ['TaskRegistry', 'TaskRecord', 'dir_size']
@@ -0,0 +1,51 @@
+"""异常值处理和标准化测试"""
+
+import warnings
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from data_cleaner import handle_outliers, normalize_data
+
+
+@pytest.fixture
+def frame():
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({
+        'steady': rng.integers(0, 100, 50),
+        'constant': np.full(50, 7),
+        'ratio': rng.normal(size=50),
+        'name': ['x'] * 50,
+        'spiky': rng.integers(0, 10, 50),
+    })
+    df.loc[0, 'spiky'] = 10000
+    return df
+
+
+def test_clip_keeps_int_columns_without_outliers(frame):
+    result = handle_outliers(frame, method='clip')
+    assert result['steady'].dtype == np.int64
+    assert result['constant'].dtype == np.int64
+    assert result['spiky'].dtype == np.float64
+    assert result['spiky'].max() < 10000
+    pd.testing.assert_series_equal(result['steady'], frame['steady'])
+
+
+def test_normalize_keeps_constant_int_columns(frame):
+    for method in ('minmax', 'zscore'):
+        result = normalize_data(frame, method=method)
+        assert result['constant'].dtype == np.int64
+        assert (result['constant'] == 7).all()
+        assert result['steady'].dtype == np.float64
+
+
+def test_empty_frame_is_returned_unchanged_without_warnings(frame):
+    empty = frame.iloc[:0]
+    with warnings.catch_warnings():
+        warnings.simplefilter('error', RuntimeWarning)
+        results = [handle_outliers(empty, method='clip'), handle_outliers(empty, method='remove'),
+                   normalize_data(empty, method='minmax'), normalize_data(empty, method='zscore')]
+    for result in results:
+        assert result.shape == empty.shape
+        assert result.dtypes.tolist() == empty.dtypes.tolist()
@@ -0,0 +1,112 @@
+"""API模式端到端测试
+
+本地桩服务按reportName返回录制的数据中心JSON(tests/fixtures/eastmoney), 同时提供同一公司
+F10页面渲染后的表格快照; API模式与快速模式(解析页面HTML)的结果经过同一处理管道后应一致
+"""
+
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pandas as pd
+import pytest
+
+from eastmoney_api import REPORT_SPECS, parse_f10_url
+from pipeline import build_financial_pipeline, tables_to_sheets
+from table_scraper import TableScraper
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'eastmoney')
+API_PATH = '/securities/api/data/v1/get'
+SECUCODE = '00700.HK'
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """数据中心接口和F10页面的桩服务"""
+
+    requests_seen = []
+
+    def do_GET(self):
+        parsed = urlparse(self.path)
+        if parsed.path == API_PATH:
+            query = parse_qs(parsed.query)
+            self.requests_seen.append(query)
+            path = os.path.join(FIXTURES, f"{query['reportName'][0]}.json")
+            if query.get('filter') != [f'(SECUCODE="{SECUCODE}")'] or not os.path.exists(path):
+                return self._send(404, b'{}', 'application/json')
+            content_type = 'application/json'
+        else:
+            path = os.path.join(FIXTURES, 'f10_00700.html')
+            content_type = 'text/html; charset=utf-8'
+        with open(path, 'rb') as f:
+            self._send(200, f.read(), content_type)
+
+    def _send(self, status, body, content_type):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture(scope='module')
+def stub_server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f'http://127.0.0.1:{server.server_port}'
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture(scope='module')
+def page_url(stub_server):
+    return f'{stub_server}/PC_HKF10/pages/home/index.html?code=00700&type=web&color=w#/newfinancialanalysis'
+
+
+@pytest.fixture(scope='module')
+def api_tables(stub_server, page_url):
+    scraper = TableScraper(mode='api', api_base_url=stub_server + API_PATH)
+    try:
+        return scraper.scrape_table(page_url)
+    finally:
+        scraper.close()
+
+
+@pytest.fixture(scope='module')
+def page_tables(page_url):
+    scraper = TableScraper(mode='fast')
+    try:
+        return scraper.scrape_table(page_url)
+    finally:
+        scraper.close()
+
+
+def test_parse_f10_url(page_url):
+    assert parse_f10_url(page_url) == ('HK', SECUCODE)
+
+
+def test_api_mode_requests_every_report(api_tables):
+    requested = [q['reportName'][0] for q in StubHandler.requests_seen]
+    assert requested == [spec.report_name for spec in REPORT_SPECS['HK']]
+    assert len(api_tables) == len(REPORT_SPECS['HK'])
+
+
+def test_api_tables_match_page_layout(api_tables, page_tables):
+    assert len(api_tables) == len(page_tables)
+    for api_df, page_df in zip(api_tables, page_tables):
+        assert api_df.columns.tolist() == page_df.columns.tolist()
+        assert api_df.iloc[:, 0].tolist() == page_df.iloc[:, 0].tolist()
+
+
+def test_api_mode_matches_html_path(api_tables, page_tables):
+    pipeline = build_financial_pipeline()
+    api_sheets = pipeline.run(tables_to_sheets(api_tables))
+    page_sheets = pipeline.run(tables_to_sheets(page_tables))
+    assert list(api_sheets) == list(page_sheets)
+    for name, page_df in page_sheets.items():
+        # 页面上的金额以"亿"/"万"为单位保留两位小数
+        pd.testing.assert_frame_equal(api_sheets[name], page_df, check_dtype=False, rtol=1e-4)
@@ -0,0 +1,173 @@
+"""LLMClient重试和熔断测试
+
+本地OpenAI兼容模拟服务按预设的状态码序列响应/chat/completions, 用完后返回正常结果
+"""
+
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import openai
+import pytest
+
+from llm_client import CircuitBreaker, CircuitOpenError, LLMClient
+
+MESSAGES = [{'role': 'user', 'content': '分析营业收入'}]
+USAGE = {'prompt_tokens': 30, 'completion_tokens': 12, 'total_tokens': 42}
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    """OpenAI兼容的聊天补全模拟接口"""
+
+    protocol_version = 'HTTP/1.1'
+    statuses = []     # 接下来依次返回的状态码
+    requests = 0
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers['Content-Length']))
+        cls = type(self)
+        cls.requests += 1
+        status = cls.statuses.pop(0) if cls.statuses else 200
+        if status == 200:
+            body = {
+                'id': 'chatcmpl-1', 'object': 'chat.completion', 'created': 0, 'model': 'mock',
+                'choices': [{'index': 0, 'message': {'role': 'assistant', 'content': 'ok'},
+                             'finish_reason': 'stop'}],
+                'usage': USAGE,
+            }
+        else:
+            body = {'error': {'message': f'mock error {status}', 'type': 'mock'}}
+        data = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        if status == 429:
+            self.send_header('Retry-After', '0.3')
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture(scope='module')
+def base_url():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), MockHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f'http://127.0.0.1:{server.server_port}/v1'
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture(autouse=True)
+def reset_mock():
+    MockHandler.statuses = []
+    MockHandler.requests = 0
+
+
+def make_client(base_url, max_retries=3, failure_threshold=5, reset_timeout=30.0):
+    return LLMClient('test-key', base_url=base_url, max_retries=max_retries, retry_backoff=0.01,
+                     breaker=CircuitBreaker(failure_threshold=failure_threshold, reset_timeout=reset_timeout))
+
+
+def test_429_waits_for_retry_after(base_url):
+    client = make_client(base_url)
+    MockHandler.statuses = [429]
+    started = time.monotonic()
+    result = client.complete(MESSAGES, model='mock')
+    assert result.content == 'ok'
+    assert result.record.attempts == 2
+    assert time.monotonic() - started >= 0.3
+    assert result.usage['total_tokens'] == 42
+
+
+def test_5xx_is_retried(base_url):
+    client = make_client(base_url)
+    MockHandler.statuses = [500, 503]
+    result = client.complete(MESSAGES, model='mock')
+    assert result.content == 'ok'
+    assert result.record.attempts == 3
+    assert client.stats()['retries'] == 2
+    assert client.breaker.state == CircuitBreaker.CLOSED
+
+
+def test_4xx_is_not_retried(base_url):
+    client = make_client(base_url)
+    MockHandler.statuses = [400]
+    with pytest.raises(openai.BadRequestError):
+        client.complete(MESSAGES, model='mock')
+    assert MockHandler.requests == 1
+
+
+def test_breaker_opens_half_opens_and_closes(base_url):
+    client = make_client(base_url, max_retries=0, failure_threshold=2, reset_timeout=0.2)
+    MockHandler.statuses = [500, 500]
+    for _ in range(2):
+        with pytest.raises(openai.InternalServerError):
+            client.complete(MESSAGES, model='mock')
+    assert client.breaker.state == CircuitBreaker.OPEN
+
+    with pytest.raises(CircuitOpenError):
+        client.complete(MESSAGES, model='mock')
+    assert MockHandler.requests == 2
+
+    time.sleep(0.25)
+    assert client.breaker.state == CircuitBreaker.HALF_OPEN
+    assert client.complete(MESSAGES, model='mock').content == 'ok'
+    assert client.breaker.state == CircuitBreaker.CLOSED
+
+
+def test_failed_probe_reopens_breaker(base_url):
+    client = make_client(base_url, max_retries=0, failure_threshold=1, reset_timeout=0.2)
+    MockHandler.statuses = [500, 502]
+    with pytest.raises(openai.InternalServerError):
+        client.complete(MESSAGES, model='mock')
+    time.sleep(0.25)
+    with pytest.raises(openai.InternalServerError):
+        client.complete(MESSAGES, model='mock')
+    assert client.breaker.state == CircuitBreaker.OPEN
+    assert client.breaker.stats()['opened'] == 2
+
+
+def test_non_retryable_probe_closes_breaker(base_url):
+    client = make_client(base_url, max_retries=0, failure_threshold=2, reset_timeout=0.2)
+    MockHandler.statuses = [500, 500, 400]
+    for _ in range(2):
+        with pytest.raises(openai.InternalServerError):
+            client.complete(MESSAGES, model='mock')
+    time.sleep(0.25)
+    # 试探请求得到400: 接口可用, 熔断器应恢复而不是一直停留在试探中
+    with pytest.raises(openai.BadRequestError):
+        client.complete(MESSAGES, model='mock')
+    assert client.breaker.state == CircuitBreaker.CLOSED
+    assert client.complete(MESSAGES, model='mock').content == 'ok'
+
+
+def test_non_retryable_probe_closes_breaker_async(base_url):
+    client = make_client(base_url, max_retries=0, failure_threshold=1, reset_timeout=0.2)
+    MockHandler.statuses = [500, 422]
+
+    async def run():
+        with pytest.raises(openai.InternalServerError):
+            await client.acomplete(MESSAGES, model='mock')
+        await asyncio.sleep(0.25)
+        with pytest.raises(openai.UnprocessableEntityError):
+            await client.acomplete(MESSAGES, model='mock')
+        result = await client.acomplete(MESSAGES, model='mock')
+        await client.aclose()
+        return result
+
+    assert asyncio.run(run()).content == 'ok'
+    assert client.breaker.state == CircuitBreaker.CLOSED
+
+
+def test_cancelled_probe_releases_breaker():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.0)
+    breaker.record_failure()
+    assert breaker.allow()
+    assert not breaker.allow()
+    breaker.release()
+    assert breaker.allow()
@@ -0,0 +1,94 @@
+"""AI分析报告写入和合并分析测试"""
+
+import json
+import os
+
+import pandas as pd
+import pytest
+
+from openai_wrapper import PACK_MAX_OUTPUT_TOKENS, PACK_REPORT_TOKENS, DataAnalyzer
+
+
+class StreamingClient:
+    """按给定片段流式返回的假客户端, fail_after不为None时在输出该数量的片段后抛出异常"""
+
+    def __init__(self, chunks, fail_after=None):
+        self.chunks = chunks
+        self.fail_after = fail_after
+
+    def chat_completion(self, messages, stream=False, **kwargs):
+        def generate():
+            for i, chunk in enumerate(self.chunks):
+                if i == self.fail_after:
+                    raise ConnectionError("stream interrupted")
+                yield chunk
+        return generate() if stream else "".join(self.chunks)
+
+
+@pytest.fixture
+def sheet():
+    return pd.DataFrame({'截止日期': ['24/12/31', '23/12/31'], '营业收入': [120.0, 100.0]})
+
+
+def test_stream_failure_leaves_no_report(tmp_path, sheet):
+    saved = []
+    analyzer = DataAnalyzer(StreamingClient(['## 概况\n', '收入增长', '20%'], fail_after=2),
+                            on_report_saved=saved.append)
+    received = []
+    output = tmp_path / '利润表_analysis.md'
+
+    with pytest.raises(ConnectionError):
+        analyzer.analyze(sheet, output_md=str(output), on_chunk=received.append)
+
+    assert received == ['## 概况\n', '收入增长']
+    assert os.listdir(tmp_path) == []
+    assert saved == []
+
+
+def test_stream_success_writes_complete_report(tmp_path, sheet):
+    saved = []
+    analyzer = DataAnalyzer(StreamingClient(['## 概况\n', '收入增长20%']), on_report_saved=saved.append)
+    output = tmp_path / '利润表_analysis.md'
+
+    analyzer.analyze(sheet, output_md=str(output), on_chunk=lambda text: None)
+
+    assert os.listdir(tmp_path) == [output.name]
+    assert output.read_text(encoding='utf-8') == "# 数据分析报告\n\n## 摘要\n## 概况\n收入增长20%\n\n"
+    assert saved == [str(output)]
+
+
+class RecordingClient:
+    """记录请求参数, 按请求中的sheet名称返回合并分析的JSON"""
+
+    def __init__(self):
+        self.calls = []
+
+    def chat_completion(self, messages, **kwargs):
+        self.calls.append((messages, kwargs))
+        names = [line[4:-4] for line in messages[1]['content'].splitlines() if line.startswith('=== ')]
+        return json.dumps({'reports': {name: f'{name}分析' for name in names}}, ensure_ascii=False)
+
+
+def test_plan_packs_respects_output_budget(sheet):
+    analyzer = DataAnalyzer(RecordingClient())
+    sheets = {f'表{i}': sheet for i in range(12)}
+    groups = analyzer.plan_packs(sheets, token_budget=10 ** 6)
+    max_sheets = PACK_MAX_OUTPUT_TOKENS // PACK_REPORT_TOKENS
+    assert sorted(sum(groups, [])) == sorted(sheets)
+    assert all(len(names) <= max_sheets for names in groups)
+
+
+def test_packed_request_keeps_task_prompts(sheet):
+    client = RecordingClient()
+    analyzer = DataAnalyzer(client)
+    results = analyzer.analyze_packed({
+        '利润表': (sheet, 'income_statement'),
+        '现金流量表': (sheet, 'cash_flow'),
+    })
+
+    assert {name: r.summary for name, r in results.items()} == {'利润表': '利润表分析', '现金流量表': '现金流量表分析'}
+    messages, kwargs = client.calls[0]
+    system = messages[0]['content']
+    assert analyzer._get_system_prompt('income_statement') in system
+    assert analyzer._get_system_prompt('cash_flow') in system
+    assert kwargs['max_tokens'] == PACK_MAX_OUTPUT_TOKENS
@@ -0,0 +1,25 @@
+"""令牌桶限速测试"""
+
+import pytest
+
+from rate_limiter import HostRateLimiter, TokenBucket
+
+
+def test_capacity_below_one_is_rejected():
+    with pytest.raises(ValueError):
+        TokenBucket(rate=1.0, capacity=0.5)
+    with pytest.raises(ValueError):
+        HostRateLimiter(rate=2.0, burst=0.5)
+
+
+def test_acquire_more_than_capacity_raises_instead_of_waiting():
+    bucket = TokenBucket(rate=1.0, capacity=2)
+    with pytest.raises(ValueError):
+        bucket.acquire(tokens=3)
+
+
+def test_acquire_within_capacity():
+    bucket = TokenBucket(rate=100.0, capacity=2)
+    assert bucket.acquire(tokens=2)
+    assert bucket.acquire(timeout=1.0)
+    assert not bucket.acquire(tokens=2, timeout=0.001)
@@ -0,0 +1,50 @@
+"""表格解析后端一致性测试: bs4与lxml后端对同一页面应得到相同的DataFrame"""
+
+import pytest
+
+from table_parser import BeautifulSoupTableParser, get_parser, lxml_html
+
+pytestmark = pytest.mark.skipif(lxml_html is None, reason="需要安装lxml")
+
+CASES = {
+    # HTML5允许省略</td>/</tr>
+    'omitted_end_tags': (
+        "<table><tr><th>项目<th>2023<th>2022"
+        "<tr><td>营业收入<td>100<td>90"
+        "<tr><td>净利润<td>10<td>8</table>"
+    ),
+    'rowspan_colspan': (
+        "<table><tr class='header'><th colspan=2>项目</th><th rowspan=2>2023</th></tr>"
+        "<tr><th>一级</th><th>二级</th></tr>"
+        "<tr><td rowspan=2>利润</td><td>营业利润</td><td>5</td></tr>"
+        "<tr><td>净利润</td><td>4</td></tr></table>"
+    ),
+    'nested_tables': (
+        "<table><tr><th>项目</th><th>明细</th></tr>"
+        "<tr><td>资产</td><td><table><tr><td>现金</td><td>1</td></tr></table></td></tr></table>"
+    ),
+    'comments': (
+        "<table><!-- 表头 --><tr><th>项目<!-- 注释 --></th><th>2023</th></tr>"
+        "<tr><td>收入<!--x--></td><td><script>var a = 1;</script>100</td></tr></table>"
+    ),
+}
+
+
+@pytest.mark.parametrize('html', list(CASES.values()), ids=list(CASES))
+def test_backends_agree(html):
+    expected = get_parser('lxml').parse(html)
+    actual = get_parser('bs4').parse(html)
+    assert len(actual) == len(expected)
+    for left, right in zip(actual, expected):
+        assert left.columns.tolist() == right.columns.tolist()
+        assert left.values.tolist() == right.values.tolist()
+
+
+def test_omitted_end_tags_do_not_nest_cells():
+    df = BeautifulSoupTableParser().parse(CASES['omitted_end_tags'])[0]
+    assert df.shape[1] == 3
+    assert df.iloc[-1].tolist()[-3:] == ['净利润', '10', '8']
+
+
+def test_auto_prefers_lxml():
+    assert get_parser('auto').name == 'lxml'
@@ -0,0 +1,78 @@
+"""任务登记表淘汰策略测试"""
+
+import os
+
+import task_registry
+from task_registry import TaskRegistry
+
+
+def test_intermediate_result_keeps_task_alive(tmp_path):
+    evicted = []
+    registry = TaskRegistry(max_tasks=1, on_evict=evicted.append)
+    work_dir = tmp_path / 'a'
+    work_dir.mkdir()
+
+    registry.create('a', work_dir=str(work_dir))
+    registry.set_result('a', {'status': 'transpose_completed'}, finished=False)
+    registry.create('b')
+
+    assert evicted == []
+    assert os.path.isdir(work_dir)
+    assert registry.result('a') == {'status': 'transpose_completed'}
+
+    registry.set_result('a', {'status': 'completed'})
+    registry.purge()
+    assert evicted == ['a']
+    assert not os.path.exists(work_dir)
+
+
+def test_finished_task_expires_after_ttl(monkeypatch):
+    registry = TaskRegistry(ttl=10)
+    registry.create('a')
+    registry.set_result('a', {'status': 'transpose_completed'}, finished=False)
+
+    now = task_registry.time.monotonic()
+    monkeypatch.setattr(task_registry.time, 'monotonic', lambda: now + 60)
+    assert registry.get('a') is not None
+
+    registry.set_result('a', {'status': 'completed'})
+    monkeypatch.setattr(task_registry.time, 'monotonic', lambda: now + 120)
+    assert registry.get('a') is None
+
+
+def test_removing_running_task_defers_release(tmp_path):
+    evicted = []
+    registry = TaskRegistry(on_evict=evicted.append)
+    work_dir = tmp_path / 'a'
+    work_dir.mkdir()
+    registry.create('a', work_dir=str(work_dir))
+
+    assert registry.remove('a')
+    assert registry.get('a') is None
+    assert registry.cancelled('a')
+    assert os.path.isdir(work_dir)
+    assert evicted == []
+
+    # 后台线程仍在运行: 中间结果不再登记, 也不释放
+    assert not registry.set_result('a', {'status': 'transpose_completed'}, finished=False)
+    assert evicted == []
+
+    assert not registry.set_result('a', {'status': 'completed'})
+    assert evicted == ['a']
+    assert not os.path.exists(work_dir)
+    assert not registry.cancelled('a')
+    assert registry.stats()['cancelled'] == 0
+
+
+def test_removing_finished_task_releases_immediately(tmp_path):
+    evicted = []
+    registry = TaskRegistry(on_evict=evicted.append)
+    work_dir = tmp_path / 'a'
+    work_dir.mkdir()
+    registry.create('a', work_dir=str(work_dir))
+    registry.set_result('a', {'status': 'completed'})
+
+    assert registry.remove('a')
+    assert evicted == ['a']
+    assert not os.path.exists(work_dir)
+    assert not registry.cancelled('a')